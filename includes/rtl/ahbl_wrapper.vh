@@ -37,6 +37,17 @@
 	                                    wire	ahbl_we	= last_HWRITE & ahbl_valid;\
 	                                    wire	ahbl_re	= ~last_HWRITE & ahbl_valid;
 
+// Wrappers of IPs with byte strobed registers use the _STRB variants of the
+// ports and control signals, which add HSIZE and the byte write enables
+// ahbl_byte_sel derived from HSIZE and HADDR[1:0].
+`define     AHBL_CTRL_SIGNALS_STRB      `AHBL_CTRL_SIGNALS\
+                                        reg [2:0] last_HSIZE;\
+                                        always@ (posedge HCLK or negedge HRESETn)\
+                                            if(~HRESETn) last_HSIZE <= 3'b0;\
+                                            else if(HREADY) last_HSIZE <= HSIZE;\
+                                        wire[3:0]   ahbl_byte_sel = {4{ahbl_we}} & ((last_HSIZE == 3'd0) ? (4'b0001 << last_HADDR[1:0]) :\
+                                                                                (last_HSIZE == 3'd1) ? (last_HADDR[1] ? 4'b1100 : 4'b0011) : 4'b1111);
+
 `define		AHBL_REG(name, init, size)	`AHBL_BLOCK(name, init)\
                                         else if(ahbl_we & (last_HADDR[`AHBL_AW-1:0]==``name``_OFFSET)) \
                                             name <= HWDATA[``size``-1:0];
@@ -60,6 +71,17 @@
                                             IC_REG <= HWDATA[``size``-1:0]; \
                                         else IC_REG <= ``size``'d0;
 
+// Byte strobed registers: any address within the register word selects it
+// and the bytes enabled by ahbl_byte_sel (from HSIZE and HADDR[1:0]) are
+// written.
+`define		AHBL_REG_STRB(name, init, size)	`AHBL_BLOCK(name, init)\
+                                        else if({last_HADDR[`AHBL_AW-1:2], 2'b00}==``name``_OFFSET) begin\
+                                            if(ahbl_byte_sel[0]) name[ 7: 0] <= HWDATA[ 7: 0];\
+                                            if(ahbl_byte_sel[1]) name[15: 8] <= HWDATA[15: 8];\
+                                            if(ahbl_byte_sel[2]) name[23:16] <= HWDATA[23:16];\
+                                            if(ahbl_byte_sel[3]) name[31:24] <= HWDATA[31:24];\
+                                        end
+
 `define     AHBL_SLAVE_PORTS            input wire          HCLK,\
                                         input wire          HRESETn,\
                                         input wire          HWRITE,\
@@ -72,4 +94,32 @@
                                         output wire [31:0]  HRDATA,\
                                         output wire         IRQ\
 
+`define     AHBL_SLAVE_PORTS_STRB       `AHBL_SLAVE_PORTS,\
+                                        input wire [2:0]    HSIZE
+
 `define     AHBL_MIS_REG(size)          wire[size-1:0]      MIS_REG	= RIS_REG & IM_REG;
+
+// Register variants that use the select wires of the shared address decoder
+// (``name``_SEL) instead of comparing the address against ``name``_OFFSET.
+`define		AHBL_REG_SEL(name, init, size)	`AHBL_BLOCK(name, init)\
+                                        else if(ahbl_we & ``name``_SEL)\
+                                            name <= HWDATA[``size``-1:0];
+
+`define     AHBL_REG_AC_SEL(name, init, size, pat)	`AHBL_BLOCK(name, init)\
+                                                else if(ahbl_we & ``name``_SEL)\
+                                                    name <= HWDATA[``size``-1:0];\
+                                                else\
+                                                    name <= pat & name;
+
+`define		AHBL_REG_STRB_SEL(name, init, size)	`AHBL_BLOCK(name, init)\
+                                        else if(``name``_SEL) begin\
+                                            if(ahbl_byte_sel[0]) name[ 7: 0] <= HWDATA[ 7: 0];\
+                                            if(ahbl_byte_sel[1]) name[15: 8] <= HWDATA[15: 8];\
+                                            if(ahbl_byte_sel[2]) name[23:16] <= HWDATA[23:16];\
+                                            if(ahbl_byte_sel[3]) name[31:24] <= HWDATA[31:24];\
+                                        end
+
+`define		AHBL_IC_REG_SEL(size)		`AHBL_BLOCK(IC_REG, ``size``'b0)\
+                                        else if(ahbl_we & IC_REG_SEL)\
+                                            IC_REG <= HWDATA[``size``-1:0];\
+                                        else IC_REG <= ``size``'d0;
@@ -71,4 +71,33 @@
                                         output wire [31:0]  PRDATA,\
                                         output wire         IRQ\
                                         
-`define     APB_MIS_REG(size)           wire[size-1:0]      MIS_REG	= RIS_REG & IM_REG;
\ No newline at end of file
+`define     APB_MIS_REG(size)           wire[size-1:0]      MIS_REG	= RIS_REG & IM_REG;
+
+// Register variants that use the select wires of the shared address decoder
+// (``name``_SEL) instead of comparing the address against ``name``_OFFSET.
+`define		APB_REG_SEL(name, init, size)	`APB_BLOCK(name, init)\
+                                        else if(apb_we & ``name``_SEL)\
+                                            name <= PWDATA[``size``-1:0];
+
+`define		APB_REG_BYTE_SEL(name, init, size)	`APB_BLOCK(name, init)\
+                                            else if(apb_we & ``name``_SEL)\
+                                                name <= PWDATA[``size``-1:0];\
+                                            else if(apb_we & ``name``_BYTE_SEL)\
+                                                case(PADDR[3:2])\
+                                                    2'b00: name[ 7: 0] <= PWDATA[ 7: 0];\
+                                                    2'b01: name[15: 8] <= PWDATA[15: 8];\
+                                                    2'b10: name[23:16] <= PWDATA[23:16];\
+                                                    2'b11: name[31:24] <= PWDATA[31:24];\
+                                                endcase
+
+`define		APB_REG_AC_SEL(name, init, size, pat)	`APB_BLOCK(name, init)\
+                                                else if(apb_we & ``name``_SEL)\
+                                                    name <= PWDATA[``size``-1:0];\
+                                                else\
+                                                    name <= pat & name;
+
+`define		APB_IC_REG_SEL(size)		`APB_BLOCK(IC_REG, ``size``'b0)\
+                                        else if(apb_we & IC_REG_SEL)\
+                                            IC_REG <= PWDATA[``size``-1:0];\
+                                        else\
+                                            IC_REG <= ``size``'d0;
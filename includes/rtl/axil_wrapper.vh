@@ -0,0 +1,104 @@
+`ifdef PRINT_LICENSE 
+/*
+	Copyright 2024 Efabless Corp.
+
+	Licensed under the Apache License, Version 2.0 (the "License"); 
+	you may not use this file except in compliance with the License. 
+	You may obtain a copy of the License at:
+
+	http://www.apache.org/licenses/LICENSE-2.0
+
+	Unless required by applicable law or agreed to in writing, software 
+	distributed under the License is distributed on an "AS IS" BASIS, 
+	WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+	See the License for the specific language governing permissions and 
+	limitations under the License.
+*/
+`endif
+
+`define     AXIL_BLOCK(name, init)      always @(posedge ACLK or negedge ARESETn) if(~ARESETn) name <= init;
+
+// The write (AW/W/B) and read (AR/R) channels are independent. A write is
+// accepted when AWVALID and WVALID are both high and the write response of
+// the previous one is taken (or not pending); a read is accepted when ARVALID
+// is high and the read data of the previous one is taken (or not pending),
+// so one write and one read can be accepted in the same cycle. The responses
+// are registered and always OKAY. axil_req_we/axil_req_re are the requests
+// before the generated axil_wstall/axil_rstall are applied.
+`define     AXIL_CTRL_SIGNALS           wire            axil_wstall, axil_rstall;\
+                                        wire            axil_req_we = AWVALID & WVALID & (~BVALID | BREADY);\
+                                        wire            axil_req_re = ARVALID & (~RVALID | RREADY);\
+                                        wire            axil_we     = axil_req_we & ~axil_wstall;\
+                                        wire            axil_re     = axil_req_re & ~axil_rstall;\
+                                        wire[3:0]       axil_byte_sel = WSTRB & {4{axil_we}};\
+                                        assign          AWREADY     = axil_we;\
+                                        assign          WREADY      = axil_we;\
+                                        assign          ARREADY     = axil_re;\
+                                        assign          BRESP       = 2'b00;\
+                                        assign          RRESP       = 2'b00;\
+                                        `AXIL_BLOCK(BVALID, 1'b0) else if(axil_we) BVALID <= 1'b1; else if(BREADY) BVALID <= 1'b0;\
+                                        `AXIL_BLOCK(RVALID, 1'b0) else if(axil_re) RVALID <= 1'b1; else if(RREADY) RVALID <= 1'b0;
+
+`define     AXIL_REG(name, init, size)  `AXIL_BLOCK(name, init) else if(axil_we & (AWADDR[`AXIL_AW-1:0]==``name``_OFFSET)) name <= WDATA[size-1:0];
+
+`define     AXIL_REG_AC(name, init, size, pat)  `AXIL_BLOCK(name, init) else if(axil_we & (AWADDR[`AXIL_AW-1:0]==``name``_OFFSET)) name <= WDATA[size-1:0]; else name <= pat & name;
+
+`define     AXIL_AUTO_CLR_REG(name, init, size) `AXIL_BLOCK(name, init) else if(axil_we & (AWADDR[`AXIL_AW-1:0]==``name``_OFFSET)) name <= WDATA[size-1:0]; else name <= 'b0;
+
+// Byte strobed registers: any address within the register word selects it
+// and the bytes enabled by axil_byte_sel (WSTRB) are written.
+`define     AXIL_REG_STRB(name, init, size) `AXIL_BLOCK(name, init) else if({AWADDR[`AXIL_AW-1:2], 2'b00}==``name``_OFFSET) begin \
+                                            if(axil_byte_sel[0]) name[ 7: 0] <= WDATA[ 7: 0]; \
+                                            if(axil_byte_sel[1]) name[15: 8] <= WDATA[15: 8]; \
+                                            if(axil_byte_sel[2]) name[23:16] <= WDATA[23:16]; \
+                                            if(axil_byte_sel[3]) name[31:24] <= WDATA[31:24]; \
+                                        end
+
+`define     AXIL_IC_REG(sz)             `AXIL_BLOCK(IC_REG, sz'b0) \
+                                        else if(axil_we & (AWADDR[`AXIL_AW-1:0]==IC_REG_OFFSET)) \
+                                            IC_REG <= WDATA[``sz``-1:0]; \
+                                        else \
+                                            IC_REG <= sz'd0;
+
+`define     AXIL_SLAVE_PORTS            input   wire            ACLK,\
+                                        input   wire            ARESETn,\
+                                        input   wire [31:0]     AWADDR,\
+                                        input   wire            AWVALID,\
+                                        output  wire            AWREADY,\
+                                        input   wire [31:0]     WDATA,\
+                                        input   wire [3:0]      WSTRB,\
+                                        input   wire            WVALID,\
+                                        output  wire            WREADY,\
+                                        output  wire [1:0]      BRESP,\
+                                        output  reg             BVALID,\
+                                        input   wire            BREADY,\
+                                        input   wire [31:0]     ARADDR,\
+                                        input   wire            ARVALID,\
+                                        output  wire            ARREADY,\
+                                        output  wire [31:0]     RDATA,\
+                                        output  wire [1:0]      RRESP,\
+                                        output  reg             RVALID,\
+                                        input   wire            RREADY,\
+                                        output  wire            IRQ
+
+`define     AXIL_MIS_REG(size)          wire[size-1:0]      MIS_REG	= RIS_REG & IM_REG;
+
+// Register variants that use the select wires of the shared address decoder
+// (``name``_SEL) instead of comparing the address against ``name``_OFFSET.
+// The select wires decode the write address (AWADDR).
+`define     AXIL_REG_SEL(name, init, size)  `AXIL_BLOCK(name, init) else if(axil_we & ``name``_SEL) name <= WDATA[size-1:0];
+
+`define     AXIL_REG_AC_SEL(name, init, size, pat)  `AXIL_BLOCK(name, init) else if(axil_we & ``name``_SEL) name <= WDATA[size-1:0]; else name <= pat & name;
+
+`define     AXIL_REG_STRB_SEL(name, init, size) `AXIL_BLOCK(name, init) else if(``name``_SEL) begin \
+                                            if(axil_byte_sel[0]) name[ 7: 0] <= WDATA[ 7: 0]; \
+                                            if(axil_byte_sel[1]) name[15: 8] <= WDATA[15: 8]; \
+                                            if(axil_byte_sel[2]) name[23:16] <= WDATA[23:16]; \
+                                            if(axil_byte_sel[3]) name[31:24] <= WDATA[31:24]; \
+                                        end
+
+`define     AXIL_IC_REG_SEL(sz)         `AXIL_BLOCK(IC_REG, sz'b0) \
+                                        else if(axil_we & IC_REG_SEL) \
+                                            IC_REG <= WDATA[``sz``-1:0]; \
+                                        else \
+                                            IC_REG <= sz'd0;
@@ -26,6 +26,15 @@
 
 `define     WB_AUTO_CLR_REG(name, init, size)    `WB_BLOCK(name, init) else if(wb_we & (adr_i[`WB_AW-1:0]==``name``_OFFSET)) name <= dat_i[size-1:0]; else name <= 'b0;
 
+// Byte strobed registers: any address within the register word selects it
+// and the bytes enabled by wb_byte_sel (sel_i) are written.
+`define     WB_REG_STRB(name, init, size)   `WB_BLOCK(name, init) else if({adr_i[`WB_AW-1:2], 2'b00}==``name``_OFFSET) begin \
+                                            if(wb_byte_sel[0]) name[ 7: 0] <= dat_i[ 7: 0]; \
+                                            if(wb_byte_sel[1]) name[15: 8] <= dat_i[15: 8]; \
+                                            if(wb_byte_sel[2]) name[23:16] <= dat_i[23:16]; \
+                                            if(wb_byte_sel[3]) name[31:24] <= dat_i[31:24]; \
+                                        end
+
 `define     WB_CTRL_SIGNALS             wire            wb_valid    = cyc_i & stb_i;\
                                         wire            wb_we       = we_i & wb_valid;\
                                         wire            wb_re       = ~we_i & wb_valid;\
@@ -49,4 +58,48 @@
                                         input   wire            we_i,\
                                         output  wire            IRQ
                                         
-`define     WB_MIS_REG(size)           wire[size-1:0]      MIS_REG	= RIS_REG & IM_REG;
\ No newline at end of file
+`define     WB_MIS_REG(size)           wire[size-1:0]      MIS_REG	= RIS_REG & IM_REG;
+
+// Wishbone B4 pipelined interface: a request (cyc_i & stb_i) is accepted in
+// every cycle stall_o is low and acknowledged in the next cycle, so requests
+// and acknowledges overlap. wb_req_re/wb_req_we are the requests before they
+// are accepted.
+`define     WB_PIPE_CTRL_SIGNALS        wire            wb_req      = cyc_i & stb_i;\
+                                        wire            wb_req_we   = we_i & wb_req;\
+                                        wire            wb_req_re   = ~we_i & wb_req;\
+                                        wire            wb_valid    = wb_req & ~stall_o;\
+                                        wire            wb_we       = we_i & wb_valid;\
+                                        wire            wb_re       = ~we_i & wb_valid;\
+                                        wire[3:0]       wb_byte_sel = sel_i & {4{wb_we}};
+
+`define     WB_PIPE_SLAVE_PORTS         input   wire            clk_i,\
+                                        input   wire            rst_i,\
+                                        input   wire [31:0]     adr_i,\
+                                        input   wire [31:0]     dat_i,\
+                                        output  wire [31:0]     dat_o,\
+                                        input   wire [3:0]      sel_i,\
+                                        input   wire            cyc_i,\
+                                        input   wire            stb_i,\
+                                        output  reg             ack_o,\
+                                        output  wire            stall_o,\
+                                        input   wire            we_i,\
+                                        output  wire            IRQ
+
+// Register variants that use the select wires of the shared address decoder
+// (``name``_SEL) instead of comparing the address against ``name``_OFFSET.
+`define     WB_REG_SEL(name, init, size)    `WB_BLOCK(name, init) else if(wb_we & ``name``_SEL) name <= dat_i[size-1:0];
+
+`define     WB_REG_AC_SEL(name, init, size, pat)    `WB_BLOCK(name, init) else if(wb_we & ``name``_SEL) name <= dat_i[size-1:0]; else name <= pat & name;
+
+`define     WB_REG_STRB_SEL(name, init, size)   `WB_BLOCK(name, init) else if(``name``_SEL) begin \
+                                            if(wb_byte_sel[0]) name[ 7: 0] <= dat_i[ 7: 0]; \
+                                            if(wb_byte_sel[1]) name[15: 8] <= dat_i[15: 8]; \
+                                            if(wb_byte_sel[2]) name[23:16] <= dat_i[23:16]; \
+                                            if(wb_byte_sel[3]) name[31:24] <= dat_i[31:24]; \
+                                        end
+
+`define     WB_IC_REG_SEL(sz)           `WB_BLOCK(IC_REG, sz'b0) \
+                                        else if(wb_we & IC_REG_SEL) \
+                                            IC_REG <= dat_i[``sz``-1:0]; \
+                                        else \
+                                            IC_REG <= sz'd0;
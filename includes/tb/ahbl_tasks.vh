@@ -26,7 +26,7 @@ task AHBL_W_READ (input [31:0] addr, output [31:0] data);
         HADDR   = addr;
         HREADY  = 1'b1;
         HSEL    = 1'b1;
-        // HSIZE   = size;
+        HSIZE   = 3'b010;
         @(posedge HCLK);
         #1;
         HTRANS  = 2'b00;
@@ -45,7 +45,7 @@ task AHBL_W_WRITE(input [31:0] addr, input [31:0] data);
         HADDR   = addr;
         HREADY  = 1'b1;
         HSEL    = 1'b1;
-        // HSIZE   = size;
+        HSIZE   = 3'b010;
         @(posedge HCLK);
         #1;
         HTRANS  = 2'b00;;
@@ -53,4 +53,38 @@ task AHBL_W_WRITE(input [31:0] addr, input [31:0] data);
         #1;
         wait(HREADYOUT);
     end
+endtask
+
+// Byte and half-word writes. The data is replicated on all the byte lanes;
+// the slave takes the lanes selected by HSIZE and HADDR[1:0].
+task AHBL_SIZED_WRITE(input [31:0] addr, input [31:0] data, input [2:0] size);
+    begin : task_body
+        wait (HREADYOUT == 1'b1);
+        @(posedge HCLK);
+        #1;
+        HTRANS  = 2'b10;
+        HWRITE  = 1'b1;
+        HADDR   = addr;
+        HREADY  = 1'b1;
+        HSEL    = 1'b1;
+        HSIZE   = size;
+        @(posedge HCLK);
+        #1;
+        HTRANS  = 2'b00;;
+        HWDATA  = data;
+        #1;
+        wait(HREADYOUT);
+    end
+endtask
+
+task AHBL_B_WRITE(input [31:0] addr, input [7:0] data);
+    begin
+        AHBL_SIZED_WRITE(addr, {4{data}}, 3'b000);
+    end
+endtask
+
+task AHBL_H_WRITE(input [31:0] addr, input [15:0] data);
+    begin
+        AHBL_SIZED_WRITE(addr, {2{data}}, 3'b001);
+    end
 endtask
\ No newline at end of file
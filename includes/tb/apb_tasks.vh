@@ -27,6 +27,7 @@ task APB_W_WRITE (input [31:0] address, input [31:0] data );
         @(posedge PCLK);
         PENABLE = 1;
         @(posedge PCLK);
+        while (PREADY == 0) @(posedge PCLK);
         PSEL    = 0;
         PWRITE  = 0;
         PENABLE = 0;
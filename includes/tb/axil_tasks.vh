@@ -0,0 +1,56 @@
+/*
+	Copyright 2024 Efabless Corp.
+    
+	Licensed under the Apache License, Version 2.0 (the "License"); 
+	you may not use this file except in compliance with the License. 
+	You may obtain a copy of the License at:
+
+	http://www.apache.org/licenses/LICENSE-2.0
+
+	Unless required by applicable law or agreed to in writing, software 
+	distributed under the License is distributed on an "AS IS" BASIS, 
+	WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+	See the License for the specific language governing permissions and 
+	limitations under the License.
+*/
+
+// The handshakes are sampled on the falling edge. BREADY and RREADY are kept
+// high, so the responses are taken as soon as they are valid.
+task AXIL_W_WRITE(input [31:0] addr, input [31:0] data);
+    begin : task_body
+        @(posedge ACLK);
+        #1;
+        AWADDR  = addr;
+        AWVALID = 1;
+        WDATA   = data;
+        WSTRB   = 4'hF;
+        WVALID  = 1;
+        BREADY  = 1;
+        @(negedge ACLK);
+        while (AWREADY == 0) @(negedge ACLK);
+        @(posedge ACLK);
+        #1;
+        AWVALID = 0;
+        WVALID  = 0;
+        wait (BVALID == 1);
+        @(posedge ACLK);
+    end
+endtask
+
+task AXIL_W_READ(input [31:0] addr, output [31:0] data);
+    begin : task_body
+        @(posedge ACLK);
+        #1;
+        ARADDR  = addr;
+        ARVALID = 1;
+        RREADY  = 1;
+        @(negedge ACLK);
+        while (ARREADY == 0) @(negedge ACLK);
+        @(posedge ACLK);
+        #1;
+        ARVALID = 0;
+        wait (RVALID == 1);
+        data    = RDATA;
+        @(posedge ACLK);
+    end
+endtask
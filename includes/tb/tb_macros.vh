@@ -37,7 +37,9 @@
                                                 end 
 `define     TB_APB_SIG                          reg PWRITE, PENABLE, PSEL; reg [31:0] PWDATA, PADDR; wire PREADY; wire [31:0] PRDATA; wire IRQ;
 `define     TB_AHBL_SIG                          reg HWRITE, HSEL; reg [2:0] HSIZE; reg [1:0] HTRANS; reg [31:0] HWDATA, HADDR; reg HREADY; wire HREADYOUT; wire [31:0] HRDATA; wire IRQ;
-`define     TB_WB_SIG                           reg cyc_i, stb_i, we_i; reg [3:0] sel_i; reg [31:0] adr_i, dat_i; wire ack_o; wire[31:0]  dat_o; wire IRQ;
+`define     TB_WB_SIG                           reg cyc_i, stb_i, we_i; reg [3:0] sel_i; reg [31:0] adr_i, dat_i; wire ack_o; wire stall_o = 1'b0; wire[31:0]  dat_o; wire IRQ;
+`define     TB_AXIL_SIG                         reg AWVALID = 0, WVALID = 0, BREADY = 0, ARVALID = 0, RREADY = 0; reg [3:0] WSTRB; reg [31:0] AWADDR, WDATA, ARADDR; wire AWREADY, WREADY, BVALID, ARREADY, RVALID; wire [1:0] BRESP, RRESP; wire [31:0] RDATA; wire IRQ;
+`define     TB_WB_PIPE_SIG                      reg cyc_i, stb_i, we_i; reg [3:0] sel_i; reg [31:0] adr_i, dat_i; wire ack_o, stall_o; wire[31:0]  dat_o; wire IRQ;
 `define     TB_AHBL_SLAVE_CONN                   .HCLK(HCLK),\
                                                 .HRESETn(HRESETn),\
                                                 .HSEL(HSEL),\
@@ -45,10 +47,12 @@
                                                 .HTRANS(HTRANS),\
                                                 .HWDATA(HWDATA),\
                                                 .HWRITE(HWRITE),\
-                                                .HREADY(HREADY),\
+                                                .HREADY(HREADY & HREADYOUT),\
                                                 .HREADYOUT(HREADYOUT),\
                                                 .HRDATA(HRDATA),\
                                                 .IRQ(IRQ)
+`define     TB_AHBL_SLAVE_CONN_STRB              `TB_AHBL_SLAVE_CONN,\
+                                                .HSIZE(HSIZE)
 `define     TB_APB_SLAVE_CONN                   .PCLK(PCLK),\
                                                 .PRESETn(PRESETn),\
                                                 .PWRITE(PWRITE),\
@@ -71,6 +75,40 @@
                                                 .ack_o(ack_o), \ 
                                                 .dat_o(dat_o), \
                                                 .IRQ(IRQ)
+
+`define     TB_AXIL_SLAVE_CONN                  .ACLK(ACLK), \
+                                                .ARESETn(ARESETn), \
+                                                .AWADDR(AWADDR), \
+                                                .AWVALID(AWVALID), \
+                                                .AWREADY(AWREADY), \
+                                                .WDATA(WDATA), \
+                                                .WSTRB(WSTRB), \
+                                                .WVALID(WVALID), \
+                                                .WREADY(WREADY), \
+                                                .BRESP(BRESP), \
+                                                .BVALID(BVALID), \
+                                                .BREADY(BREADY), \
+                                                .ARADDR(ARADDR), \
+                                                .ARVALID(ARVALID), \
+                                                .ARREADY(ARREADY), \
+                                                .RDATA(RDATA), \
+                                                .RRESP(RRESP), \
+                                                .RVALID(RVALID), \
+                                                .RREADY(RREADY), \
+                                                .IRQ(IRQ)
+
+`define     TB_WB_PIPE_SLAVE_CONN               .clk_i(clk_i), \
+                                                .rst_i(rst_i), \
+                                                .cyc_i(cyc_i), \
+                                                .stb_i(stb_i), \
+                                                .we_i(we_i), \
+                                                .sel_i(sel_i), \
+                                                .adr_i(adr_i), \
+                                                .dat_i(dat_i), \
+                                                .ack_o(ack_o), \
+                                                .stall_o(stall_o), \
+                                                .dat_o(dat_o), \
+                                                .IRQ(IRQ)
                                                 
 
 
@@ -51,4 +51,112 @@ task WB_W_READ(input [31:0] addr, output [31:0] data);
         stb_i   = 0;
 
     end
-endtask
\ No newline at end of file
+endtask
+
+// Byte and half-word writes. The data is replicated on all the byte lanes
+// and sel_i selects the lanes written, from addr[1:0].
+task WB_SEL_WRITE(input [31:0] addr, input [31:0] data, input [3:0] sel);
+    begin : task_body
+        @(posedge clk_i);
+        #1;
+        cyc_i   = 1;
+        stb_i   = 1;
+        we_i    = 1;
+        adr_i   = addr;
+        dat_i   = data;
+        sel_i   = sel;
+        wait (ack_o == 1);
+        @(posedge clk_i);
+        cyc_i   = 0;
+        stb_i   = 0;
+    end
+endtask
+
+task WB_B_WRITE(input [31:0] addr, input [7:0] data);
+    begin
+        WB_SEL_WRITE({addr[31:2], 2'b00}, {4{data}}, 4'b0001 << addr[1:0]);
+    end
+endtask
+
+task WB_H_WRITE(input [31:0] addr, input [15:0] data);
+    begin
+        WB_SEL_WRITE({addr[31:2], 2'b00}, {2{data}}, addr[1] ? 4'b1100 : 4'b0011);
+    end
+endtask
+
+// Pipelined (B4) transfers. A burst issues a request in every cycle stall_o
+// is low and completes when all of them are acknowledged; the address of
+// beat i is addr + i * step (use step 0 for a FIFO data register). The
+// write data is taken from, and the read data is stored to, WB_BURST_DATA.
+// The requests and the acknowledges are sampled on the falling edge.
+reg [31:0] WB_BURST_DATA [0:255];
+
+task WB_P_WRITE_BURST(input [31:0] addr, input [31:0] step, input integer count);
+    integer issued, acked;
+    begin : task_body
+        issued  = 0;
+        acked   = 0;
+        @(posedge clk_i);
+        #1;
+        cyc_i   = 1;
+        we_i    = 1;
+        sel_i   = 4'hF;
+        while (acked < count) begin
+            stb_i   = (issued < count);
+            adr_i   = addr + issued * step;
+            dat_i   = WB_BURST_DATA[issued];
+            @(negedge clk_i);
+            if (ack_o == 1)
+                acked = acked + 1;
+            if (stb_i & ~stall_o)
+                issued = issued + 1;
+            @(posedge clk_i);
+            #1;
+        end
+        cyc_i   = 0;
+        stb_i   = 0;
+    end
+endtask
+
+task WB_P_READ_BURST(input [31:0] addr, input [31:0] step, input integer count);
+    integer issued, acked;
+    begin : task_body
+        issued  = 0;
+        acked   = 0;
+        @(posedge clk_i);
+        #1;
+        cyc_i   = 1;
+        we_i    = 0;
+        sel_i   = 4'hF;
+        dat_i   = 0;
+        while (acked < count) begin
+            stb_i   = (issued < count);
+            adr_i   = addr + issued * step;
+            @(negedge clk_i);
+            if (ack_o == 1) begin
+                WB_BURST_DATA[acked] = dat_o;
+                acked = acked + 1;
+            end
+            if (stb_i & ~stall_o)
+                issued = issued + 1;
+            @(posedge clk_i);
+            #1;
+        end
+        cyc_i   = 0;
+        stb_i   = 0;
+    end
+endtask
+
+task WB_P_WRITE(input [31:0] addr, input [31:0] data);
+    begin
+        WB_BURST_DATA[0] = data;
+        WB_P_WRITE_BURST(addr, 0, 1);
+    end
+endtask
+
+task WB_P_READ(input [31:0] addr, output [31:0] data);
+    begin
+        WB_P_READ_BURST(addr, 0, 1);
+        data = WB_BURST_DATA[0];
+    end
+endtask
@@ -0,0 +1,253 @@
+"""
+   Benchmarks bus_wrap.py over synthetic register maps (and, optionally,
+   real IP description files). Every target is generated for every IP and
+   the wall time and the peak memory of each run are reported as JSON.
+"""
+
+import os
+import sys
+import json
+import time
+import yaml
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+import bus_wrap
+
+BENCH_TARGETS = ["apb", "ahbl", "wb", "axil", "apb-dft", "ahbl-dft", "wb-dft", "axil-dft", "apb-tb", "ahbl-tb", "wb-tb", "axil-tb", "ch", "md"]
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+# The modules bus_wrap.py --help may import; anything else belongs in the function using it
+STARTUP_MODULES = ["math"]
+
+
+def print_help():
+    print(f"Usage: {sys.argv[0]} [ip.yaml ...] [--sizes n[,n...]] [--targets target[,target...]] [-r repeat] [-o out.json] [--startup-budget ms]")
+    print("Arguments:")
+    print("\tip.yaml: IP description files to benchmark in addition to the synthetic ones")
+    print("Options:")
+    print(f"\t--sizes: the register counts of the synthetic IPs; 0 disables them (default: {','.join(map(str, DEFAULT_SIZES))})")
+    print(f"\t--targets: the targets to time (default: {','.join(BENCH_TARGETS)})")
+    print("\t-r, --repeat: the number of timed runs per target; the fastest is reported (default: 3)")
+    print("\t-o, --out: the JSON report file (default: stdout)")
+    print("\t--startup-budget: fail if the modules imported by bus_wrap.py --help take longer than this, or if it imports")
+    print(f"\t\tmodules other than {', '.join(STARTUP_MODULES)}")
+
+
+def make_ip(n_regs):
+    """
+    Make a synthetic IP description with n_regs registers: a read and a write
+    FIFO, 'w' registers with 4 fields, 'r' registers with 4 fields and plain
+    'w' registers, plus up to 32 interrupt flags.
+
+    Returns:
+        dict: The IP description.
+    """
+    ip = {
+        "info": {"name": f"SYNTH_{n_regs}", "description": f"Synthetic IP with {n_regs} registers.",
+                 "repo": "n/a", "owner": "n/a", "license": "n/a", "author": "n/a", "email": "n/a",
+                 "version": "v0.0.0", "date": "1-1-2024", "category": "digital", "tags": ["synthetic"],
+                 "bus": ["generic"], "type": "soft", "status": "n/a",
+                 "cell_count": [{"IP": 0}, {"APB": 0}, {"AHBL": 0}, {"WB": 0}],
+                 "clock_freq_mhz": [{"IP": 0}, {"APB": 0}, {"AHBL": 0}, {"WB": 0}],
+                 "width": "0.0", "height": "0.0", "technology": "n/a",
+                 "digital_supply_voltage": "n/a", "analog_supply_voltage": "n/a"},
+        "parameters": [{"name": "DW", "default": 8, "description": "FIFO data width"},
+                       {"name": "FAW", "default": 4, "description": "FIFO address width"}],
+        "ports": [],
+        "external_interface": [{"name": "pin_in", "port": "pin_in", "direction": "input", "width": 1, "description": "Input pin"},
+                               {"name": "pin_out", "port": "pin_out", "direction": "output", "width": 1, "description": "Output pin"}],
+        "clock": {"name": "clk", "gated": "yes"},
+        "reset": {"name": "rst_n", "level": 0},
+        "registers": [],
+        "flags": [],
+        "fifos": [],
+    }
+    ports = ip["ports"]
+    registers = ip["registers"]
+
+    def add_port(name, width, direction):
+        ports.append({"name": name, "width": width, "direction": direction, "description": f"{name} port"})
+
+    for name, direction in [("rdata", "output"), ("rd", "input"), ("wdata", "input"), ("wr", "input")]:
+        add_port(name, "DW" if "data" in name else 1, direction)
+    for fifo, mode, data, ctrl in [("RX_FIFO", "read", "rdata", "rd"), ("TX_FIFO", "write", "wdata", "wr")]:
+        for port, direction in [("flush", "input"), ("threshold", "input"), ("level", "output")]:
+            add_port(f"{fifo.lower()}_{port}", 1 if port == "flush" else "FAW", direction)
+        ip["fifos"].append({"name": fifo, "type": mode, "width": "DW", "address_width": "FAW",
+                            "register": f"{fifo[:2]}DATA", "data_port": data, "control_port": ctrl,
+                            "flush_enable": True, "flush_port": f"{fifo.lower()}_flush",
+                            "threshold_port": f"{fifo.lower()}_threshold", "level_port": f"{fifo.lower()}_level"})
+    registers.append({"name": "RXDATA", "size": "DW", "mode": "r", "fifo": True, "offset": 0,
+                      "read_port": "rdata", "description": "RX FIFO data"})
+    registers.append({"name": "TXDATA", "size": "DW", "mode": "w", "fifo": True, "offset": 4,
+                      "write_port": "wdata", "description": "TX FIFO data"})
+
+    for i in range(n_regs):
+        name = f"R{i}"
+        reg = {"name": name, "size": 32, "offset": 8 + 4 * i, "fifo": False, "description": f"Register {i}"}
+        if i % 3 == 2:
+            reg["mode"] = "w"
+            reg["init"] = f"'h{i:x}"
+            reg["write_port"] = name.lower()
+            add_port(name.lower(), 32, "input")
+        else:
+            reg["mode"] = "w" if i % 3 == 0 else "r"
+            direction = "input" if reg["mode"] == "w" else "output"
+            reg["fields"] = []
+            for j in range(4):
+                field = {"name": f"f{j}", "bit_offset": 8 * j, "bit_width": 8, "description": f"Field {j}"}
+                port = f"{name.lower()}_f{j}"
+                field["write_port" if reg["mode"] == "w" else "read_port"] = port
+                add_port(port, 8, direction)
+                reg["fields"].append(field)
+        registers.append(reg)
+
+    for i in range(min(32, max(1, n_regs // 4))):
+        add_port(f"irq{i}", 1, "output")
+        ip["flags"].append({"name": f"IRQ{i}", "port": f"irq{i}", "description": f"Interrupt {i}"})
+    return ip
+
+
+def get_imports(argv):
+    """
+    Run python -X importtime with argv in a fresh interpreter.
+
+    Returns:
+        tuple: (wall time in seconds, {module: self import time in seconds})
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + argv, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    imports = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_us, _, name = line[len("import time:"):].split("|")
+            if self_us.strip().isdigit():
+                imports[name.strip()] = int(self_us) / 1e6
+    return elapsed, imports
+
+def bench_startup(repeat):
+    """
+    Time the cold start of bus_wrap.py --help. The import time only counts
+    the modules bus_wrap.py imports, not the ones the interpreter imports
+    at startup; the fastest of repeat runs is reported.
+
+    Returns:
+        dict: The result, with the modules imported by bus_wrap.py.
+    """
+    _, interpreter = get_imports(["-c", "pass"])
+    runs = []
+    for _ in range(repeat):
+        elapsed, imports = get_imports([bus_wrap.__file__, "--help"])
+        own = {m: t for m, t in imports.items() if m not in interpreter}
+        runs.append((elapsed, sum(own.values()), own))
+    elapsed, import_time, own = min(runs, key=lambda r: r[1])
+    return {"ip": None, "target": "startup", "seconds": min(r[0] for r in runs),
+            "import_seconds": import_time, "imports": sorted(own)}
+
+def bench_target(target, repeat):
+    """
+    Time the generation of a target of the loaded IP, then generate it once
+    more under tracemalloc to get its peak memory.
+
+    Returns:
+        dict: The result of the target.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = bus_wrap.generate(target)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    bus_wrap.generate(target)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"target": target, "seconds": min(times), "peak_bytes": peak, "output_bytes": len(out)}
+
+
+def bench_ip(ip_file, n_regs, targets, repeat):
+    """
+    Benchmark the loading and the targets of an IP description file.
+
+    Returns:
+        list: The results of the IP, one per target.
+    """
+    start = time.perf_counter()
+    bus_wrap.load_ip(ip_file)
+    load_time = time.perf_counter() - start
+    if n_regs is None:
+        n_regs = len(bus_wrap.MODEL.registers)
+    results = [{"ip": bus_wrap.MODEL.name, "registers": n_regs, "target": "load", "seconds": load_time}]
+    for target in targets:
+        result = {"ip": bus_wrap.MODEL.name, "registers": n_regs}
+        try:
+            result.update(bench_target(target, repeat))
+        except SystemExit as e:
+            result.update({"target": target, "error": str(e.code).splitlines()[0]})
+        results.append(result)
+        print(f"{result['ip']}\t{target}\t{result.get('seconds', 0):.4f}s", file=sys.stderr)
+    return results
+
+
+def main():
+    argv = sys.argv[1:]
+    sizes = bus_wrap.get_opt_value(argv, "--sizes")
+    targets = bus_wrap.get_opt_value(argv, "--targets")
+    repeat = bus_wrap.get_opt_value(argv, "--repeat") or bus_wrap.get_opt_value(argv, "-r") or "3"
+    out_file = bus_wrap.get_opt_value(argv, "--out") or bus_wrap.get_opt_value(argv, "-o")
+    budget = bus_wrap.get_opt_value(argv, "--startup-budget")
+
+    opts = [opt for opt in argv if opt.startswith("-")]
+    args = [arg for arg in argv if not arg.startswith("-")]
+
+    if "--help" in opts:
+        print_help()
+        sys.exit(0)
+
+    sizes = [int(s) for s in sizes.split(",")] if sizes is not None else DEFAULT_SIZES
+    targets = targets.split(",") if targets is not None else BENCH_TARGETS
+    for t in targets:
+        if t not in bus_wrap.TARGETS:
+            sys.exit(f"Unknown target '{t}'; valid targets are: {', '.join(bus_wrap.TARGETS)}")
+
+    startup = bench_startup(int(repeat))
+    print(f"startup\t{startup['seconds']:.4f}s\t(imports {startup['import_seconds'] * 1000:.1f}ms)", file=sys.stderr)
+    results = [startup]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n in sizes:
+            if n <= 0:
+                continue
+            ip_file = os.path.join(tmp_dir, f"synth_{n}.yaml")
+            with open(ip_file, "w") as f:
+                yaml.dump(make_ip(n), f, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper), sort_keys=False)
+            results += bench_ip(ip_file, n, targets, int(repeat))
+    for ip_file in args:
+        results += bench_ip(ip_file, None, targets, int(repeat))
+
+    report = {
+        "python": platform.python_version(),
+        "libyaml": bus_wrap.get_yaml_loader() is not yaml.SafeLoader,
+        "repeat": int(repeat),
+        "results": results,
+    }
+    if out_file is None:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+    else:
+        with open(out_file, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if budget is not None:
+        extra = [m for m in startup["imports"] if m not in STARTUP_MODULES]
+        if extra:
+            sys.exit(f"bus_wrap.py --help imports {', '.join(extra)}; import them where they are used.")
+        if startup["import_seconds"] * 1000 > float(budget):
+            sys.exit(f"bus_wrap.py --help spends {startup['import_seconds'] * 1000:.1f}ms importing modules; the budget is {budget}ms.")
+
+
+
+if __name__ == "__main__":
+    main()
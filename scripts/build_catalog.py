@@ -0,0 +1,134 @@
+"""
+   Builds the bus wrappers, C headers and documentation of a catalog of IPs
+   in parallel. The catalog is either a directory of IP description files
+   (e.g. examples/) or an ips.yaml list (e.g. .github/ips.yaml) of IPs that
+   are checked out under a root directory (--ips-root), one directory per IP.
+"""
+
+import os
+import sys
+import time
+import yaml
+import concurrent.futures
+
+import bus_wrap
+
+WRAPPER_TARGETS = ["apb", "apb-dft", "wb", "wb-dft", "ahbl", "ahbl-dft", "axil", "axil-dft"]
+
+
+def print_help():
+    print(f"Usage: {sys.argv[0]} ips.yaml|ip_dir [-o out_dir] [-j workers] [--ips-root dir]")
+    print("Arguments:")
+    print("\tips.yaml: A list of IPs in the .github/ips.yaml format")
+    print("\tip_dir: A directory of IP description files (YAML or JSON)")
+    print("Options:")
+    print("\t-o, --out-dir: the output directory for an ip_dir catalog; each IP gets a sub-directory (default: build)")
+    print("\t-j, --jobs: the number of worker processes (default: the number of CPUs)")
+    print("\t--ips-root: the directory where the IPs of ips.yaml are checked out (default: .)")
+
+
+def is_enabled(item, key):
+    return str(item.get(key, "true")).lower() == "true"
+
+
+def get_catalog_from_list(ips_file, ips_root):
+    """
+    Get the build jobs of the IPs listed in an ips.yaml file. Each IP is
+    expected at <ips_root>/<name>/<name>.yaml and its files are generated
+    in place.
+
+    Returns:
+        list: (IP file, targets, output directory) tuples.
+    """
+    with open(ips_file, "r") as stream:
+        data = yaml.safe_load(stream)
+    jobs = []
+    for item in data:
+        targets = []
+        if is_enabled(item, "bus_wrapper"):
+            targets += WRAPPER_TARGETS
+        if is_enabled(item, "fw"):
+            targets.append("ch")
+        if is_enabled(item, "docs"):
+            targets.append("md")
+        if not targets:
+            continue
+        ip_dir = os.path.join(ips_root, item["name"])
+        jobs.append((os.path.join(ip_dir, f"{item['name']}.yaml"), targets, ip_dir))
+    return jobs
+
+
+def get_catalog_from_dir(ip_dir, out_dir):
+    """
+    Get the build jobs of every IP description file in a directory; all
+    targets are generated into <out_dir>/<file name>.
+
+    Returns:
+        list: (IP file, targets, output directory) tuples.
+    """
+    jobs = []
+    for f in sorted(os.listdir(ip_dir)):
+        name, ext = os.path.splitext(f)
+        if ext not in (".yaml", ".yml", ".json"):
+            continue
+        jobs.append((os.path.join(ip_dir, f), WRAPPER_TARGETS + ["ch", "md"], os.path.join(out_dir, name)))
+    return jobs
+
+
+def build_ip(ip_file, targets, out_dir):
+    """
+    Generate the targets of one IP; runs in a worker process.
+
+    Returns:
+        tuple: (IP file, wall time in seconds, error message or None)
+    """
+    start = time.perf_counter()
+    try:
+        bus_wrap.load_ip(ip_file)
+        bus_wrap.generate_targets(targets, out_dir)
+        error = None
+    except SystemExit as e:
+        error = str(e.code).splitlines()[0]
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return ip_file, time.perf_counter() - start, error
+
+
+def main():
+    argv = sys.argv[1:]
+    out_dir = bus_wrap.get_opt_value(argv, "--out-dir") or bus_wrap.get_opt_value(argv, "-o") or "build"
+    jobs = bus_wrap.get_opt_value(argv, "--jobs") or bus_wrap.get_opt_value(argv, "-j")
+    ips_root = bus_wrap.get_opt_value(argv, "--ips-root") or "."
+
+    opts = [opt for opt in argv if opt.startswith("-")]
+    args = [arg for arg in argv if not arg.startswith("-")]
+
+    if "--help" in opts or len(args) != 1:
+        print_help()
+        sys.exit(0 if "--help" in opts else 1)
+
+    if os.path.isdir(args[0]):
+        catalog = get_catalog_from_dir(args[0], out_dir)
+    else:
+        catalog = get_catalog_from_list(args[0], ips_root)
+
+    workers = int(jobs) if jobs else os.cpu_count()
+    failed = 0
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(build_ip, *job) for job in catalog]
+        for future in concurrent.futures.as_completed(futures):
+            ip_file, elapsed, error = future.result()
+            if error is None:
+                print(f"{ip_file}\t{elapsed:.3f}s\tok")
+            else:
+                failed += 1
+                print(f"{ip_file}\t{elapsed:.3f}s\tFAILED: {error}")
+
+    print(f"Built {len(catalog) - failed}/{len(catalog)} IPs in {time.perf_counter() - start:.3f}s using {workers} workers")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+	Copyright 2024 Efabless Corp.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at:
+
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+"""
+   The bus profiles used by the emitters: the nets of each bus and the
+   code fragments that depend on it, resolved once per bus so that the
+   emitters do not branch on the bus type. Supporting a new bus means
+   adding its profile here and its macro headers under includes/.
+"""
+
+
+class BusProfile:
+    """
+    A bus. `name` is the bus type used in the macro and module names and
+    `tag` its lower case form used in file names and net prefixes. `clk`
+    and `rst` are the clock and reset nets and `rst_level` the active
+    level of the reset; `rst_n` is an active low reset expression. `addr`
+    is the address the registers are decoded from, `wdata` and `rdata` the
+    data buses and `re`/`we` the read and write strobes of the macros.
+    `ready` is the ready output of buses with wait states and `ack` the
+    registered acknowledge of buses without them; the FIFO controls are
+    qualified by `ack`. `stall` is the stall output of pipelined buses,
+    which acknowledge every accepted request in the next cycle; their
+    `req_re`/`req_we` strobes are the requests before they are accepted.
+    `iface` prefixes the port, control signal and testbench macros of the
+    interface. `raddr` is the address reads are decoded from; it is only
+    given for buses with independent read and write channels, which stall
+    each channel on its own (`rstall`/`wstall`) and also have the request
+    strobes. Registers with byte access are written through a byte band
+    alias region on buses with `byte_band` and otherwise with the per-byte
+    write enables `byte_sel` of the bus; on buses with `strb_ports` these
+    need extra ports, so the wrappers of such IPs use the `_STRB` variants
+    of the port, control signal and testbench connection macros. The
+    `*_fmt` members are format strings with the bus already substituted.
+    """
+    __slots__ = ("name", "tag", "iface", "clk", "rst", "rst_level", "rst_n", "rst_edge",
+                 "addr", "raddr", "wdata", "rdata", "re", "we", "req_re", "req_we", "ready", "ack",
+                 "stall", "rstall", "wstall", "byte_band", "byte_sel", "strb_ports", "offset_fmt", "tb_offset_fmt", "match_fmt", "block_fmt")
+
+    def __init__(self, name, clk, rst, rst_level, addr, wdata, rdata, ready=None, ack=None, stall=None, raddr=None, byte_band=False, strb_ports=False):
+        self.name = name
+        self.tag = name.lower()
+        self.iface = f"{name}_PIPE" if stall else name
+        self.clk = clk
+        self.rst = rst
+        self.rst_level = rst_level
+        self.rst_n = rst if rst_level == 0 else f"(~{rst})"
+        self.rst_edge = "negedge" if rst_level == 0 else "posedge"
+        self.addr = addr
+        self.raddr = raddr or addr
+        self.wdata = wdata
+        self.rdata = rdata
+        self.re = f"{self.tag}_re"
+        self.we = f"{self.tag}_we"
+        self.req_re = f"{self.tag}_req_re" if stall or raddr else None
+        self.req_we = f"{self.tag}_req_we" if stall or raddr else None
+        self.ready = ready
+        self.ack = ack
+        self.stall = stall
+        self.rstall = f"{self.tag}_rstall" if raddr else None
+        self.wstall = f"{self.tag}_wstall" if raddr else None
+        self.byte_band = byte_band
+        self.byte_sel = None if byte_band else f"{self.tag}_byte_sel"
+        self.strb_ports = strb_ports
+        # {0}: register name, {1}: offset
+        self.offset_fmt = f"\tlocalparam\t{{0}}_REG_OFFSET = `{name}_AW'h{{1:04X}};"
+        self.tb_offset_fmt = f"\t\t\t{{0}}_REG_OFFSET =\t`{name}_AW'h{{1:04x}},"
+        # {0}: address, {1}: offset localparam
+        self.match_fmt = f"({{0}}[`{name}_AW-1:0] == {{1}})"
+        # {0}: register, {1}: reset value
+        self.block_fmt = f"`{name}_BLOCK({{0}}, {{1}})"
+
+
+# The supported buses: bus type -> profile
+BUS_PROFILES = {
+    "APB":  BusProfile("APB", "PCLK", "PRESETn", 0, "PADDR", "PWDATA", "PRDATA", ready="PREADY", byte_band=True),
+    "AHBL": BusProfile("AHBL", "HCLK", "HRESETn", 0, "last_HADDR", "HWDATA", "HRDATA", ready="HREADYOUT", strb_ports=True),
+    "WB":   BusProfile("WB", "clk_i", "rst_i", 1, "adr_i", "dat_i", "dat_o", ack="ack_o"),
+    "AXIL": BusProfile("AXIL", "ACLK", "ARESETn", 0, "AWADDR", "WDATA", "RDATA", raddr="ARADDR"),
+}
+
+# The pipelined variants of the buses that have one: bus type -> profile
+PIPELINED_PROFILES = {
+    "WB":   BusProfile("WB", "clk_i", "rst_i", 1, "adr_i", "dat_i", "dat_o", stall="stall_o"),
+}
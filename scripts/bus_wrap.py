@@ -24,22 +24,66 @@
 """
 
 
+# Only the modules needed by every run are imported here; the others (PyYAML
+# in particular) are imported by the functions using them, so that --help,
+# JSON descriptions and cached models do not pay for them at startup.
+import os
+import io
 import sys
 import math
-import yaml
-import json
-import copy
+import time
 
 IP  =   None
 
+# The normalized model of IP used by the emitters; see ip_model.py
+MODEL   =   None
+
+# The output sink of the emitters, an in-memory buffer set by generate()
+OUT =   sys.stdout
+
+# The profile of the bus being generated, set by generate(); see bus_profiles.py
+BUS =   None
+
 # Configurations to be loaded from a configuration file
 BUS_AW          = 16
-INT_REG_OFF     = 0xFF00
-FIFO_REG_OFF    = 0xFE00
+INT_REG_OFF_DEFAULT  = 0xFF00
+FIFO_REG_OFF_DEFAULT = 0xFE00
+# The offsets of the IP being generated, set by set_reg_offsets()
+INT_REG_OFF     = INT_REG_OFF_DEFAULT
+FIFO_REG_OFF    = FIFO_REG_OFF_DEFAULT
 BIT_BAND_OFF    = 0xE000
+BIT_BAND_SPAN   = 0x1000
 BYTE_BAND_OFF   = 0xD000
 CLK_GATE_OFF    = INT_REG_OFF + 0x10
 
+# The set, clear and toggle alias regions of the registers with set_clr_tgl:
+# (suffix, region offset, update format ({0}: register, {1}: written data), action)
+ALIAS_REGIONS   = [("SET", 0xA000, "{0} | {1}", "sets"), ("CLR", 0xB000, "{0} & ~{1}", "clears"), ("TGL", 0xC000, "{0} ^ {1}", "toggles")]
+ALIAS_SPAN      = 0x1000
+
+# The build cache file kept in the --targets output directory
+CACHE_FILE      = ".buswrap_cache.json"
+
+# The modules whose code determines the generated output, hashed into the
+# cache keys (see get_generator_hash()), and the hash once computed
+GENERATOR_MODULES = ["bus_wrap.py", "bus_profiles.py", "ip_model.py", "ip_validate.py"]
+GENERATOR_HASH  = None
+
+# The IP models kept by --serve: absolute path -> (content hash, IP, MODEL, generated targets)
+SERVE_MODELS    = {}
+
+# The phases recorded by --profile (see profiled()); None when not profiling
+PROFILE         = None
+PROFILE_START   = 0.0
+PROFILE_DEPTH   = 0
+
+# The polling interval of --watch in seconds
+WATCH_INTERVAL  = 0.25
+
+# The info properties used by the generated code; the others only document the IP
+CODE_INFO_KEYS  = ["name", "author", "email", "owner", "date", "license", "irq_reg_offset",
+                   "fifo_reg_offset", "read_mux", "registered_read", "shared_decoder", "wb_pipelined"]
+
 # Interrupt registers offsets
 IC_OFF          = 0x0C + INT_REG_OFF
 RIS_OFF         = 0x08 + INT_REG_OFF
@@ -50,77 +94,165 @@ MIS_OFF         = 0x04 + INT_REG_OFF
 FLUSH_OFF       = 0x8 + FIFO_REG_OFF
 THRESHOLD_OFF   = 0x4 + FIFO_REG_OFF
 LEVEL_OFF       = 0x0 + FIFO_REG_OFF
+PCOUNT_OFF      = 0xC + FIFO_REG_OFF
+
+def profiled(name, func, *args, **kwargs):
+    """
+    Call func and return its result. With --profile, the call is recorded
+    in PROFILE as the phase `name` with its wall time and the change in the
+    number of allocated memory blocks; phases called from it are nested in
+    it. The string arguments (e.g. the target) are recorded with it.
+    """
+    global PROFILE_DEPTH
+
+    if PROFILE is None:
+        return func(*args, **kwargs)
+    phase = {"name": name, "args": [a for a in args if isinstance(a, str)], "depth": PROFILE_DEPTH}
+    PROFILE.append(phase)
+    PROFILE_DEPTH += 1
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        phase["start"] = start - PROFILE_START
+        phase["seconds"] = time.perf_counter() - start
+        phase["blocks"] = sys.getallocatedblocks() - blocks
+        PROFILE_DEPTH -= 1
+
+def profile_function(func):
+    def wrapper(*args, **kwargs):
+        return profiled(func.__name__, func, *args, **kwargs)
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+def enable_profiling():
+    """
+    Start recording the phases of the run: the loading steps, the
+    generation and write-out of every target and every print_* emitter.
+    """
+    global PROFILE, PROFILE_START
+
+    PROFILE = []
+    PROFILE_START = time.perf_counter()
+    g = globals()
+    for name in list(g):
+        if (name.startswith("print_") and name != "print_help") or name in ("load_ip", "generate"):
+            g[name] = profile_function(g[name])
+
+def save_profile(file_name, profile_format="json"):
+    """
+    Write the recorded phases as JSON (the phases in call order with the
+    totals per phase name) or in the Chrome trace-event format, which can be
+    opened in chrome://tracing or Perfetto.
+    """
+    import json
+
+    phases = [p for p in PROFILE if "seconds" in p]
+    if profile_format == "trace":
+        events = [{"name": p["name"], "cat": "bus_wrap", "ph": "X", "pid": 1, "tid": 1,
+                   "ts": p["start"] * 1e6, "dur": p["seconds"] * 1e6,
+                   "args": {"args": p["args"], "blocks": p["blocks"]}} for p in phases]
+        report = {"traceEvents": events, "displayTimeUnit": "ms"}
+    else:
+        totals = {}
+        for p in phases:
+            total = totals.setdefault(p["name"], {"calls": 0, "seconds": 0.0, "blocks": 0})
+            total["calls"] += 1
+            total["seconds"] += p["seconds"]
+            total["blocks"] += p["blocks"]
+        report = {"ip": MODEL.name if MODEL is not None else None, "argv": sys.argv[1:],
+                  "phases": phases, "totals": totals}
+    with open(file_name, "w") as f:
+        json.dump(report, f, indent=1)
+
+def emit(*args, sep=" ", end="\n"):
+   """
+   Write to the output sink OUT; used by all emitters instead of print().
+   """
+   OUT.write(sep.join(map(str, args)) + end)
 
 def print_license():
-   print(f"/*\n\tCopyright {IP['info']['date'].split('-')[2]} {IP['info']['owner']}\n")
-   print(f"\tAuthor: {IP['info']['author']} ({IP['info']['email']})\n")
-
-   if "MIT" in IP['info']['license'].upper():
-       print("\tPermission is hereby granted, free of charge, to any person obtaining")
-       print("\ta copy of this software and associated documentation files (the")
-       print("\t\"Software\"), to deal in the Software without restriction, including")
-       print("\twithout limitation the rights to use, copy, modify, merge, publish,")
-       print("\tdistribute, sublicense, and/or sell copies of the Software, and to")
-       print("\tpermit persons to whom the Software is furnished to do so, subject to")
-       print("\tthe following conditions:\n")
-       print("\tThe above copyright notice and this permission notice shall be")
-       print("\tincluded in all copies or substantial portions of the Software.\n")
-       print("\tTHE SOFTWARE IS PROVIDED \"AS IS\", WITHOUT WARRANTY OF ANY KIND,")
-       print("\tEXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF")
-       print("\tMERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND")
-       print("\tNONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE")
-       print("\tLIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION")
-       print("\tOF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION")
-       print("\tWITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.")
+   emit(f"/*\n\tCopyright {MODEL.info['date'].split('-')[2]} {MODEL.info['owner']}\n")
+   emit(f"\tAuthor: {MODEL.info['author']} ({MODEL.info['email']})\n")
+
+   if "MIT" in MODEL.info['license'].upper():
+       emit("\tPermission is hereby granted, free of charge, to any person obtaining")
+       emit("\ta copy of this software and associated documentation files (the")
+       emit("\t\"Software\"), to deal in the Software without restriction, including")
+       emit("\twithout limitation the rights to use, copy, modify, merge, publish,")
+       emit("\tdistribute, sublicense, and/or sell copies of the Software, and to")
+       emit("\tpermit persons to whom the Software is furnished to do so, subject to")
+       emit("\tthe following conditions:\n")
+       emit("\tThe above copyright notice and this permission notice shall be")
+       emit("\tincluded in all copies or substantial portions of the Software.\n")
+       emit("\tTHE SOFTWARE IS PROVIDED \"AS IS\", WITHOUT WARRANTY OF ANY KIND,")
+       emit("\tEXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF")
+       emit("\tMERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND")
+       emit("\tNONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE")
+       emit("\tLIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION")
+       emit("\tOF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION")
+       emit("\tWITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.")
    
-   elif "APACHE 2.0" in IP['info']['license'].upper():
-       print("\tLicensed under the Apache License, Version 2.0 (the \"License\");")
-       print("\tyou may not use this file except in compliance with the License.")
-       print("\tYou may obtain a copy of the License at\n")
-       print("\t    www.apache.org/licenses/LICENSE-2.0\n")
-       print("\tUnless required by applicable law or agreed to in writing, software")
-       print("\tdistributed under the License is distributed on an \"AS IS\" BASIS,")
-       print("\tWITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.")
-       print("\tSee the License for the specific language governing permissions and")
-       print("\tlimitations under the License.")
+   elif "APACHE 2.0" in MODEL.info['license'].upper():
+       emit("\tLicensed under the Apache License, Version 2.0 (the \"License\");")
+       emit("\tyou may not use this file except in compliance with the License.")
+       emit("\tYou may obtain a copy of the License at\n")
+       emit("\t    www.apache.org/licenses/LICENSE-2.0\n")
+       emit("\tUnless required by applicable law or agreed to in writing, software")
+       emit("\tdistributed under the License is distributed on an \"AS IS\" BASIS,")
+       emit("\tWITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.")
+       emit("\tSee the License for the specific language governing permissions and")
+       emit("\tlimitations under the License.")
    
-   elif "BSD" in IP['info']['license'].upper():
-       print("\tRedistribution and use in source and binary forms, with or without modification,")
-       print("\tare permitted provided that the following conditions are met:\n")
-       print("\t1. Redistributions of source code must retain the above copyright notice,")
-       print("\tthis list of conditions and the following disclaimer.\n")
-       print(f"\tTHIS SOFTWARE IS PROVIDED BY {self.author} \“AS IS\” AND ANY EXPRESS OR ")
-       print("\tIMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF ")
-       print("\tMERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT ")
-       print(f"\tSHALL {self.author} BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, ")
-       print("\tSPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, ")
-       print("\tPROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; ")
-       print("\tOR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER ")
-       print("\tIN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING ")
-       print("\tIN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF ")
-       print("\tSUCH DAMAGE.")
+   elif "BSD" in MODEL.info['license'].upper():
+       emit("\tRedistribution and use in source and binary forms, with or without modification,")
+       emit("\tare permitted provided that the following conditions are met:\n")
+       emit("\t1. Redistributions of source code must retain the above copyright notice,")
+       emit("\tthis list of conditions and the following disclaimer.\n")
+       emit(f"\tTHIS SOFTWARE IS PROVIDED BY {self.author} \“AS IS\” AND ANY EXPRESS OR ")
+       emit("\tIMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF ")
+       emit("\tMERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT ")
+       emit(f"\tSHALL {self.author} BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, ")
+       emit("\tSPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, ")
+       emit("\tPROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; ")
+       emit("\tOR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER ")
+       emit("\tIN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING ")
+       emit("\tIN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF ")
+       emit("\tSUCH DAMAGE.")
    
-   elif "GPL" in IP['info']['license'].upper():
-       print("\tThis program is free software; you can redistribute it and/or")
-       print("\tmodify it under the terms of the GNU General Public License")
-       print("\tversion 2 as published by the Free Software Foundation.\n")
-       print("\tThis program is distributed in the hope that it will be useful,")
-       print("\tbut WITHOUT ANY WARRANTY; without even the implied warranty of")
-       print("\tMERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the")
-       print("\tGNU General Public License for more details.")
-   print("\n*/\n")
+   elif "GPL" in MODEL.info['license'].upper():
+       emit("\tThis program is free software; you can redistribute it and/or")
+       emit("\tmodify it under the terms of the GNU General Public License")
+       emit("\tversion 2 as published by the Free Software Foundation.\n")
+       emit("\tThis program is distributed in the hope that it will be useful,")
+       emit("\tbut WITHOUT ANY WARRANTY; without even the implied warranty of")
+       emit("\tMERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the")
+       emit("\tGNU General Public License for more details.")
+   emit("\n*/\n")
 
 def print_header(bus_type):
    """
    Print the header of the generated file.
    """
-   print(f"/* THIS FILE IS GENERATED, DO NOT EDIT */\n")
-   print(f"`timescale\t\t\t1ns/1ps")
-   print(f"`default_nettype\tnone\n")
-   print(f"`define\t\t\t\t{bus_type}_AW\t\t{BUS_AW}\n")
-   print(f"`include\t\t\t\"{bus_type.lower()}_wrapper.vh\"\n")  
+   emit(f"/* THIS FILE IS GENERATED, DO NOT EDIT */\n")
+   emit(f"`timescale\t\t\t1ns/1ps")
+   emit(f"`default_nettype\tnone\n")
+   emit(f"`define\t\t\t\t{bus_type}_AW\t\t{BUS_AW}\n")
+   emit(f"`include\t\t\t\"{BUS.tag}_wrapper.vh\"\n")  
 
 
+def get_strb_suffix(profile):
+    """
+    Get the suffix of the port, control signal and testbench connection
+    macros of a bus: `_STRB` when its byte strobes need extra ports and some
+    register has byte access, so the other wrappers keep the plain ports.
+    """
+    if profile.strb_ports and any(r.byte_access for r in MODEL.registers):
+        return "_STRB"
+    return ""
+
 def print_module_header(bus_type, is_dft=False):
     """
     Prints the header of the generated file for the specified bus type.
@@ -132,46 +264,46 @@ def print_module_header(bus_type, is_dft=False):
         None
     """
     # Print module name
-    print(f"module {IP['info']['name']}_{bus_type}", end="")
-
-    if "parameters" in IP:
-        print(" #( \n\tparameter\t")
-        for index, p in enumerate(IP['parameters']):
-            print(f"\t\t{p['name']} = {p['default']}", end="")
-            if index != len(IP['parameters']) - 1:
-                print(",")
-        print("\n)", end="")
-    print(" (")
-    if "external_interface" in IP:
+    emit(f"module {MODEL.name}_{bus_type}", end="")
+
+    if MODEL.parameters:
+        emit(" #( \n\tparameter\t")
+        for index, p in enumerate(MODEL.parameters):
+            emit(f"\t\t{p.name} = {p.default}", end="")
+            if index != len(MODEL.parameters) - 1:
+                emit(",")
+        emit("\n)", end="")
+    emit(" (")
+    if MODEL.external_interface:
         # Print {bus_type}_SLAVE_PORTS
-        print ("`ifdef USE_POWER_PINS") 
-        print ("\tinout VPWR,") 
-        print ("\tinout VGND,") 
-        print ("`endif") 
+        emit("`ifdef USE_POWER_PINS") 
+        emit("\tinout VPWR,") 
+        emit("\tinout VGND,") 
+        emit("`endif") 
         if is_dft:
-            print(f"\tinput\twire\tsc_testmode,")
-        print(f"\t`{bus_type}_SLAVE_PORTS,")
+            emit(f"\tinput\twire\tsc_testmode,")
+        emit(f"\t`{BUS.iface}_SLAVE_PORTS{get_strb_suffix(BUS)},")
 
         # Print details of each interface
-        for index, ifc in enumerate(IP['external_interface']):
-            if index != len(IP['external_interface']) - 1:
+        for index, ifc in enumerate(MODEL.external_interface):
+            if index != len(MODEL.external_interface) - 1:
                 # Print interface details with comma
-                print(f"\t{ifc['direction']}\twire\t[{ifc['width']}-1:0]\t{ifc['name']},")
+                emit(f"\t{ifc.direction}\twire\t[{ifc.width}-1:0]\t{ifc.name},")
             else:
                 # Print interface details without comma
-                print(f"\t{ifc['direction']}\twire\t[{ifc['width']}-1:0]\t{ifc['name']}")
+                emit(f"\t{ifc.direction}\twire\t[{ifc.width}-1:0]\t{ifc.name}")
     else:
         # Print only {bus_type}_SLAVE_PORTS
-        print ("`ifdef USE_POWER_PINS") 
-        print ("\tinout VPWR,") 
-        print ("\tinout VGND,") 
-        print ("`endif") 
+        emit("`ifdef USE_POWER_PINS") 
+        emit("\tinout VPWR,") 
+        emit("\tinout VGND,") 
+        emit("`endif") 
         if is_dft:
-            print(f"\tinput\twire\tsc_testmode,")
-        print(f"\t`{bus_type}_SLAVE_PORTS")
+            emit(f"\tinput\twire\tsc_testmode,")
+        emit(f"\t`{BUS.iface}_SLAVE_PORTS{get_strb_suffix(BUS)}")
 
     # Print end of module header
-    print(");\n")
+    emit(");\n")
   
 def print_wires(bus_type, is_dft=False):
     """
@@ -187,15 +319,8 @@ def print_wires(bus_type, is_dft=False):
         None
     """
 
-    if bus_type == "APB" :
-        clk_net = "PCLK"
-        rst_net = "PRESETn"
-    elif bus_type == "AHBL":
-        clk_net = "HCLK"
-        rst_net = "HRESETn"
-    elif bus_type == "WB":
-        clk_net = "clk_i"
-        rst_net = "(~rst_i)"
+    clk_net = BUS.clk
+    rst_net = BUS.rst_n
 
     # print the clock gating cell
     clkgatecell = f"""
@@ -213,33 +338,47 @@ def print_wires(bus_type, is_dft=False):
         .clk_o(clk_g)
     );
     """
-    print(clkgatecell)
+    emit(clkgatecell)
     # Print clock wire declaration
-    print(f"\twire\t\t{IP['clock']['name']} = clk_g;") #{clk_net};")
+    emit(f"\twire\t\t{MODEL.clock} = clk_g;") #{clk_net};")
 
     # Check if reset is active and set the 'mod' variable accordingly
-    if IP['reset']['level'] == 0:
+    if MODEL.reset_level == 0:
         mod = ""
     else:
         mod = "~"
 
     # Print reset wire declaration
-    print(f"\twire\t\t{IP['reset']['name']} = {mod}{rst_net};\n")
+    emit(f"\twire\t\t{MODEL.reset} = {mod}{rst_net};\n")
 
     # Print the needed APB control signals
-    print(f"\n\t`{bus_type}_CTRL_SIGNALS\n")
+    emit(f"\n\t`{BUS.iface}_CTRL_SIGNALS{get_strb_suffix(BUS)}\n")
 
     # Print wire declarations for the IP instance ports
-    for i in IP['ports']:
-        print(f"\twire [{i['width']}-1:0]\t{i['name']};")
+    for i in MODEL.ports:
+        emit(f"\twire [{i.width}-1:0]\t{i.name};")
+
+    # Print the pack/unpack buffers of the packed FIFOs
+    for f in MODEL.fifos:
+        if f.packed:
+            name = f.name.upper()
+            emit(f"\treg\t[31:0]\t{name}_PBUF;")
+            cnt = f"[{f.count_bits - 1}:0]"
+            emit(f"\treg\t{cnt}\t{name}_PCNT;")
+            if f.type == "write":
+                emit(f"\twire\t{cnt}\t{name}_PLEN;")
+            else:
+                emit(f"\treg\t\t{name}_PDONE;")
+                emit(f"\treg\t{cnt}\t{name}_PVALID;")
+            emit(f"\twire\t\t{name}_PSTALL;")
 
-    print("")
+    emit("")
 
-    #print("")
+    #emit("")
   
 def print_instance_to_wrap(bus_type):
     """
-    Print the instance to wrap by formatting the IP dictionary.
+    Print the instance to wrap.
 
     Args:
         None
@@ -249,73 +388,55 @@ def print_instance_to_wrap(bus_type):
     """
 
     # Generate synchronizers for input interfaces if needed
-    if "external_interface" in IP:
-        for index, ifc in enumerate(IP['external_interface']):
-            if "sync" in ifc:
-                if ifc["sync"] == True:
-                    if ifc["direction"] != "input":
-                        raise sys.exit("You cannot attach a synchronizer to non-input interface")
-                    print_synchronizer(bus_type, ifc['name'], ifc['port'], ifc['width'], 2)
-
-    if "parameters" in IP:
-        print(f"\t{IP['info']['name']} #(")
-        for index, p in enumerate(IP['parameters']):
-            print(f"\t\t.{p['name']}({p['name']})", end="")
-            if index != len(IP['parameters']) - 1:
-                print(",")
-        print("\n\t) instance_to_wrap (")
+    for ifc in MODEL.external_interface:
+        if ifc.sync:
+            if ifc.direction != "input":
+                raise sys.exit("You cannot attach a synchronizer to non-input interface")
+            print_synchronizer(bus_type, ifc.name, ifc.port, ifc.bits, 2)
+
+    if MODEL.parameters:
+        emit(f"\t{MODEL.name} #(")
+        for index, p in enumerate(MODEL.parameters):
+            emit(f"\t\t.{p.name}({p.name})", end="")
+            if index != len(MODEL.parameters) - 1:
+                emit(",")
+        emit("\n\t) instance_to_wrap (")
     else:
-        print(f"\t{IP['info']['name']} instance_to_wrap (")
+        emit(f"\t{MODEL.name} instance_to_wrap (")
 
-    print(f"\t\t.{IP['clock']['name']}({IP['clock']['name']}),")
-    print(f"\t\t.{IP['reset']['name']}({IP['reset']['name']}),")
-    for index, p in enumerate(IP['ports']):
-        if index != len(IP['ports']) - 1 or "external_interface" in IP:
-            print(f"\t\t.{p['name']}({p['name']}),")
+    emit(f"\t\t.{MODEL.clock}({MODEL.clock}),")
+    emit(f"\t\t.{MODEL.reset}({MODEL.reset}),")
+    for index, p in enumerate(MODEL.ports):
+        if index != len(MODEL.ports) - 1 or MODEL.external_interface:
+            emit(f"\t\t.{p.name}({p.name}),")
         else:
-            print(f"\t\t.{p['name']}({p['name']})")
+            emit(f"\t\t.{p.name}({p.name})")
     
-    if "external_interface" in IP:
-        for index, ifc in enumerate(IP['external_interface']):
-            port = f"{ifc['name']}"
-            if "sync" in ifc:
-                if ifc['sync'] == True:
-                    port = f"_{ifc['port']}_w_"
-            
-            if index != len(IP['external_interface']) - 1:
-                print(f"\t\t.{ifc['port']}({port}),")
-            else:
-                print(f"\t\t.{ifc['port']}({port})")
-    print("\t);\n")
+    for index, ifc in enumerate(MODEL.external_interface):
+        port = ifc.name
+        if ifc.sync:
+            port = f"_{ifc.port}_w_"
+        
+        if index != len(MODEL.external_interface) - 1:
+            emit(f"\t\t.{ifc.port}({port}),")
+        else:
+            emit(f"\t\t.{ifc.port}({port})")
 
-def print_synchronizer(bus_type, name, port, width, stages):
-    if bus_type == "AHBL":
-        clk = "HCLK"
-        rst = "HRESETn"
-        pol = 0
-    elif bus_type == "APB":
-        clk = "PCLK"
-        rst = "PRESETn"
-        pol = 0
-    elif bus_type == "WB":
-        clk = "clk_i"
-        rst = "rst_i"
-        pol = 1
-    
-    clock_edge = "posedge" if pol == 1 else "negedge"
+    emit("\t);\n")
 
-    print(f"\treg [{width-1}:0]\t_{name}_reg_[{stages-1}:0];")
-    print(f"\twire\t\t_{port}_w_ = _{name}_reg_[{stages-1}];")
-    print(f"\talways@(posedge {clk} or {clock_edge} {rst})")
-    print(f"\t\tif({rst} == {pol}) begin")
+def print_synchronizer(bus_type, name, port, width, stages):
+    emit(f"\treg [{width-1}:0]\t_{name}_reg_[{stages-1}:0];")
+    emit(f"\twire\t\t_{port}_w_ = _{name}_reg_[{stages-1}];")
+    emit(f"\talways@(posedge {BUS.clk} or {BUS.rst_edge} {BUS.rst})")
+    emit(f"\t\tif({BUS.rst} == {BUS.rst_level}) begin")
     for i in range(stages):
-        print(f"\t\t\t_{name}_reg_[{i}] <= 'b0;")
-    print(f"\t\tend")
-    print(f"\t\telse begin")
-    print(f"\t\t\t_{name}_reg_[0] <= {name};")
+        emit(f"\t\t\t_{name}_reg_[{i}] <= 'b0;")
+    emit(f"\t\tend")
+    emit(f"\t\telse begin")
+    emit(f"\t\t\t_{name}_reg_[0] <= {name};")
     for i in range(stages-1):
-        print(f"\t\t\t_{name}_reg_[{i+1}] <= _{name}_reg_[{i}];")
-    print(f"\t\tend")
+        emit(f"\t\t\t_{name}_reg_[{i+1}] <= _{name}_reg_[{i}];")
+    emit(f"\t\tend")
 
 
 def print_registers(bus_type):
@@ -331,128 +452,164 @@ def print_registers(bus_type):
 
     """
     if "fifos" in IP:
-        print("\t// FIFO Registers")
+        emit("\t// FIFO Registers")
         for f in IP['fifos']:
             # fifo_aw = int(math.log2(f["depth"]))
             fifo_aw = f['address_width']
             fifo_name = f"{f['name'].upper()}";
-            print(f"\t// {fifo_name} Registers")
-            print(f"\treg\t[{fifo_aw}-1:0]\t{fifo_name}_THRESHOLD_REG;")
-            print(f"\tassign\t\t{f['threshold_port']} = {fifo_name}_THRESHOLD_REG;")
-            print(f"\t`{bus_type}_REG({fifo_name}_THRESHOLD_REG, 0, {fifo_aw})")
-            print(f"\twire\t[{fifo_aw}-1:0]\t{fifo_name}_LEVEL_REG;")
-            print(f"\tassign\t\t{fifo_name}_LEVEL_REG = {f['level_port']};")
+            emit(f"\t// {fifo_name} Registers")
+            emit(f"\treg\t[{fifo_aw}-1:0]\t{fifo_name}_THRESHOLD_REG;")
+            emit(f"\tassign\t\t{f['threshold_port']} = {fifo_name}_THRESHOLD_REG;")
+            emit(f"\t`{bus_type}_REG({fifo_name}_THRESHOLD_REG, 0, {fifo_aw})")
+            emit(f"\twire\t[{fifo_aw}-1:0]\t{fifo_name}_LEVEL_REG;")
+            emit(f"\tassign\t\t{fifo_name}_LEVEL_REG = {f['level_port']};")
             if f["flush_enable"] == True:
                 flush_reg_name = f"{fifo_name}_FLUSH_REG";
-                print(f"\treg\t\t{flush_reg_name};")
-                print(f"\t`{bus_type}_AUTO_CLR_REG({flush_reg_name}, 0, 1)")
-                print(f"\tassign\t\t{f['flush_port']} = {flush_reg_name};")
-            print("")
-    print("")
+                emit(f"\treg\t\t{flush_reg_name};")
+                emit(f"\t`{bus_type}_AUTO_CLR_REG({flush_reg_name}, 0, 1)")
+                emit(f"\tassign\t\t{f['flush_port']} = {flush_reg_name};")
+            emit("")
+    emit("")
     """
-    if "registers" not in IP:
+    if not MODEL.registers:
         return
 
-    print("\t// Register Definitions")
+    emit("\t// Register Definitions")
     
-    for r in IP['registers']:
-        byte_access = 0
-        if "byte_access" in r:
-            if r['byte_access'] == 1:
-                byte_access = 1
-                if r['size'] != 32:
-                    exit_with_message("Byte addressing is available only for 32-bit registers!")
-                elif bus_type != "APB":
-                    exit_with_message("Byte addressing is available only for APB wrappers!")
-
-        if r['fifo'] is True:
-            if "r" in r['mode']:
-                print(f"\twire\t[{r['size']}-1:0]\t{r['name']}_WIRE;")
+    for r in MODEL.registers:
+        if r.byte_access:
+            if r.size != 32:
+                exit_with_message("Byte addressing is available only for 32-bit registers!")
+            elif not BUS.byte_band and not BUS.byte_sel:
+                exit_with_message(f"Byte addressing is not available for {bus_type} wrappers!")
+        if r.set_clr_tgl and (r.fifo or r.mode != 'w'):
+            exit_with_message("Set, clear and toggle aliases are available only for 'w' registers!")
+        if r.bit_access and (r.fifo or r.mode != 'w'):
+            exit_with_message("Bit addressing is available only for 'w' registers!")
+
+        init = r.init if r.init is not None else 0
+        if r.fifo:
+            if "r" in r.mode:
+                emit(f"\twire\t[{r.size}-1:0]\t{r.name}_WIRE;")
         else:
-            if "auto_clear" in r:
-                if r['mode'] != 'w':
-                    exit_with_message(f"The auto_clear property cannot be True for a '{r['mode']}' filed") 
-            if r['mode'] == 'rw':
+            if r.auto_clear is not None:
+                if r.mode != 'w':
+                    exit_with_message(f"The auto_clear property cannot be True for a '{r.mode}' filed") 
+            if r.mode == 'rw':
                 # 'rw' registers cannot have field
-                print(f"\treg\t[{r['size']}-1:0]\t{r['name']}_REG;")
-                print(f"\twire\t[{r['size']}-1:0]\t{r['name']}_WIRE;")
-                print(f"\tassign\t{r['name']}_WIRE = {r['read_port']};")
-                print(f"\tassign\t{r['write_port']} = {r['name']}_REG;")
-                print(f"\t`{bus_type}_REG({r['name']}_REG, 0, 8)")
-            elif r['mode'] == 'w':
-                if f"{r['size']}".isnumeric():
-                    rsz = r['size']-1
+                emit(f"\treg\t[{r.size}-1:0]\t{r.name}_REG;")
+                emit(f"\twire\t[{r.size}-1:0]\t{r.name}_WIRE;")
+                emit(f"\tassign\t{r.name}_WIRE = {r.read_port};")
+                emit(f"\tassign\t{r.write_port} = {r.name}_REG;")
+                emit(f"\t`{reg_macro(bus_type, 'REG')}({r.name}_REG, 0, 8)")
+            elif r.mode == 'w':
+                if f"{r.size}".isnumeric():
+                    rsz = r.size-1
                 else:
-                    rsz = f"{r['size']}-1"
-                print(f"\treg [{rsz}:0]\t{r['name']}_REG;")
-                f_indx = 0
+                    rsz = f"{r.size}-1"
+                emit(f"\treg [{rsz}:0]\t{r.name}_REG;")
                 update_pattern = 0
-                if "fields" in r and "write_port" not in r:
-                    for f in r['fields']:
-                        if isinstance(f['bit_width'], int):
-                            to = f['bit_width'] + f['bit_offset'] - 1
-                        else:
-                            if f['bit_offset'] == 0:
-                                to = f"({f['bit_width']} - 1)"
-                            else:
-                                to = f"({f['bit_width']} + {f['bit_offset'] - 1})"
-                        print(f"\tassign\t{f['write_port']}\t=\t{r['name']}_REG[{to} : {f['bit_offset']}];")
-                        if "auto_clear" in f:
-                            #print(f["auto_clear"])
-                            if f["auto_clear"] == True:
-                                update_pattern = update_pattern | (1 << f_indx)
-                                #print(update_pattern)
-                        f_indx = f_indx + 1
-                    #print(f"{(~update_pattern & (1<<r['size'])-1):x}")
+                if r.fields and r.write_port is None:
+                    for f_indx, f in enumerate(r.fields):
+                        emit(f"\tassign\t{f.write_port}\t=\t{r.name}_REG[{f.msb} : {f.bit_offset}];")
+                        if f.auto_clear:
+                            update_pattern = update_pattern | (1 << f_indx)
                 else:
-                    print(f"\tassign\t{r['write_port']} = {r['name']}_REG;")
-                if update_pattern !=0 :
-                    pat = f"{r['size']}'h{(~update_pattern & (1<<r['size'])-1):x}"
-                    print(f"\t`{bus_type}_REG_AC({r['name']}_REG, {r['init'] if 'init' in r else 0}, {r['size']}, {pat})")
+                    emit(f"\tassign\t{r.write_port} = {r.name}_REG;")
+                if r.set_clr_tgl or r.bit_access:
+                    if update_pattern != 0 or r.byte_access:
+                        exit_with_message(f"Register '{r.name}' cannot have set_clr_tgl or bit_access together with auto_clear fields or byte_access!")
+                    print_alias_register(bus_type, r, init)
+                elif update_pattern !=0 :
+                    pat = f"{r.size}'h{(~update_pattern & (1<<r.bits)-1):x}"
+                    emit(f"\t`{reg_macro(bus_type, 'REG_AC')}({r.name}_REG, {init}, {r.size}, {pat})")
                 else:
-                    if byte_access == 0:
-                        print(f"\t`{bus_type}_REG({r['name']}_REG, {r['init'] if 'init' in r else 0}, {r['size']})")
+                    if not r.byte_access:
+                        emit(f"\t`{reg_macro(bus_type, 'REG')}({r.name}_REG, {init}, {r.size})")
+                    elif BUS.byte_sel:
+                        emit(f"\t`{reg_macro(bus_type, 'REG_STRB')}({r.name}_REG, {init}, {r.size})")
                     else:
-                        print(f"\t`{bus_type}_REG_BYTE({r['name']}_REG, {r['init'] if 'init' in r else 0}, {r['size']})")
-
-            elif r['mode'] == 'r':
-                print(f"\twire [{r['size']}-1:0]\t{r['name']}_WIRE;")
-                if "fields" in r:
-                    for f in r['fields']:
-                        if isinstance(f['bit_width'], int):
-                            to = f['bit_width'] + f['bit_offset'] - 1
-                        else:
-                            if f['bit_offset'] == 0:
-                                to = f"({f['bit_width']} - 1)"
-                            else:
-                                to = f"({f['bit_width']} + {f['bit_offset'] - 1})"
-                        print(f"\tassign\t{r['name']}_WIRE[{to} : {f['bit_offset']}] = {f['read_port']};")
+                        emit(f"\t`{reg_macro(bus_type, 'REG_BYTE')}({r.name}_REG, {init}, {r.size})")
+
+            elif r.mode == 'r':
+                emit(f"\twire [{r.size}-1:0]\t{r.name}_WIRE;")
+                if r.fields:
+                    for f in r.fields:
+                        emit(f"\tassign\t{r.name}_WIRE[{f.msb} : {f.bit_offset}] = {f.read_port};")
                 else:
-                    print(f"\tassign\t{r['name']}_WIRE = {r['read_port']};")
+                    emit(f"\tassign\t{r.name}_WIRE = {r.read_port};")
         
-        print()
-      
-def get_port_width(port):
-   """
-   Get the width of a port.
+        emit()
 
-   Args:
-       port (str): The name of the port.
 
-   Returns:
-       int: The width of the port.
-   """
-   for p in IP['ports']:
-       if p['name'] == port:
-           return p['width']
-   return -1
+def get_aliases(r):
+    """
+    Get the set, clear and toggle aliases of a register with set_clr_tgl.
 
+    Returns:
+        list: (name, offset, update format, action) tuples; empty for other
+            registers.
+    """
+    if not r.set_clr_tgl:
+        return []
+    return [(f"{r.name}_{suffix}", base + r.offset, update, action) for suffix, base, update, action in ALIAS_REGIONS]
+
+def get_bit_band_offset(r):
+    """
+    Get the offset of the bit band alias of a register with bit_access: 32
+    words, word n reading and writing bit n of the register.
+    """
+    return BIT_BAND_OFF + 32 * r.offset
+
+def get_bit_band_index(r, addr):
+    """
+    Get the condition that the bit band word addressed by `addr` maps to a
+    bit of the register; the words above the register size are ignored on
+    writes and read 0.
+    """
+    return f"({addr}[6:2] < {r.size})"
+
+def get_bit_band_reg(offset):
+    """
+    Get the register of a bit band offset localparam (<name>_BIT_REG_OFFSET),
+    or None for other offsets.
+    """
+    name = offset[:-len("_REG_OFFSET")]
+    if not name.endswith("_BIT"):
+        return None
+    r = MODEL.regs_by_name.get(name[:-len("_BIT")])
+    if r is None or not r.bit_access:
+        return None
+    return r
+
+def print_alias_register(bus_type, r, init):
+    """
+    Print a register written through its offset and its aliases. A write to
+    the set, clear or toggle alias applies the written data to the bits of
+    the register (OR, AND NOT and XOR) in the same cycle, and a write to a
+    word of the bit band alias writes bit 0 of the data to the register bit
+    of the word, so firmware updates bits without a read-modify-write.
+    Buses that hold the write for two cycles and acknowledge it in the
+    second (classic Wishbone) apply the aliases with the acknowledge only,
+    like the FIFO pushes; a toggle applied twice would not change the
+    register.
+    """
+    if r.set_clr_tgl and r.offset >= ALIAS_SPAN:
+        exit_with_message(f"Register '{r.name}' with set_clr_tgl must be at an offset below {hex(ALIAS_SPAN)}!")
+    if r.bit_access and r.offset >= BIT_BAND_SPAN // 32:
+        exit_with_message(f"Register '{r.name}' with bit_access must be at an offset below {hex(BIT_BAND_SPAN // 32)}: "
+                          f"the bit band region at {hex(BIT_BAND_OFF)} is {hex(BIT_BAND_SPAN)} bytes and gives each register word 32 words (128 bytes); it is at {hex(r.offset)}.")
+    name = f"{r.name}_REG"
+    data = f"{BUS.wdata}[{r.size}-1:0]"
+    we = BUS.we
+    alias_we = f"{BUS.ack} & {we}" if BUS.ack else we
+    emit(f"\t`{bus_type}_BLOCK({name}, {init})")
+    emit(f"\t\telse if({we} & {get_sel(bus_type, BUS.addr, f'{name}_OFFSET')}) {name} <= {data};")
+    for alias, _, update, _ in get_aliases(r):
+        emit(f"\t\telse if({alias_we} & {get_sel(bus_type, BUS.addr, f'{alias}_REG_OFFSET')}) {name} <= {update.format(name, data)};")
+    if r.bit_access:
+        emit(f"\t\telse if({alias_we} & {get_sel(bus_type, BUS.addr, f'{r.name}_BIT_REG_OFFSET')} & {get_bit_band_index(r, BUS.addr)}) {name}[{BUS.addr}[6:2]] <= {BUS.wdata}[0];")
 
-def get_param_default(param):
-   for p in IP['parameters']:
-       if p['name'] == param:
-           return p['default']
-   return -1
 
 
 def print_ris_register(bus_type):
@@ -466,37 +623,34 @@ def print_ris_register(bus_type):
         None
     """
     # declare wires for the flags if the flag name is different than the port it is connected to
-    print()
-    for f in IP['flags']:
-        if f['name'] != f['port']:
-            print(f"\twire [{get_port_width(f['port'])-1}:0] {f['name']} = {f['port']};")
-    print()
+    emit()
+    for f in MODEL.flags:
+        if f.name != f.port:
+            emit(f"\twire [{f.bits-1}:0] {f.name} = {f.port};")
+    emit()
 
     # Initialize the loop counter
-    print("\n\tinteger _i_;")
+    emit("\n\tinteger _i_;")
 
     # Check if RIS_REG is accessible, else skip the loop
-    print(f"\t`{bus_type}_BLOCK(RIS_REG, 0) else begin")
+    emit(f"\t`{bus_type}_BLOCK(RIS_REG, 0) else begin")
 
-    # Iterate over each flag in the IP dictionary
-    pos = 0
-    for f in IP['flags']:
+    # Iterate over each flag of the IP
+    for f in MODEL.flags:
         # Iterate from 0 to the port width of the flag
-        print(f"\t\tfor(_i_ = {pos}; _i_ < {get_port_width(f['port'])+pos}; _i_ = _i_ + 1) begin")
+        emit(f"\t\tfor(_i_ = {f.pos}; _i_ < {f.bits+f.pos}; _i_ = _i_ + 1) begin")
 
         # Update RIS_REG based on the condition
-        print(f"\t\t\tif(IC_REG[_i_]) RIS_REG[_i_] <= 1'b0; else if({f['name']}[_i_ - {pos}] == 1'b1) RIS_REG[_i_] <= 1'b1;")
+        emit(f"\t\t\tif(IC_REG[_i_]) RIS_REG[_i_] <= 1'b0; else if({f.name}[_i_ - {f.pos}] == 1'b1) RIS_REG[_i_] <= 1'b1;")
 
         # End the inner loop
-        print("\t\tend")
-
-        pos += get_port_width(f['port'])
+        emit("\t\tend")
 
     # End the outer loop
-    print("\tend")
+    emit("\tend")
 
     # Add a newline for readability
-    print()
+    emit()
 
 
 def print_IRQ_registers(bus_type):
@@ -509,26 +663,80 @@ def print_IRQ_registers(bus_type):
     Returns:
         None
     """
-    flag_size = 0
-    for f in IP['flags']:
-        if get_port_width(f['port']) == -1:
-            raise Exception(f"Port {f['port']} not found in the IP definition")
-        else:
-            flag_size += get_port_width(f['port'])
-    print(f"\treg [{flag_size-1}:0] IM_REG;")
-    print(f"\treg [{flag_size-1}:0] IC_REG;")
-    print(f"\treg [{flag_size-1}:0] RIS_REG;\n")
-    print(f"\t`{bus_type}_MIS_REG({flag_size})")
-    print(f"\t`{bus_type}_REG(IM_REG, 0, {flag_size})")
-    print(f"\t`{bus_type}_IC_REG({flag_size})")
+    flag_size = MODEL.flag_size
+    emit(f"\treg [{flag_size-1}:0] IM_REG;")
+    emit(f"\treg [{flag_size-1}:0] IC_REG;")
+    emit(f"\treg [{flag_size-1}:0] RIS_REG;\n")
+    emit(f"\t`{bus_type}_MIS_REG({flag_size})")
+    emit(f"\t`{reg_macro(bus_type, 'REG')}(IM_REG, 0, {flag_size})")
+    emit(f"\t`{reg_macro(bus_type, 'IC_REG')}({flag_size})")
     print_ris_register(bus_type)
-    print(f"\tassign IRQ = |MIS_REG;")
-    print()
+    emit(f"\tassign IRQ = |MIS_REG;")
+    emit()
 
 def print_GCLK_register(bus_type):
-    print(f"\tlocalparam\tGCLK_REG_OFFSET = `{bus_type}_AW'h{hex(CLK_GATE_OFF)[2:].zfill(4).upper()};")
-    print(f"\t`{bus_type}_REG(GCLK_REG, 0, 1)")
-    print()
+    emit(f"\tlocalparam\tGCLK_REG_OFFSET = `{bus_type}_AW'h{hex(CLK_GATE_OFF)[2:].zfill(4).upper()};")
+    emit(f"\t`{reg_macro(bus_type, 'REG')}(GCLK_REG, 0, 1)")
+    emit()
+
+def reg_macro(bus_type, macro):
+    """
+    Get the name of a register macro; the _SEL variant is used with the
+    shared address decoder.
+    """
+    if MODEL.shared_decoder:
+        return f"{bus_type}_{macro}_SEL"
+    return f"{bus_type}_{macro}"
+
+def get_region_name(page):
+    if page == INT_REG_OFF >> 8:
+        return "IRQ_BLOCK"
+    if page == FIFO_REG_OFF >> 8:
+        return "FIFO_BLOCK"
+    return f"USER_BLOCK_{page:02X}"
+
+def print_address_decoder(bus_type):
+    """
+    Print the shared address decoder: the address is pre-decoded into the
+    256-byte regions (blocks) that hold registers, then every register gets
+    a select wire (<name>_REG_SEL) that compares the low address byte only.
+    The register macros, the read multiplexer and the FIFO controls use
+    these select wires instead of comparing the full address.
+
+    Args:
+        bus_type (str): The bus type.
+
+    Returns:
+        None
+    """
+    addr = BUS.addr
+    regs = [(f"{r.name}_REG", r.offset) for r in MODEL.registers]
+    regs += [(f"{name}_REG", offset) for r in MODEL.registers for name, offset, _, _ in get_aliases(r)]
+    regs += [(f"{r.name}_BIT_REG", get_bit_band_offset(r)) for r in MODEL.registers if r.bit_access]
+    if MODEL.flags:
+        regs += [("IM_REG", IM_OFF), ("MIS_REG", MIS_OFF), ("RIS_REG", RIS_OFF), ("IC_REG", IC_OFF)]
+    regs.append(("GCLK_REG", CLK_GATE_OFF))
+
+    emit("\t// Address Decoder")
+    pages = sorted(set(offset >> 8 for _, offset in regs))
+    for page in pages:
+        emit(f"\twire\t{get_region_name(page)}_SEL = ({addr}[`{bus_type}_AW-1:8] == 'h{page:X});")
+    for name, offset in regs:
+        w = get_match_lsb(f"{name}_OFFSET")
+        if w == 0:
+            emit(f"\twire\t{name}_SEL = {get_region_name(offset >> 8)}_SEL & ({addr}[7:0] == 8'h{offset & 0xFF:02X});")
+            continue
+        if w < 8:
+            emit(f"\twire\t{name}_SEL = {get_region_name(offset >> 8)}_SEL & ({addr}[7:{w}] == 'h{(offset & 0xFF) >> w:X});")
+        else:
+            emit(f"\twire\t{name}_SEL = ({addr}[`{bus_type}_AW-1:{w}] == 'h{offset >> w:X});")
+
+    byte_regs = [r for r in MODEL.registers if r.byte_access]
+    if byte_regs and BUS.byte_band:
+        emit(f"\twire\tBYTE_BAND_SEL = ({addr}[`{bus_type}_AW-1:12] == 'h{BYTE_BAND_OFF >> 12:X});")
+        for r in byte_regs:
+            emit(f"\twire\t{r.name}_REG_BYTE_SEL = BYTE_BAND_SEL & ({addr}[11:8] == 4'h{(r.offset >> 2) & 0xF:X});")
+    emit()
 
 def print_registers_offsets(bus_type):
     """
@@ -544,252 +752,561 @@ def print_registers_offsets(bus_type):
     """
 
     # user defined registers
-    if "registers" in IP:
-        for r in IP['registers']:
-            print(f"\tlocalparam\t{r['name']}_REG_OFFSET = `{bus_type}_AW'h{hex(r['offset'])[2:].zfill(4).upper()};")
+    offset_fmt = BUS.offset_fmt
+    for r in MODEL.registers:
+        emit(offset_fmt.format(r.name, r.offset))
+        for name, offset, _, _ in get_aliases(r):
+            emit(offset_fmt.format(name, offset))
+        if r.bit_access:
+            emit(offset_fmt.format(f"{r.name}_BIT", get_bit_band_offset(r)))
 
     # Interrupt registers
-    if "flags" in IP:
-        print(f"\tlocalparam\tIM_REG_OFFSET = `{bus_type}_AW'h{hex(IM_OFF)[2:].zfill(4).upper()};")
-        print(f"\tlocalparam\tMIS_REG_OFFSET = `{bus_type}_AW'h{hex(MIS_OFF)[2:].zfill(4).upper()};")
-        print(f"\tlocalparam\tRIS_REG_OFFSET = `{bus_type}_AW'h{hex(RIS_OFF)[2:].zfill(4).upper()};")
-        print(f"\tlocalparam\tIC_REG_OFFSET = `{bus_type}_AW'h{hex(IC_OFF)[2:].zfill(4).upper()};")
+    if MODEL.flags:
+        for name, offset in [("IM", IM_OFF), ("MIS", MIS_OFF), ("RIS", RIS_OFF), ("IC", IC_OFF)]:
+            emit(offset_fmt.format(name, offset))
 
     """
     # Fifo Registers
     if "fifos" in IP:
         f_indx = 0
         for f in IP['fifos']:
-            print(f"\tlocalparam\t{f['name'].upper()}_FLUSH_REG_OFFSET = `{bus_type}_AW'd{FLUSH_OFF + 0x10 * f_indx};")
-            print(f"\tlocalparam\t{f['name'].upper()}_THRESHOLD_REG_OFFSET = `{bus_type}_AW'd{THRESHOLD_OFF + 0x10 * f_indx};")
-            print(f"\tlocalparam\t{f['name'].upper()}_LEVEL_REG_OFFSET = `{bus_type}_AW'd{LEVEL_OFF + 0x10 * f_indx};")
+            emit(f"\tlocalparam\t{f['name'].upper()}_FLUSH_REG_OFFSET = `{bus_type}_AW'd{FLUSH_OFF + 0x10 * f_indx};")
+            emit(f"\tlocalparam\t{f['name'].upper()}_THRESHOLD_REG_OFFSET = `{bus_type}_AW'd{THRESHOLD_OFF + 0x10 * f_indx};")
+            emit(f"\tlocalparam\t{f['name'].upper()}_LEVEL_REG_OFFSET = `{bus_type}_AW'd{LEVEL_OFF + 0x10 * f_indx};")
             f_indx = f_indx + 1
                
-    print("")
+    emit("")
+    """
+def get_read_sources(irq_regs, addr):
+    """
+    Get the readable registers of the IP in the order they are decoded.
+
+    Args:
+        irq_regs (list): The interrupt registers readable through the bus.
+        addr (str): The read address; a bit band alias reads the register
+            bit selected by it.
+
+    Returns:
+        list: (offset localparam, register value) tuples.
+    """
+    sources = []
+    for r in MODEL.registers:
+        if r.fifo or "r" in r.mode:
+            if "r" in r.mode:
+                sources.append((f"{r.name}_REG_OFFSET", f"{r.name}_WIRE"))
+        else:
+            sources.append((f"{r.name}_REG_OFFSET", f"{r.name}_REG"))
+        if r.bit_access:
+            sources.append((f"{r.name}_BIT_REG_OFFSET", f"({get_bit_band_index(r, addr)} ? (({r.name}_REG >> {addr}[6:2]) & 32'h1) : 32'h0)"))
+    if MODEL.flags:
+        for r in irq_regs:
+            sources.append((f"{r}_REG_OFFSET", f"{r}_REG"))
+    return sources
+
+def get_match_lsb(offset):
+    """
+    Get the lowest address bit compared to select the register of an offset
+    localparam, or 0 if the whole address is compared. A FIFO data register
+    with a window is selected by all the addresses of the window, a
+    register written with byte strobes by the addresses of all its bytes
+    and a bit band alias by the addresses of its 32 words.
     """
+    if get_bit_band_reg(offset):
+        return 7
+    r = MODEL.regs_by_name.get(offset[:-len("_REG_OFFSET")])
+    if r is None:
+        return 0
+    if r.window > 1:
+        return int(math.log2(r.window * 4))
+    if r.byte_access and BUS.byte_sel:
+        return 2
+    return 0
+
+def get_sel(bus_type, addr, offset):
+    """
+    Get the select expression of the register of an offset localparam: its
+    select wire with the shared address decoder, or else an address compare.
+    The compare of a FIFO data window, of a register written with byte
+    strobes or of a bit band alias skips the address bits within it.
+    """
+    if MODEL.shared_decoder and addr == BUS.addr:
+        return offset[:-len("_OFFSET")] + "_SEL"
+    w = get_match_lsb(offset)
+    if w:
+        r = get_bit_band_reg(offset)
+        base = get_bit_band_offset(r) if r else MODEL.regs_by_name[offset[:-len("_REG_OFFSET")]].offset
+        return f"({addr}[`{bus_type}_AW-1:{w}] == 'h{base >> w:X})"
+    return BUS.match_fmt.format(addr, offset)
+
+def print_read_mux(bus_type, data, addr, sources):
+    """
+    Print the read data multiplexer in the style selected by the read_mux
+    property of the IP:
+        chain:  a chain of conditional operators (a priority multiplexer).
+        onehot: an AND-OR multiplexer of the decoded register selects.
+        case:   a parallel case statement.
+    An address that does not match any register reads 32'hDEADBEEF. With
+    the shared address decoder, chain and onehot use the register select
+    wires.
+
+    Args:
+        bus_type (str): The bus type.
+        data (str): The read data bus.
+        addr (str): The address the registers are decoded from.
+        sources (list): (offset localparam, register value) tuples.
+
+    Returns:
+        None
+    """
+    if MODEL.read_mux == "case" and sources:
+        emit("\treg\t[31:0]\tRDATA_CASE;")
+        emit("\talways @*")
+        # FIFO data windows and byte strobed registers cover several
+        # addresses and precede the case
+        windows = [(o, v) for o, v in sources if get_match_lsb(o)]
+        for offset, value in windows:
+            sel = get_sel(bus_type, addr, offset)
+            emit(f"\t\tif ({sel.strip('()')})\tRDATA_CASE = {value}; else")
+
+        emit(f"\t\tcase ({addr}[`{bus_type}_AW-1:0])\t// synopsys parallel_case")
+        for offset, value in sources:
+            if (offset, value) not in windows:
+                emit(f"\t\t\t{offset}:\tRDATA_CASE = {value};")
+        emit("\t\t\tdefault:\tRDATA_CASE = 32'hDEADBEEF;")
+        emit("\t\tendcase")
+        emit(f"\tassign\t{data} = RDATA_CASE;")
+    elif MODEL.read_mux == "onehot" and sources:
+        emit(f"\twire\t[{len(sources)-1}:0]\tRDATA_SEL;")
+        for i, (offset, value) in enumerate(sources):
+            emit(f"\tassign\tRDATA_SEL[{i}] = {get_sel(bus_type, addr, offset)};")
+        emit(f"\tassign\t{data} = ")
+        for i, (offset, value) in enumerate(sources):
+            emit(f"\t\t\t({{32{{RDATA_SEL[{i}]}}}} & {value}) |")
+        emit("\t\t\t({32{~|RDATA_SEL}} & 32'hDEADBEEF);")
+    else:
+        emit(f"\tassign\t{data} = ")
+        for offset, value in sources:
+            emit(f"\t\t\t{get_sel(bus_type, addr, offset)}\t? {value} :")
+        emit("\t\t\t32'hDEADBEEF;")
+
+def print_registered_rdata(bus_type, data, addr, sources, capture):
+    """
+    Print the read data multiplexer followed by the read data register
+    (RDATA_Q) that drives the read data bus; used when the IP has the
+    registered_read property.
+
+    Args:
+        bus_type (str): The bus type.
+        data (str): The read data bus.
+        addr (str): The address the registers are decoded from.
+        sources (list): (offset localparam, register value) tuples.
+        capture (str): The condition to load RDATA_Q.
+
+    Returns:
+        None
+    """
+    emit("\twire\t[31:0]\tRDATA_MUX;")
+    print_read_mux(bus_type, "RDATA_MUX", addr, sources)
+    emit("\treg\t[31:0]\tRDATA_Q;")
+    emit(f"\t`{bus_type}_BLOCK(RDATA_Q, 32'b0) else if({capture}) RDATA_Q <= RDATA_MUX;")
+    emit(f"\tassign\t{data} = RDATA_Q;")
+
 def print_rdata(bus_type):
     IRQ_REGS = ["IM", "MIS", "RIS"]
-    prefix = "last_H"
-    if bus_type == "APB":
-        prefix = "P"
-        print(f"\tassign\t{prefix}RDATA = ")
+    data = BUS.rdata
+
+    if MODEL.registered_read and bus_type == "AHBL":
+        sources = get_read_sources(IRQ_REGS, "rd_addr") + [("GCLK_REG_OFFSET", "GCLK_REG")]
     else:
-        print(f"\tassign\tHRDATA = ")
-    
-    for index,r in enumerate(IP['registers']):
-        if  r['fifo'] is True or "r" in r['mode']:
-            if "r" in r['mode']:
-                print(f"\t\t\t({prefix}ADDR[`{bus_type}_AW-1:0] == {r['name']}_REG_OFFSET)\t? {r['name']}_WIRE :")
-        else:
-            print(f"\t\t\t({prefix}ADDR[`{bus_type}_AW-1:0] == {r['name']}_REG_OFFSET)\t? {r['name']}_REG :")
-    
-    if "flags" in IP:
-        for r in IRQ_REGS:
-            print(f"\t\t\t({prefix}ADDR[`{bus_type}_AW-1:0] == {r}_REG_OFFSET)\t? {r}_REG :")
-    print(f"\t\t\t({prefix}ADDR[`{bus_type}_AW-1:0] == GCLK_REG_OFFSET)\t? GCLK_REG :")
+        sources = get_read_sources(IRQ_REGS, BUS.addr) + [("GCLK_REG_OFFSET", "GCLK_REG")]
+    if MODEL.registered_read and bus_type == "AHBL":
+        # The read data is fetched at the end of the address phase, so the
+        # data phase has no wait state and back-to-back reads and bursts run
+        # at full throughput. A read accepted during the data phase of a
+        # write would fetch stale data; it is fetched again from last_HADDR
+        # in its data phase, which is stretched by one wait state.
+        emit("\twire\t\tahbl_rd_accept = HSEL & HTRANS[1] & ~HWRITE & HREADY;")
+        emit("\treg\t\trd_hazard;")
+        emit("\t`AHBL_BLOCK(rd_hazard, 1'b0) else rd_hazard <= ahbl_rd_accept & ahbl_we;")
+        emit("\twire\t\trd_fetch = rd_hazard | (ahbl_rd_accept & ~ahbl_we);")
+        emit("\twire\t[31:0]\trd_addr = rd_hazard ? last_HADDR : HADDR;")
+        print_registered_rdata(bus_type, data, "rd_addr", sources, "rd_fetch")
+        ready = "~rd_hazard"
+    elif MODEL.registered_read:
+        # The read data is registered in the first cycle of a read, which
+        # is stretched by one wait state; rd_ack marks the second cycle.
+        re = BUS.re
+        emit("\treg\t\trd_ack;")
+        block = BUS.block_fmt.format("rd_ack", "1'b0")
+        emit(f"\t{block} else rd_ack <= {re} & ~rd_ack;")
+        print_registered_rdata(bus_type, data, BUS.addr, sources, f"{re} & ~rd_ack")
+        ready = f"~{re} | rd_ack"
+    else:
+        print_read_mux(bus_type, data, BUS.addr, sources)
+        ready = "1'b1"
+        stalls = get_fifo_stalls()
+        if stalls:
+            ready = f"~({stalls})"
     """
     if "fifos" in IP:
         for f in IP["fifos"]:
-            print(f"\t\t\t({prefix}ADDR[`{bus_type}_AW-1:0] == {f['name'].upper()}_LEVEL_REG_OFFSET)\t? {f['name'].upper()}_LEVEL_REG :")
-            print(f"\t\t\t({prefix}ADDR[`{bus_type}_AW-1:0] == {f['name'].upper()}_THRESHOLD_REG_OFFSET)\t? {f['name'].upper()}_THRESHOLD_REG :")
-            print(f"\t\t\t({prefix}ADDR[`{bus_type}_AW-1:0] == {f['name'].upper()}_FLUSH_REG_OFFSET)\t? {f['name'].upper()}_FLUSH_REG :")
+            emit(f"\t\t\t({prefix}ADDR[`{bus_type}_AW-1:0] == {f['name'].upper()}_LEVEL_REG_OFFSET)\t? {f['name'].upper()}_LEVEL_REG :")
+            emit(f"\t\t\t({prefix}ADDR[`{bus_type}_AW-1:0] == {f['name'].upper()}_THRESHOLD_REG_OFFSET)\t? {f['name'].upper()}_THRESHOLD_REG :")
+            emit(f"\t\t\t({prefix}ADDR[`{bus_type}_AW-1:0] == {f['name'].upper()}_FLUSH_REG_OFFSET)\t? {f['name'].upper()}_FLUSH_REG :")
 
     """
     
-    print("\t\t\t32'hDEADBEEF;")
-    
-    if bus_type == "APB":
-        print(f"\n\tassign\t{prefix}READY = 1'b1;\n")
-    else:
-        print(f"\n\tassign\tHREADYOUT = 1'b1;\n")
+    emit(f"\n\tassign\t{BUS.ready} = {ready};\n")
 
 def print_wb_dat_o(bus_type):
     IRQ_REGS = ["IM", "MIS", "RIS", "IC"]
 
-    print(f"\tassign\tdat_o = ")
-
-    for index,r in enumerate(IP['registers']):
-        if "r" in r['mode'] or r['fifo'] is True:
-            if "r" in r['mode']:
-                print(f"\t\t\t(adr_i[`{bus_type}_AW-1:0] == {r['name']}_REG_OFFSET)\t? {r['name']}_WIRE :")
-        else:
-            print(f"\t\t\t(adr_i[`{bus_type}_AW-1:0] == {r['name']}_REG_OFFSET)\t? {r['name']}_REG :")
-
-    if "flags" in IP:
-        for r in IRQ_REGS:
-            print(f"\t\t\t(adr_i[`{bus_type}_AW-1:0] == {r}_REG_OFFSET)\t? {r}_REG :")
+    if MODEL.registered_read:
+        # ack_o is already registered, so the read data is loaded with it
+        # and no wait state is added.
+        print_registered_rdata(bus_type, "dat_o", "adr_i", get_read_sources(IRQ_REGS, "adr_i"), "wb_re & ~ack_o")
+    else:
+        print_read_mux(bus_type, "dat_o", "adr_i", get_read_sources(IRQ_REGS, "adr_i"))
     """
     if "fifos" in IP:
         for f in IP["fifos"]:
-            print(f"\t\t\t(adr_i[`{bus_type}_AW-1:0] == {f['name'].upper()}_LEVEL_REG_OFFSET)\t? {f['name'].upper()}_LEVEL_REG :")
-            print(f"\t\t\t(adr_i[`{bus_type}_AW-1:0] == {f['name'].upper()}_THRESHOLD_REG_OFFSET)\t? {f['name'].upper()}_THRESHOLD_REG :")
-            print(f"\t\t\t(adr_i[`{bus_type}_AW-1:0] == {f['name'].upper()}_FLUSH_REG_OFFSET)\t? {f['name'].upper()}_FLUSH_REG :")
+            emit(f"\t\t\t(adr_i[`{bus_type}_AW-1:0] == {f['name'].upper()}_LEVEL_REG_OFFSET)\t? {f['name'].upper()}_LEVEL_REG :")
+            emit(f"\t\t\t(adr_i[`{bus_type}_AW-1:0] == {f['name'].upper()}_THRESHOLD_REG_OFFSET)\t? {f['name'].upper()}_THRESHOLD_REG :")
+            emit(f"\t\t\t(adr_i[`{bus_type}_AW-1:0] == {f['name'].upper()}_FLUSH_REG_OFFSET)\t? {f['name'].upper()}_FLUSH_REG :")
+    """
+
+    emit("\n\talways @ (posedge clk_i or posedge rst_i)")
+    emit("\t\tif(rst_i)\n\t\t\tack_o <= 1'b0;")
+    stalls = get_fifo_stalls()
+    if stalls:
+        emit(f"\t\telse if(wb_valid & ~ack_o & ~({stalls}))")
+    else:
+        emit("\t\telse if(wb_valid & ~ack_o)")
+    emit("\t\t\tack_o <= 1'b1;")
+    emit("\t\telse\n\t\t\tack_o <= 1'b0;")
+
+def print_wb_pipelined_dat_o(bus_type):
+    """
+    Print the read data and the handshake of a pipelined Wishbone wrapper.
+    A request is accepted in every cycle stall_o is low and acknowledged in
+    the next cycle, in order; the read data is registered when the request
+    is accepted, as the address of the next request is already on adr_i
+    when the acknowledge is returned. stall_o is only raised by the packed
+    FIFOs.
+
+    Args:
+        bus_type (str): The bus type.
+
+    Returns:
+        None
     """
+    IRQ_REGS = ["IM", "MIS", "RIS", "IC"]
+
+    print_registered_rdata(bus_type, BUS.rdata, BUS.addr, get_read_sources(IRQ_REGS, BUS.addr), BUS.re)
 
-    print("\t\t\t32'hDEADBEEF;")
+    emit("\n\talways @ (posedge clk_i or posedge rst_i)")
+    emit("\t\tif(rst_i)\n\t\t\tack_o <= 1'b0;")
+    emit("\t\telse\n\t\t\tack_o <= wb_valid;")
+    stalls = get_fifo_stalls() or "1'b0"
+    emit(f"\n\tassign\t{BUS.stall} = {stalls};\n")
 
-    print("\n\talways @ (posedge clk_i or posedge rst_i)")
-    print("\t\tif(rst_i)\n\t\t\tack_o <= 1'b0;")
-    print("\t\telse if(wb_valid & ~ack_o)")
-    print("\t\t\tack_o <= 1'b1;")
-    print("\t\telse\n\t\t\tack_o <= 1'b0;")
+def print_axil_rdata(bus_type):
+    """
+    Print the read data and the channel stalls of an AXI4-Lite wrapper. The
+    read data is registered when the read is accepted, so RDATA is held
+    while RVALID waits for RREADY; the write channel is decoded from AWADDR
+    and the read channel from ARADDR, so a write and a read are accepted in
+    the same cycle. A channel is only stalled by the packed FIFOs it
+    accesses.
+
+    Args:
+        bus_type (str): The bus type.
+
+    Returns:
+        None
+    """
+    IRQ_REGS = ["IM", "MIS", "RIS"]
+
+    sources = get_read_sources(IRQ_REGS, BUS.raddr) + [("GCLK_REG_OFFSET", "GCLK_REG")]
+    print_registered_rdata(bus_type, BUS.rdata, BUS.raddr, sources, BUS.re)
+    rstalls = get_fifo_stalls("read") or "1'b0"
+    wstalls = get_fifo_stalls("write") or "1'b0"
+    emit(f"\n\tassign\t{BUS.rstall} = {rstalls};")
+    emit(f"\tassign\t{BUS.wstall} = {wstalls};\n")
 
 def print_fifos(bus_type):
-    if "fifos" in IP:
-        addr = "adr_i"
-        data = "dat_i"
-        if bus_type == "APB":
-            addr = "PADDR"
-            data = "PWDATA"
-        elif bus_type == "AHBL":
-            addr = "last_HADDR"
-            data = "HWDATA"
+    if MODEL.fifos:
+        data = BUS.wdata
+        re = BUS.re
+        we = BUS.we
   
-        for f in IP["fifos"]:
-            if bus_type == "WB":
-                rd = f" ack_o & ({bus_type.lower()}_re & ({addr}[`{bus_type}_AW-1:0] == {f['register']}_REG_OFFSET))"
-                wr = f"ack_o & ({bus_type.lower()}_we & ({addr}[`{bus_type}_AW-1:0] == {f['register']}_REG_OFFSET))"
+        for f in MODEL.fifos:
+            addr = BUS.raddr if f.type == "read" else BUS.addr
+            sel = get_sel(bus_type, addr, f"{f.register}_REG_OFFSET")
+            if MODEL.shared_decoder:
+                ack = f"{BUS.ack} & " if BUS.ack else ""
+                rd_ack = " & ~rd_ack" if MODEL.registered_read and bus_type == "APB" else ""
+                rd = f"{ack}{re}{rd_ack} & {sel}"
+                wr = f"{ack}{we} & {sel}"
+            elif BUS.ack:
+                rd = f" {BUS.ack} & ({re} & {sel})"
+                wr = f"{BUS.ack} & ({we} & {sel})"
+            elif MODEL.registered_read and not BUS.req_re:
+                # pop the FIFO once, in the cycle its data is registered
+                rd = f"({re} & ~rd_ack & {sel})"
+                wr = f"({we} & {sel})"
             else:
-                rd = f"({bus_type.lower()}_re & ({addr}[`{bus_type}_AW-1:0] == {f['register']}_REG_OFFSET))"
-                wr = f"({bus_type.lower()}_we & ({addr}[`{bus_type}_AW-1:0] == {f['register']}_REG_OFFSET))"
-            if f['type'] == "write":
-                print(f"\tassign\t{f['data_port']} = {data};") #{f['register']}_WIRE;")
-                print(f"\tassign\t{f['control_port']} = {wr};")
+                rd = f"({re} & {sel})"
+                wr = f"({we} & {sel})"
+            if MODEL.registered_read and bus_type == "AHBL":
+                # pop the FIFO when its data is fetched; see print_rdata()
+                rd = f"(rd_fetch & {get_sel(bus_type, 'rd_addr', f'{f.register}_REG_OFFSET')})"
+
+            if f.packed and BUS.req_re:
+                # the stall is raised by the request, before it is accepted
+                print_packed_fifo(bus_type, f, data, f"{BUS.req_re} & {sel}", f"{BUS.req_we} & {sel}")
+            elif f.packed:
+                print_packed_fifo(bus_type, f, data, f"{re} & {sel}", f"{we} & {sel}")
+            elif f.type == "write":
+                emit(f"\tassign\t{f.data_port} = {data};")
+                emit(f"\tassign\t{f.control_port} = {wr};")
             else:
-                print(f"\tassign\t{f['register']}_WIRE = {f['data_port']};")
-                print(f"\tassign\t{f['control_port']} = {rd};")
+                emit(f"\tassign\t{f.register}_WIRE = {f.data_port};")
+                emit(f"\tassign\t{f.control_port} = {rd};")
+
+def get_fifo_stalls(fifo_type=None):
+    """
+    Get the OR of the stall signals of the packed FIFOs (of a type, if
+    given), which hold the bus while a word is unpacked into or packed from
+    the FIFO.
+    """
+    return " | ".join(f"{f.name.upper()}_PSTALL" for f in MODEL.fifos if f.packed and fifo_type in (None, f.type))
+
+def print_packed_fifo(bus_type, f, data, rd, wr):
+    """
+    Print the logic that moves the entries of a packed FIFO through its
+    data register. A write loads the word into the pack buffer (PBUF) and
+    pushes the number of entries in PCOUNT, one per cycle starting with the
+    least significant one; a write that finds the buffer busy is stalled.
+    A read pops up to a word of entries into the buffer, one per cycle, and
+    is stalled until the FIFO is empty or the word is full; the number of
+    entries read is kept in PCOUNT.
+
+    Args:
+        bus_type (str): The bus type.
+        f (Fifo): The FIFO.
+        data (str): The write data bus.
+        rd (str): The read access of the data register.
+        wr (str): The write access of the data register.
+
+    Returns:
+        None
+    """
+    name = f.name.upper()
+    lanes = f.entries
+    cnt = f.count_bits
+    if f.type == "write":
+        emit(f"\twire\t\t{name}_PWR = {wr};")
+        if BUS.ack:
+            load = f"{BUS.ack} & {name}_PWR"
+        else:
+            load = f"{name}_PWR & ({name}_PCNT == 0)"
+        emit(f"\twire\t\t{name}_PLOAD = {load};")
+        emit(f"\t`{bus_type}_BLOCK({name}_PBUF, 32'b0) else if({name}_PLOAD) {name}_PBUF <= {data}; else if({name}_PCNT != 0) {name}_PBUF <= {name}_PBUF >> {f.width};")
+        emit(f"\t`{bus_type}_BLOCK({name}_PCNT, {cnt}'b0) else if({name}_PLOAD) {name}_PCNT <= ({name}_PLEN > {lanes}) ? {cnt}'d{lanes} : {name}_PLEN; else if({name}_PCNT != 0) {name}_PCNT <= {name}_PCNT - 1'b1;")
+        emit(f"\tassign\t{f.data_port} = {name}_PBUF[{f.width}-1:0];")
+        emit(f"\tassign\t{f.control_port} = ({name}_PCNT != 0);")
+        emit(f"\tassign\t{name}_PSTALL = {name}_PWR & ({name}_PCNT != 0);")
+    else:
+        ack = f" & ~{BUS.ack}" if BUS.ack else ""
+        emit(f"\twire\t\t{name}_PRD = {rd};")
+        emit(f"\twire\t\t{name}_PACT = {name}_PRD & ~{name}_PDONE{ack};")
+        emit(f"\twire\t\t{name}_POP = {name}_PACT & ({name}_PCNT < {lanes}) & ({f.level_port} != 0);")
+        emit(f"\twire\t\t{name}_PEND = {name}_PACT & (({name}_PCNT == {lanes}) | ({f.level_port} == 0));")
+        emit(f"\t`{bus_type}_BLOCK({name}_PBUF, 32'b0) else if({name}_POP & ({name}_PCNT == 0)) {name}_PBUF <= {f.data_port}; else if({name}_POP) {name}_PBUF[{name}_PCNT*{f.width} +: {f.width}] <= {f.data_port}; else if({name}_PEND & ({name}_PCNT == 0)) {name}_PBUF <= 32'b0;")
+        emit(f"\t`{bus_type}_BLOCK({name}_PCNT, {cnt}'b0) else if({name}_PDONE) {name}_PCNT <= {cnt}'b0; else if({name}_POP) {name}_PCNT <= {name}_PCNT + 1'b1;")
+        if BUS.rstall:
+            # the read may be held by the read data channel; keep the word
+            # until the read is accepted
+            emit(f"\t`{bus_type}_BLOCK({name}_PDONE, 1'b0) else if({name}_PEND) {name}_PDONE <= 1'b1; else if({BUS.re} & {name}_PRD) {name}_PDONE <= 1'b0;")
+        else:
+            emit(f"\t`{bus_type}_BLOCK({name}_PDONE, 1'b0) else {name}_PDONE <= {name}_PEND;")
+        emit(f"\t`{bus_type}_BLOCK({name}_PVALID, {cnt}'b0) else if({name}_PEND) {name}_PVALID <= {name}_PCNT;")
+        emit(f"\tassign\t{f.register}_WIRE = {name}_PBUF;")
+        emit(f"\tassign\t{f.control_port} = {name}_POP;")
+        emit(f"\tassign\t{name}_PSTALL = {name}_PRD & ~{name}_PDONE;")
 
 def print_bus_wrapper(bus_type, is_dft=False):
+
     print_license()
     print_header(bus_type)
     print_module_header(bus_type, is_dft)
     print_registers_offsets(bus_type)
     print_wires(bus_type, is_dft)
+    if MODEL.shared_decoder:
+        print_address_decoder(bus_type)
     print_registers(bus_type)
+
     print_GCLK_register(bus_type)
-    if "flags" in IP:
+    if MODEL.flags:
         print_IRQ_registers(bus_type)
     print_instance_to_wrap(bus_type)
-    if bus_type == "WB":
+    if BUS.rstall:
+        print_axil_rdata(bus_type)
+    elif BUS.stall:
+        print_wb_pipelined_dat_o(bus_type)
+    elif BUS.ack:
         print_wb_dat_o(bus_type)
     else:
         print_rdata(bus_type)
 
     print_fifos(bus_type)
-    print("endmodule")
+    emit("endmodule")
 
 
 def print_tb_duv(bus_type):
-   print(f"\n\t{IP['info']['name']}_{bus_type} DUV (")
-   print(f"\t\t`TB_{bus_type}_SLAVE_CONN", end="")
-   if IP["external_interface"]:
-       print(",")
-       for index, ifc in enumerate(IP['external_interface']):
-           if index != len(IP['external_interface']) - 1:
-               print(f"\t\t.{ifc['name']}({ifc['name']}),")
+   emit(f"\n\t{MODEL.name}_{bus_type} DUV (")
+   emit(f"\t\t`TB_{BUS.iface}_SLAVE_CONN{get_strb_suffix(BUS)}", end="")
+   if MODEL.external_interface:
+       emit(",")
+       for index, ifc in enumerate(MODEL.external_interface):
+           if index != len(MODEL.external_interface) - 1:
+               emit(f"\t\t.{ifc.name}({ifc.name}),")
            else:
-               print(f"\t\t.{ifc['name']}({ifc['name']})")
+               emit(f"\t\t.{ifc.name}({ifc.name})")
 
 
-   print("\t);")
+   emit("\t);")
 
 
 def print_tb_reg_offsets(bus_type):
-   print(f"\tlocalparam [`{bus_type}_AW-1:0]")
-   for i, r in enumerate(IP['registers']):
-       print(f"\t\t\t{r['name'].upper()}_REG_OFFSET =\t`{bus_type}_AW'h"+"{0:04x}".format(r['offset'])+",")
-   print(f"\t\t\tIM_REG_OFFSET =\t\t`{bus_type}_AW'h" +"{0:04x}".format(IM_OFF)+",")
-   print(f"\t\t\tIC_REG_OFFSET =\t\t`{bus_type}_AW'h" +"{0:04x}".format(IC_OFF)+",")
-   print(f"\t\t\tRIS_REG_OFFSET =\t`{bus_type}_AW'h"  +"{0:04x}".format(RIS_OFF)+",")
-   print(f"\t\t\tMIS_REG_OFFSET =\t`{bus_type}_AW'h"  +"{0:04x}".format(MIS_OFF)+";\n")
-
+   emit(f"\tlocalparam [`{bus_type}_AW-1:0]")
+   for r in MODEL.registers:
+       emit(BUS.tb_offset_fmt.format(r.name.upper(), r.offset))
+       for name, offset, _, _ in get_aliases(r):
+           emit(BUS.tb_offset_fmt.format(name.upper(), offset))
+       if r.bit_access:
+           emit(BUS.tb_offset_fmt.format(f"{r.name.upper()}_BIT", get_bit_band_offset(r)))
+   emit(f"\t\t\tIM_REG_OFFSET =\t\t`{bus_type}_AW'h" +"{0:04x}".format(IM_OFF)+",")
+   emit(f"\t\t\tIC_REG_OFFSET =\t\t`{bus_type}_AW'h" +"{0:04x}".format(IC_OFF)+",")
+   emit(f"\t\t\tRIS_REG_OFFSET =\t`{bus_type}_AW'h"  +"{0:04x}".format(RIS_OFF)+",")
+   emit(f"\t\t\tMIS_REG_OFFSET =\t`{bus_type}_AW'h"  +"{0:04x}".format(MIS_OFF)+";\n")
+
+
+def print_tb_alias_test():
+    """
+    Print a test that writes every set, clear and toggle alias and a bit
+    band word once and checks the register read back. A toggle applied
+    twice (or not at all) leaves the register unchanged, so the test
+    catches a bus whose write strobe is not qualified to one cycle.
+    """
+    regs = [r for r in MODEL.registers if r.set_clr_tgl or r.bit_access]
+    write, read = ("WB_P_WRITE", "WB_P_READ") if BUS.stall else (f"{BUS.name}_W_WRITE", f"{BUS.name}_W_READ")
+    emit("\n\t// Aliases test: every write to an alias updates the register once")
+    emit("\t`TB_TEST_BEGIN(aliases)")
+    for r in regs:
+        value = 0xEE & r.mask
+        checks = []
+        if r.set_clr_tgl:
+            for alias, data in (("TGL", 0x8000000F), ("SET", 0x100), ("CLR", 0x20)):
+                value = {"TGL": value ^ data, "SET": value | data, "CLR": value & ~data}[alias] & r.mask
+                checks.append((f"{r.name}_{alias}", f"{r.name}_{alias}_REG_OFFSET", data, value))
+        if r.bit_access:
+            value = (value | 0x10) & r.mask
+            checks.append((f"{r.name}_BIT[4]", f"{r.name}_BIT_REG_OFFSET + 16", 1, value))
+        emit(f"\t\t{write}({r.name}_REG_OFFSET, 32'h{0xEE & r.mask:X});")
+        for alias, offset, data, expected in checks:
+            emit(f"\t\t{write}({offset}, 32'h{data:X});")
+            emit(f"\t\t{read}({r.name}_REG_OFFSET, alias_data);")
+            emit(f"\t\tif(alias_data !== 32'h{expected:X}) $display(\"Verification Failed: {alias} wrote %h, read %h, expected %h\", 32'h{data:X}, alias_data, 32'h{expected:X});")
+    emit("\t`TB_TEST_END(aliases)")
 
 def print_tb(bus_type):
     print_license()
-    print(f"/* THIS FILE IS GENERATED, edit it to complete the testbench */\n")
-    print(f"`timescale\t\t1ns/1ps\n")
-    print(f"`default_nettype\tnone\n")
-    print(f"`define\t\t\t{bus_type}_AW\t\t\t{BUS_AW}")
-    print("`define\t\t\tMS_TB_SIMTIME\t\t1_000_000\n")
-    print(f"`include\t\t\"tb_macros.vh\"\n")
+    emit(f"/* THIS FILE IS GENERATED, edit it to complete the testbench */\n")
+    emit(f"`timescale\t\t1ns/1ps\n")
+    emit(f"`default_nettype\tnone\n")
+    emit(f"`define\t\t\t{bus_type}_AW\t\t\t{BUS_AW}")
+    emit("`define\t\t\tMS_TB_SIMTIME\t\t1_000_000\n")
+    emit(f"`include\t\t\"tb_macros.vh\"\n")
 
 
-    print(f"module {IP['info']['name']}_{bus_type}_tb;\n")
+    emit(f"module {MODEL.name}_{bus_type}_tb;\n")
 
 
-    print("\t// Change the following parameters as desired")
-    print("\tparameter real CLOCK_PERIOD = 100.0;")
-    print("\tparameter real RESET_DURATION = 999.0;\n")
+    emit("\t// Change the following parameters as desired")
+    emit("\tparameter real CLOCK_PERIOD = 100.0;")
+    emit("\tparameter real RESET_DURATION = 999.0;\n")
 
-    print("\t// DON NOT Change the following parameters")
+    emit("\t// DON NOT Change the following parameters")
     print_tb_reg_offsets(bus_type)
 
 
-    print(f"\t`TB_{bus_type}_SIG\n")
+    emit(f"\t`TB_{BUS.iface}_SIG\n")
 
 
-    if IP["external_interface"]:
-        # Print details of each interface
-        for index, ifc in enumerate(IP['external_interface']):
-            if(ifc['direction'] == "input"):
-                print("\treg\t", end='')
-            else:
-                print("\twire\t", end='')
-            print(f"[{ifc['width']-1}:0]\t{ifc['name']};")
-
-    if bus_type == "AHBL":
-        clk = "HCLK"
-        rst = "HRESETn"
-        rst_pol = "1'b0"
-    elif bus_type == "APB":
-        clk = "PCLK"
-        rst = "PRESETn"
-        rst_pol = "1'b0"
-    elif bus_type == "WB":
-        clk = "clk_i"
-        rst = "rst_i"
-        rst_pol = "1'b1"
-
-    print(f"\n\t`TB_CLK({clk}, CLOCK_PERIOD)")
-    #print(f"\t`TB_SRSTN({'HRESETn' if bus_type == 'AHBL' else 'PRESETn'}, {'HCLK' if bus_type == 'AHBL' else 'PCLK'}, RESET_DURATION)")
-    print(f"\t`TB_ESRST({rst}, {rst_pol}, {clk}, RESET_DURATION)")
-    print(f"\t`TB_DUMP(\"{bus_type}_{IP['info']['name']}_tb.vcd\", {IP['info']['name']}_{bus_type}_tb, 0)")
-    print(f"\t`TB_FINISH(`MS_TB_SIMTIME)")
+    # Print details of each interface
+    for ifc in MODEL.external_interface:
+        if(ifc.direction == "input"):
+            emit("\treg\t", end='')
+        else:
+            emit("\twire\t", end='')
+        emit(f"[{ifc.bits-1}:0]\t{ifc.name};")
+
+
+    clk = BUS.clk
+    rst = BUS.rst
+    rst_pol = f"1'b{BUS.rst_level}"
+
+    emit(f"\n\t`TB_CLK({clk}, CLOCK_PERIOD)")
+    #emit(f"\t`TB_SRSTN({'HRESETn' if bus_type == 'AHBL' else 'PRESETn'}, {'HCLK' if bus_type == 'AHBL' else 'PCLK'}, RESET_DURATION)")
+    emit(f"\t`TB_ESRST({rst}, {rst_pol}, {clk}, RESET_DURATION)")
+    emit(f"\t`TB_DUMP(\"{bus_type}_{MODEL.name}_tb.vcd\", {MODEL.name}_{bus_type}_tb, 0)")
+    emit(f"\t`TB_FINISH(`MS_TB_SIMTIME)")
 
 
     print_tb_duv(bus_type)
 
 
-    print(f"\n\t`include \"{bus_type.lower()}_tasks.vh\"\n")
+    emit(f"\n\t`include \"{BUS.tag}_tasks.vh\"\n")
 
 
-    print("\t`TB_TEST_EVENT(test1)\n")
-    print("\tinitial begin\n"
+    has_aliases = any(r.set_clr_tgl or r.bit_access for r in MODEL.registers)
+    emit("\t`TB_TEST_EVENT(test1)\n")
+    if has_aliases:
+        emit("\t`TB_TEST_EVENT(aliases)")
+        emit("\treg [31:0] alias_data;\n")
+    emit("\tinitial begin\n"
             "\t\t#999 -> e_assert_reset;\n"
             "\t\t@(e_reset_done);\n\n"
             "\t\t// Perform Test 1\n"
             "\t\t#1000 -> e_test1_start;\n"
             "\t\t@(e_test1_done);\n\n"
+            + ("\t\t// Perform the aliases test\n"
+               "\t\t#1000 -> e_aliases_start;\n"
+               "\t\t@(e_aliases_done);\n\n" if has_aliases else "") +
             "\t\t// Perform other tests\n\n"
             "\t\t// Finish the simulation\n"
             "\t\t#1000 $finish();\n"         
             "\tend\n\n")
         
-    print("\t// Test 1\n"
+    emit("\t// Test 1\n"
             "\t`TB_TEST_BEGIN(test1)"
             "\n\t\t// Test 1 code goes here\n"
             "\n\t`TB_TEST_END(test1)")
 
+    if has_aliases:
+        print_tb_alias_test()
 
-    print("endmodule")
+    emit("endmodule")
 
 
 def print_reg_def():
-    ip_name = IP['info']['name'].upper()
+    ip_name = MODEL.name.upper()
     print_license()
-    print(f"#ifndef {ip_name}REGS_H")
-    print(f"#define {ip_name}REGS_H\n")
-    print(''' 
+    emit(f"#ifndef {ip_name}REGS_H")
+    emit(f"#define {ip_name}REGS_H\n")
+    emit(''' 
 /******************************************************************************
 * Includes
 ******************************************************************************/
@@ -800,116 +1317,102 @@ def print_reg_def():
 ******************************************************************************/
 ''')
 
-    print("#ifndef IO_TYPES")
-    print("#define IO_TYPES")
-    print("#define   __R     volatile const uint32_t")
-    print("#define   __W     volatile       uint32_t")
-    print("#define   __RW    volatile       uint32_t")
-    print("#endif\n")
-
-    for r in IP["registers"]:
-        if "fields" in r:
-            for f in r["fields"]:
-                if not isinstance(f['bit_width'], int):
-                    width = get_param_default(f['bit_width'])
-                else:
-                    width = f['bit_width']
-                print(f"#define {ip_name}_{r['name'].upper()}_REG_{f['name'].upper()}_BIT\t((uint32_t){f['bit_offset']})")
-
-                mask = hex((2**width - 1) << f['bit_offset'])
-                print(f"#define {ip_name}_{r['name'].upper()}_REG_{f['name'].upper()}_MASK\t((uint32_t){mask})")
+    emit("#ifndef IO_TYPES")
+    emit("#define IO_TYPES")
+    emit("#define   __R     volatile const uint32_t")
+    emit("#define   __W     volatile       uint32_t")
+    emit("#define   __RW    volatile       uint32_t")
+    emit("#endif\n")
+
+    for r in MODEL.registers:
+        reg_name = r.name.upper()
+        if r.fields:
+            for f in r.fields:
+                emit(f"#define {ip_name}_{reg_name}_REG_{f.name.upper()}_BIT\t((uint32_t){f.bit_offset})")
+                emit(f"#define {ip_name}_{reg_name}_REG_{f.name.upper()}_MASK\t((uint32_t){hex(f.mask)})")
         else:
             # If there are no fields in the register, then the register should have a single feild
             # The field should have the name of the register
             # The field should have a mask corresponding to the size of the register
             # The bit offset should be 0
-            if not isinstance(r['size'], int):
-                size = get_param_default(r['size'])
-            else:
-                size = r['size']
-            
-            field_name = r['name']  
-            mask = hex((2**size - 1))
+            emit(f"#define {ip_name}_{reg_name}_REG_{reg_name}_BIT\t((uint32_t)0)")
+            emit(f"#define {ip_name}_{reg_name}_REG_{reg_name}_MASK\t((uint32_t){hex(r.mask)})")
             
-            print(f"#define {ip_name}_{r['name'].upper()}_REG_{field_name.upper()}_BIT\t((uint32_t)0)")
-            print(f"#define {ip_name}_{r['name'].upper()}_REG_{field_name.upper()}_MASK\t((uint32_t){mask})")
-            
-                
-        if "size" in r:
-            if not isinstance(r['size'], int):
-                size = get_param_default(r['size'])
-            else:
-                size= r['size']
-                
-            max_register_value = (2** size) -1
-            print(f"#define {ip_name}_{r['name'].upper()}_REG_MAX_VALUE\t((uint32_t)0x{max_register_value:X})\n")
-
-            
-    print()   
+        emit(f"#define {ip_name}_{reg_name}_REG_MAX_VALUE\t((uint32_t)0x{r.mask:X})")
+        if r.window > 1:
+            emit(f"#define {ip_name}_{reg_name}_REG_WINDOW\t((uint32_t){r.window})")
+        if r.entries > 1:
+            emit(f"#define {ip_name}_{reg_name}_REG_ENTRIES\t((uint32_t){r.entries})")
+        if r.bit_access:
+            # the offset of the bit band word of a bit; also the <reg>_BIT[bit] member
+            emit(f"#define {ip_name}_{reg_name}_REG_BIT_OFFSET(bit)\t((uint32_t)({hex(get_bit_band_offset(r))} + 4 * (bit)))")
+        emit()
+
+    emit()   
     
     # Add Int Registers fields
-    if "flags" in IP:
-        c = 0;
-        #fcnt = len(self.ip.data["flags"])
-        for flag in IP["flags"]:
-            w = get_port_width(flag["port"])
-            if isinstance(w, int):
-                width = w
-            else:
-                width = get_param_default(w)
-            pattern = (2**width - 1) << c
-            print(f"#define {ip_name}_{flag['name'].upper()}_FLAG\t((uint32_t){hex(pattern)})")
+    for flag in MODEL.flags:
+        pattern = (2**flag.bits - 1) << flag.pos
+        emit(f"#define {ip_name}_{flag.name.upper()}_FLAG\t((uint32_t){hex(pattern)})")
 
-            c = c + width
-
-    print()
+    emit()
     
-    print('''
+    emit('''
           
 /******************************************************************************
 * Typedefs and Enums
 ******************************************************************************/
           ''')
 
-    print(f"typedef struct _{ip_name}_TYPE_ "+"{")
-    off = 0
-    g = 0
-    for index, r in enumerate(IP["registers"]):
-        #print(f"{off} - {r['offset']}")
-        if r['offset'] != off:
-            gap_size = int((r['offset'] - off)/4)
-            off = r['offset'] 
-            print(f"\t__R \treserved_{g}[{gap_size}];")
-            g = g + 1
+    emit(f"typedef struct _{ip_name}_TYPE_ "+"{")
+    # (offset, type, member, size in words)
+    members = []
+    for r in MODEL.registers:
         reg_type = "__RW"
-        if r["mode"] == "r":
+        if r.mode == "r":
             reg_type = "__R "
-        elif r["mode"] == "w":
+        elif r.mode == "w":
             reg_type = "__W "
-        print(f"\t{reg_type}\t{r['name']};")
-        off = off + 4
+        members.append((r.offset, reg_type, r.name, 1))
+        if r.window > 1:
+            # the FIFO data register is aliased over the whole window
+            members.append((r.offset + 4, reg_type, f"{r.name}_WINDOW[{r.window - 1}]", r.window - 1))
+    aliases = [(offset, "__W ", name, 1) for r in MODEL.registers for name, offset, _, _ in get_aliases(r)]
+    aliases += [(get_bit_band_offset(r), "__RW", f"{r.name}_BIT[32]", 32) for r in MODEL.registers if r.bit_access]
+    if aliases:
+        members = sorted(members + aliases, key=lambda m: m[0])
 
-    #print(f"{off} - {INT_REG_OFF}")
-    if "flags" in IP:
+    off = 0
+    g = 0
+    for offset, reg_type, member, size in members:
+        if offset != off:
+            gap_size = int((offset - off)/4)
+            off = offset 
+            emit(f"\t__R \treserved_{g}[{gap_size}];")
+            g = g + 1
+        emit(f"\t{reg_type}\t{member};")
+        off = off + 4 * size
+
+    if MODEL.flags:
         reserved_size = int((INT_REG_OFF - off)/4)
-        print(f"\t__R \treserved_{g}[{(reserved_size)}];")
-        print("\t__RW\tIM;")
-        print("\t__R \tMIS;")
-        print("\t__R \tRIS;")
-        print("\t__W \tIC;")
-
-    if IP['clock']['gated']=='yes':
-        if "flags" not in IP:
+        emit(f"\t__R \treserved_{g}[{(reserved_size)}];")
+        emit("\t__RW\tIM;")
+        emit("\t__R \tMIS;")
+        emit("\t__R \tRIS;")
+        emit("\t__W \tIC;")
+
+    if MODEL.clock_gated:
+        if not MODEL.flags:
             reserved_size = int((CLK_GATE_OFF - off)/4)
-            print(f"\t__R \treserved_{g}[{(reserved_size)}];")
+            emit(f"\t__R \treserved_{g}[{(reserved_size)}];")
     
-        print("\t__W \tGCLK;")
+        emit("\t__W \tGCLK;")
         
-    print("}", end="")
-    print(f" {ip_name}_TYPE;")
+    emit("}", end="")
+    emit(f" {ip_name}_TYPE;")
     
-    print(f"\ntypedef struct _{ip_name}_TYPE_ *{ip_name}_TYPE_PTR;     // Pointer to the register structure")
-    print('''
+    emit(f"\ntypedef struct _{ip_name}_TYPE_ *{ip_name}_TYPE_PTR;     // Pointer to the register structure")
+    emit('''
   
 /******************************************************************************
 * Function Prototypes
@@ -938,60 +1441,46 @@ def print_reg_def():
    Print bitfield JSON for all registers
 """
 def print_bf():
-   for r in IP["registers"]:
-       print(f"\n{r['name']}.json")
-       print("<img src=\"https://svg.wavedrom.com/{reg:[", end="")
-       if not "fields" in r:
-           if isinstance(r["size"], int):
-               size = int(r["size"])
-           else:
-               size = get_param_default(r["size"])
-           print(f"{{name:'{r['name']}', bits:{size}}},", end="")
-           print(f"{{bits: {32-size}}}" , end="")
-       else:
-           l = 0
-           for f in r["fields"]:
-               if f["bit_offset"] > l:
-                   print(f"{{bits: {f['bit_offset']-l}}},", end="")
-                   l = f["bit_offset"]
-               if isinstance(f["bit_width"], int):
-                   size = int(f["bit_width"])
-               else:
-                   size = get_param_default(f["bit_width"])
-               l = l + size
-               print(f"{{name:'{f['name']}', bits:{size}}},", end="")
-           print(f"{{bits: {32-l}}}", end="")
-       #print("], config: {hspace: width, lanes: 2, hflip: true}}")
-       print("], config: {lanes: 2, hflip: true}} \"/>")
+   for r in MODEL.registers:
+       emit(f"\n{r.name}.json")
+       print_reg_bf(r)
 
 
 def print_reg_bf(r):
-   print("<img src=\"https://svg.wavedrom.com/{reg:[", end="")
-   if not "fields" in r:
-       if isinstance(r["size"], int):
-           size = int(r["size"])
-       else:
-           size = get_param_default(r["size"])
-       print(f"{{name:'{r['name']}', bits:{size}}},", end="")
-       print(f"{{bits: {32-size}}}" , end="")
+   emit("<img src=\"https://svg.wavedrom.com/{reg:[", end="")
+   if not r.fields:
+       emit(f"{{name:'{r.name}', bits:{r.bits}}},", end="")
+       emit(f"{{bits: {32-r.bits}}}" , end="")
    else:
        l = 0
-       for f in r["fields"]:
-           if f["bit_offset"] > l:
-               print(f"{{bits: {f['bit_offset']-l}}},", end="")
-               l = f["bit_offset"]
-           if isinstance(f["bit_width"], int):
-               size = int(f["bit_width"])
-           else:
-               size = get_param_default(f["bit_width"])
-           l = l + size
-           print(f"{{name:'{f['name']}', bits:{size}}},", end="")
-       print(f"{{bits: {32-l}}}", end="")
-       #print("], config: {hspace: width, lanes: 2, hflip: true}}")
-   print("], config: {lanes: 2, hflip: true}} \"/>")
+       for f in r.fields:
+           if f.bit_offset > l:
+               emit(f"{{bits: {f.bit_offset-l}}},", end="")
+               l = f.bit_offset
+           l = l + f.bits
+           emit(f"{{name:'{f.name}', bits:{f.bits}}},", end="")
+       emit(f"{{bits: {32-l}}}", end="")
+       #emit("], config: {hspace: width, lanes: 2, hflip: true}}")
+   emit("], config: {lanes: 2, hflip: true}} \"/>")
+
 
 
+def get_md_description(r):
+    """
+    Get the description of a register for the docs, with the packing and the
+    address window of a FIFO data register.
+
+    """
+    description = r.description
+    if r.entries > 1:
+        description += f" Packs up to {r.entries} FIFO entries per word, the first one in the least significant bits."
+    if r.window > 1:
+        end = r.offset + 4 * r.window - 4
+        description += f" Aliased over a {r.window}-word window ({hex(r.offset)[2:].zfill(4)}-{hex(end)[2:].zfill(4)}); any access in the window accesses the FIFO."
+    return description
+
 def print_md_tables():
+
    # Description
    # The Wrapped IP
    # Implementation Example
@@ -1006,155 +1495,151 @@ def print_md_tables():
    # Installation
    # Simulation
 
-    print(f"# {IP['info']['name']}\n")
-    print(f"{IP['info']['description']}")
-    print("## The wrapped IP\n")    
-    if (IP['info']['bus'][0]=='generic'):
-        print("\n APB, AHBL, and Wishbone wrappers are provided. All wrappers provide the same programmer's interface as outlined in the following sections.")
-        print("\n### Wrapped IP System Integration\n")
-        print("Based on your use case, use one of the provided wrappers or create a wrapper for your system bus type. For an example of how to integrate the wishbone wrapper:")
-        print("```verilog")
-        print(f"{IP['info']['name']}_WB INST (")
-        print("\t.clk_i(clk_i),")
-        print("\t.rst_i(rst_i),")
-        print("\t.adr_i(adr_i),")
-        print("\t.dat_i(dat_i),")
-        print("\t.dat_o(dat_o),")
-        print("\t.sel_i(sel_i),")
-        print("\t.cyc_i(cyc_i),")
-        print("\t.stb_i(stb_i),")
-        print("\t.ack_o(ack_o),")
-        print("\t.we_i(we_i), ")
-        print("\t.IRQ(irq),")
-        if "external_interface" in IP:
-            for index, ei in enumerate(IP["external_interface"]):
-                if index != len(IP['external_interface']) - 1:
-                    print(f"\t.{ei['name']}({ei['name']}),")
-                else:
-                    print(f"\t.{ei['name']}({ei['name']})")
-        print(");")
-        print("```")
-        #The port `ext_in` must be connected to an input I/O pad.
-    elif (IP['info']['bus'][0]=='APB'):
-        print("\n The IP comes with an APB Wrapper")
-        print("\n#### Wrapped IP System Integration\n")
-        print("```verilog")
-        print(f"{IP['info']['name']}_APB INST (")
-        print("\t`TB_APB_SLAVE_CONN,")
-        if "external_interface" in IP:
-            for ei in IP["external_interface"]:
-                print(f"\t.{ei['name']}({ei['name']})")
-        print(");")
-        print("```")
-        print("> **_NOTE:_** `TB_APB_SLAVE_CONN is a convenient macro provided by [BusWrap](https://github.com/efabless/BusWrap/tree/main).")
-    elif (IP['info']['bus'][0]=='AHBL'):
-        print("\n The IP comes with an AHBL Wrapper")
-        print("\n#### Wrapped IP System Integration\n")
-        print("```verilog")
-        print(f"{IP['info']['name']}_APB INST (")
-        print("\t`TB_AHBL_SLAVE_CONN,")
-        if "external_interface" in IP:
-            for ei in IP["external_interface"]:
-                print(f"\t.{ei['name']}({ei['name']})")
-        print(");")
-        print("```")
-        print("> **_NOTE:_** `TB_APB_SLAVE_CONN is a convenient macro provided by [BusWrap](https://github.com/efabless/BusWrap/tree/main).")
-
-    print("### Wrappers with DFT support")
-    print("Wrappers in the directory ``/hdl/rtl/bus_wrappers/DFT`` have an extra input port ``sc_testmode`` to disable the clock gate whenever the scan chain testmode is enabled.")
-
-    if "external_interface" in IP:
-        print("### External IO interfaces")
-        print("|IO name|Direction|Width|Description|")
-        print("|---|---|---|---|")
-        for port in IP["external_interface"]:
-            print(f"|{port['name']}|{port['direction']}|{port['width']}|{port['description']}|")      
-
-    print("### Interrupt Request Line (irq)")
-    print ("This IP generates interrupts on specific events, which are described in the [Interrupt Flags](#interrupt-flags) section bellow. The IRQ port should be connected to the system interrupt controller.")
-
-    print("\n## Implementation example  \n")
-    print(f"The following table is the result for implementing the {IP['info']['name']} IP with different wrappers using Sky130 HD library and [OpenLane2](https://github.com/efabless/openlane2) flow.")
-    print("|Module | Number of cells | Max. freq |")
-    print("|---|---|---|")
-    if (IP['info']['bus'][0]=='generic'):
-        print(f"|{IP['info']['name']}|{IP['info']['cell_count'][0]['IP']}| {IP['info']['clock_freq_mhz'][0]['IP']} |")
-        print(f"|{IP['info']['name']}_APB|{IP['info']['cell_count'][1]['APB']}|{IP['info']['clock_freq_mhz'][1]['APB']}|")
-        print(f"|{IP['info']['name']}_AHBL|{IP['info']['cell_count'][2]['AHBL']}|{IP['info']['clock_freq_mhz'][2]['AHBL']}|")
-        print(f"|{IP['info']['name']}_WB|{IP['info']['cell_count'][3]['WB']}|{IP['info']['clock_freq_mhz'][3]['WB']}|")
-    elif (IP['info']['bus'][0]=='APB'):
-        print(f"|{IP['info']['name']}|{IP['info']['cell_count'][0]['IP']}| {IP['info']['clock_freq_mhz'][0]['IP']} |")
-        print(f"|{IP['info']['name']}_APB|{IP['info']['cell_count'][1]['APB']}|{IP['info']['clock_freq_mhz'][1]['APB']}|")
-    elif (IP['info']['bus'][0]=='AHBL'):
-        print(f"|{IP['info']['name']}|{IP['info']['cell_count'][0]['IP']}| {IP['info']['clock_freq_mhz'][0]['IP']} |")
-        print(f"|{IP['info']['name']}_AHBL|{IP['info']['cell_count'][1]['AHBL']}|{IP['info']['clock_freq_mhz'][1]['AHBL']}|")
-    elif (IP['info']['bus'][0]=='WB'):
-        print(f"|{IP['info']['name']}|{IP['info']['cell_count'][0]['IP']}| {IP['info']['clock_freq_mhz'][0]['IP']} |")
-        print(f"|{IP['info']['name']}_WB|{IP['info']['cell_count'][1]['WB']}|{IP['info']['clock_freq_mhz'][1]['WB']}|")
-
-    if "registers" in IP:
-
-        print("## The Programmer's Interface\n")
-        print("\n### Registers\n")
-
-        print("|Name|Offset|Reset Value|Access Mode|Description|")
-        print("|---|---|---|---|---|")
-        for r in IP["registers"]:
-            if isinstance(r["size"], int):
-                size = int(r["size"])
+    emit(f"# {MODEL.name}\n")
+    emit(f"{MODEL.info['description']}")
+    emit("## The wrapped IP\n")    
+    if (MODEL.info['bus'][0]=='generic'):
+        emit("\n APB, AHBL, AXI4-Lite, and Wishbone wrappers are provided. All wrappers provide the same programmer's interface as outlined in the following sections.")
+        emit("\n### Wrapped IP System Integration\n")
+        emit("Based on your use case, use one of the provided wrappers or create a wrapper for your system bus type. For an example of how to integrate the wishbone wrapper:")
+        emit("```verilog")
+        emit(f"{MODEL.name}_WB INST (")
+        emit("\t.clk_i(clk_i),")
+        emit("\t.rst_i(rst_i),")
+        emit("\t.adr_i(adr_i),")
+        emit("\t.dat_i(dat_i),")
+        emit("\t.dat_o(dat_o),")
+        emit("\t.sel_i(sel_i),")
+        emit("\t.cyc_i(cyc_i),")
+        emit("\t.stb_i(stb_i),")
+        emit("\t.ack_o(ack_o),")
+        if MODEL.wb_pipelined:
+            emit("\t.stall_o(stall_o),")
+        emit("\t.we_i(we_i), ")
+        emit("\t.IRQ(irq),")
+        for index, ei in enumerate(MODEL.external_interface):
+            if index != len(MODEL.external_interface) - 1:
+                emit(f"\t.{ei.name}({ei.name}),")
             else:
-                size = get_param_default(r["size"])
-            if "init" in r:
-                reset_value = '0x' + r["init"].strip("'h?").zfill(8)
+                emit(f"\t.{ei.name}({ei.name})")
+        emit(");")
+        emit("```")
+        #The port `ext_in` must be connected to an input I/O pad.
+    elif (MODEL.info['bus'][0]=='APB'):
+        emit("\n The IP comes with an APB Wrapper")
+        emit("\n#### Wrapped IP System Integration\n")
+        emit("```verilog")
+        emit(f"{MODEL.name}_APB INST (")
+        emit("\t`TB_APB_SLAVE_CONN,")
+        for ei in MODEL.external_interface:
+            emit(f"\t.{ei.name}({ei.name})")
+        emit(");")
+        emit("```")
+        emit("> **_NOTE:_** `TB_APB_SLAVE_CONN is a convenient macro provided by [BusWrap](https://github.com/efabless/BusWrap/tree/main).")
+    elif (MODEL.info['bus'][0]=='AHBL'):
+        from bus_profiles import BUS_PROFILES
+        emit("\n The IP comes with an AHBL Wrapper")
+        emit("\n#### Wrapped IP System Integration\n")
+        emit("```verilog")
+        emit(f"{MODEL.name}_APB INST (")
+        emit(f"\t`TB_AHBL_SLAVE_CONN{get_strb_suffix(BUS_PROFILES['AHBL'])},")
+        for ei in MODEL.external_interface:
+            emit(f"\t.{ei.name}({ei.name})")
+        emit(");")
+        emit("```")
+        emit("> **_NOTE:_** `TB_APB_SLAVE_CONN is a convenient macro provided by [BusWrap](https://github.com/efabless/BusWrap/tree/main).")
+
+    emit("### Wrappers with DFT support")
+    emit("Wrappers in the directory ``/hdl/rtl/bus_wrappers/DFT`` have an extra input port ``sc_testmode`` to disable the clock gate whenever the scan chain testmode is enabled.")
+
+    if MODEL.external_interface:
+        emit("### External IO interfaces")
+        emit("|IO name|Direction|Width|Description|")
+        emit("|---|---|---|---|")
+        for port in MODEL.external_interface:
+            emit(f"|{port.name}|{port.direction}|{port.width}|{port.description}|")      
+
+    emit("### Interrupt Request Line (irq)")
+    emit("This IP generates interrupts on specific events, which are described in the [Interrupt Flags](#interrupt-flags) section bellow. The IRQ port should be connected to the system interrupt controller.")
+
+    emit("\n## Implementation example  \n")
+    emit(f"The following table is the result for implementing the {MODEL.name} IP with different wrappers using Sky130 HD library and [OpenLane2](https://github.com/efabless/openlane2) flow.")
+    emit("|Module | Number of cells | Max. freq |")
+    emit("|---|---|---|")
+    if (MODEL.info['bus'][0]=='generic'):
+        emit(f"|{MODEL.name}|{MODEL.info['cell_count'][0]['IP']}| {MODEL.info['clock_freq_mhz'][0]['IP']} |")
+        emit(f"|{MODEL.name}_APB|{MODEL.info['cell_count'][1]['APB']}|{MODEL.info['clock_freq_mhz'][1]['APB']}|")
+        emit(f"|{MODEL.name}_AHBL|{MODEL.info['cell_count'][2]['AHBL']}|{MODEL.info['clock_freq_mhz'][2]['AHBL']}|")
+        emit(f"|{MODEL.name}_WB|{MODEL.info['cell_count'][3]['WB']}|{MODEL.info['clock_freq_mhz'][3]['WB']}|")
+    elif (MODEL.info['bus'][0]=='APB'):
+        emit(f"|{MODEL.name}|{MODEL.info['cell_count'][0]['IP']}| {MODEL.info['clock_freq_mhz'][0]['IP']} |")
+        emit(f"|{MODEL.name}_APB|{MODEL.info['cell_count'][1]['APB']}|{MODEL.info['clock_freq_mhz'][1]['APB']}|")
+    elif (MODEL.info['bus'][0]=='AHBL'):
+        emit(f"|{MODEL.name}|{MODEL.info['cell_count'][0]['IP']}| {MODEL.info['clock_freq_mhz'][0]['IP']} |")
+        emit(f"|{MODEL.name}_AHBL|{MODEL.info['cell_count'][1]['AHBL']}|{MODEL.info['clock_freq_mhz'][1]['AHBL']}|")
+    elif (MODEL.info['bus'][0]=='WB'):
+        emit(f"|{MODEL.name}|{MODEL.info['cell_count'][0]['IP']}| {MODEL.info['clock_freq_mhz'][0]['IP']} |")
+        emit(f"|{MODEL.name}_WB|{MODEL.info['cell_count'][1]['WB']}|{MODEL.info['clock_freq_mhz'][1]['WB']}|")
+
+    if MODEL.registers:
+
+        emit("## The Programmer's Interface\n")
+        emit("\n### Registers\n")
+
+        emit("|Name|Offset|Reset Value|Access Mode|Description|")
+        emit("|---|---|---|---|---|")
+        for r in MODEL.registers:
+            if r.init is not None:
+                reset_value = '0x' + r.init.strip("'h?").zfill(8)
             else:
                 reset_value = "0x00000000"
-            print("|{0}|{1}|{2}|{3}|{4}|".format(r["name"], hex(r["offset"])[2:].zfill(4), reset_value, r["mode"], r["description"]))
+            emit("|{0}|{1}|{2}|{3}|{4}|".format(r.name, hex(r.offset)[2:].zfill(4), reset_value, r.mode, get_md_description(r)))
+            for name, offset, _, action in get_aliases(r):
+                emit("|{0}|{1}|{2}|{3}|{4}|".format(name, hex(offset)[2:].zfill(4), "-", "w", f"Writing 1 to a bit {action} the bit of {r.name}; the other bits are not changed."))
+            if r.bit_access:
+                end = get_bit_band_offset(r) + 0x7C
+                emit("|{0}|{1}|{2}|{3}|{4}|".format(f"{r.name}_BIT", f"{hex(get_bit_band_offset(r))[2:].zfill(4)}-{hex(end)[2:].zfill(4)}", "-", "rw", f"Bit band alias of {r.name}; word n reads bit n of {r.name} in bit 0 and a write sets bit n to bit 0 of the data."))
     """
     if "fifos" in IP:
         f_indx = 0
         for f in IP["fifos"]:
-            print("|{0}|{1}|{2}|{3}|{4}|".format(f"{f['name'].upper()}_LEVEL", hex(LEVEL_OFF + 0x10 * f_indx)[2:].zfill(4), "0x00000000", "r", f"{f['name'].upper()} level register."))
-            print("|{0}|{1}|{2}|{3}|{4}|".format(f"{f['name'].upper()}_THRESHOLD", hex(THRESHOLD_OFF + 0x10 * f_indx)[2:].zfill(4), "0x00000000", "w", f"{f['name'].upper()} level threshold register."))
-            print("|{0}|{1}|{2}|{3}|{4}|".format(f"{f['name'].upper()}_FLUSH", hex(FLUSH_OFF + 0x10 * f_indx)[2:].zfill(4),f"{f['name'].upper()}_FLUSH", "0x00000000", "w", f"{f['name'].upper()} flush register."))
+            emit("|{0}|{1}|{2}|{3}|{4}|".format(f"{f['name'].upper()}_LEVEL", hex(LEVEL_OFF + 0x10 * f_indx)[2:].zfill(4), "0x00000000", "r", f"{f['name'].upper()} level register."))
+            emit("|{0}|{1}|{2}|{3}|{4}|".format(f"{f['name'].upper()}_THRESHOLD", hex(THRESHOLD_OFF + 0x10 * f_indx)[2:].zfill(4), "0x00000000", "w", f"{f['name'].upper()} level threshold register."))
+            emit("|{0}|{1}|{2}|{3}|{4}|".format(f"{f['name'].upper()}_FLUSH", hex(FLUSH_OFF + 0x10 * f_indx)[2:].zfill(4),f"{f['name'].upper()}_FLUSH", "0x00000000", "w", f"{f['name'].upper()} flush register."))
             f_indx = f_indx + 1
     """
-    if "flags" in IP:
-        print("|{0}|{1}|{2}|{3}|{4}|".format("IM", hex(IM_OFF)[2:].zfill(4), "0x00000000", "w", "Interrupt Mask Register; write 1/0 to enable/disable interrupts; check the interrupt flags table for more details"))
-        print("|{0}|{1}|{2}|{3}|{4}|".format("RIS", hex(RIS_OFF)[2:].zfill(4), "0x00000000", "w", "Raw Interrupt Status; reflects the current interrupts status;check the interrupt flags table for more details"))
-        print("|{0}|{1}|{2}|{3}|{4}|".format("MIS", hex(MIS_OFF)[2:].zfill(4), "0x00000000", "w", "Masked Interrupt Status; On a read, this register gives the current masked status value of the corresponding interrupt. A write has no effect; check the interrupt flags table for more details"))
-        print("|{0}|{1}|{2}|{3}|{4}|".format("IC", hex(IC_OFF)[2:].zfill(4), "0x00000000", "w", "Interrupt Clear Register; On a write of 1, the corresponding interrupt (both raw interrupt and masked interrupt, if enabled) is cleared; check the interrupt flags table for more details"))
+    if MODEL.flags:
+        emit("|{0}|{1}|{2}|{3}|{4}|".format("IM", hex(IM_OFF)[2:].zfill(4), "0x00000000", "w", "Interrupt Mask Register; write 1/0 to enable/disable interrupts; check the interrupt flags table for more details"))
+        emit("|{0}|{1}|{2}|{3}|{4}|".format("RIS", hex(RIS_OFF)[2:].zfill(4), "0x00000000", "w", "Raw Interrupt Status; reflects the current interrupts status;check the interrupt flags table for more details"))
+        emit("|{0}|{1}|{2}|{3}|{4}|".format("MIS", hex(MIS_OFF)[2:].zfill(4), "0x00000000", "w", "Masked Interrupt Status; On a read, this register gives the current masked status value of the corresponding interrupt. A write has no effect; check the interrupt flags table for more details"))
+        emit("|{0}|{1}|{2}|{3}|{4}|".format("IC", hex(IC_OFF)[2:].zfill(4), "0x00000000", "w", "Interrupt Clear Register; On a write of 1, the corresponding interrupt (both raw interrupt and masked interrupt, if enabled) is cleared; check the interrupt flags table for more details"))
  
-    if IP['clock']['gated']=='yes':
-        print("|{0}|{1}|{2}|{3}|{4}|".format("GCLK", hex(CLK_GATE_OFF)[2:].zfill(4), "0x00000000", "w", "Gated clock enable; 1: enable clock, 0: disable clock"))
-
-
-    if "registers" in IP:
-        for r in IP["registers"]:
-            print(f"\n### {r['name']} Register [Offset: {hex(r['offset'])}, mode: {r['mode']}]")
-            print(f"\n{r['description']}")
-            print_reg_bf(r)
-            if "fields" in r:
-                print("\n|bit|field name|width|description|")
-                print("|---|---|---|---|")
-                for f in r["fields"]:
-                    if isinstance(f["bit_width"], int):
-                        width = int(f["bit_width"])
-                    else:
-                        width = get_param_default(f["bit_width"])
-                    print("|{0}|{1}|{2}|{3}|".format(f["bit_offset"], f["name"], width, f["description"]))
+    if MODEL.clock_gated:
+        emit("|{0}|{1}|{2}|{3}|{4}|".format("GCLK", hex(CLK_GATE_OFF)[2:].zfill(4), "0x00000000", "w", "Gated clock enable; 1: enable clock, 0: disable clock"))
+
+
+    for r in MODEL.registers:
+        emit(f"\n### {r.name} Register [Offset: {hex(r.offset)}, mode: {r.mode}]")
+        emit(f"\n{get_md_description(r)}")
+        print_reg_bf(r)
+        if r.fields:
+            emit("\n|bit|field name|width|description|")
+            emit("|---|---|---|---|")
+            for f in r.fields:
+                emit("|{0}|{1}|{2}|{3}|".format(f.bit_offset, f.name, f.bits, f.description))
     
-    if IP['clock']['gated']=='yes':
-        print(f"\n### GCLK Register [Offset: {hex(CLK_GATE_OFF)}, mode: w]")
-        print(f"\n Gated clock enable register")
-        print("<img src=\"https://svg.wavedrom.com/{reg:[", end="")
+    if MODEL.clock_gated:
+        emit(f"\n### GCLK Register [Offset: {hex(CLK_GATE_OFF)}, mode: w]")
+        emit(f"\n Gated clock enable register")
+        emit("<img src=\"https://svg.wavedrom.com/{reg:[", end="")
         size = 1    
-        print(f"{{name:'gclk_enable', bits:{size}}},", end="")
-        print(f"{{bits: {32-size}}}" , end="")
-        print("], config: {lanes: 2, hflip: true}} \"/>")
-        print("\n|bit|field name|width|description|")
-        print("|---|---|---|---|")
-        print("|{0}|{1}|{2}|{3}|".format("0", "gclk_enable", "1", "Gated clock enable; 1: enable clock, 0: disable clock"))
-    print()
+        emit(f"{{name:'gclk_enable', bits:{size}}},", end="")
+        emit(f"{{bits: {32-size}}}" , end="")
+        emit("], config: {lanes: 2, hflip: true}} \"/>")
+        emit("\n|bit|field name|width|description|")
+        emit("|---|---|---|---|")
+        emit("|{0}|{1}|{2}|{3}|".format("0", "gclk_enable", "1", "Gated clock enable; 1: enable clock, 0: disable clock"))
+    emit()
 
     """"    
     if "fifos" in IP:
@@ -1162,7 +1647,7 @@ def print_md_tables():
         fields = [{'name':"", 'bit_offset':0, 'description':"", 'bit_width':0}]
         fifo_reg = {"name":"", "size":0, "fields":fields}
         for f in IP["fifos"]:
-            print(f"\n### {f['name'].upper()}_LEVEL Register [Offset: {hex(LEVEL_OFF + + 0x10 * f_indx)}, mode: r]")
+            emit(f"\n### {f['name'].upper()}_LEVEL Register [Offset: {hex(LEVEL_OFF + + 0x10 * f_indx)}, mode: r]")
             fifo_reg['name'] = "{f['name'].upper()}_LEVEL}"
             fifo_reg['size'] = f['address_width']
             fields[0]['name'] = "level"
@@ -1171,14 +1656,14 @@ def print_md_tables():
             fields[0]['description'] = "FIFO data level"
             fifo_reg['fields'] = fields
             print_reg_bf(fifo_reg)
-            print(f"\n### {f['name'].upper()}_THRESHOLD Register [Offset: {hex(THRESHOLD_OFF + + 0x10 * f_indx)}, mode: w]")
+            emit(f"\n### {f['name'].upper()}_THRESHOLD Register [Offset: {hex(THRESHOLD_OFF + + 0x10 * f_indx)}, mode: w]")
             fifo_reg['name'] = "{f['name'].upper()}_THRESHOLD}"
             fifo_reg['size'] = 1
             fields[0]['bit_width'] = 1
             fields[0]['description'] = "FIFO level threshold value"
             fifo_reg['fields'] = fields
             print_reg_bf(fifo_reg)
-            print(f"\n### {f['name'].upper()}_FLUSH Register [Offset: {hex(FLUSH_OFF + + 0x10 * f_indx)}, mode: w]")
+            emit(f"\n### {f['name'].upper()}_FLUSH Register [Offset: {hex(FLUSH_OFF + + 0x10 * f_indx)}, mode: w]")
             fifo_reg['name'] = "{f['name'].upper()}_FLUSH}"
             fifo_reg['size'] = 1
             fields[0]['bit_width'] = 1
@@ -1187,126 +1672,129 @@ def print_md_tables():
             print_reg_bf(fifo_reg)
             f_indx = f_indx + 1
     """
-    if "flags" in IP:
-        c = 0;
-        print("\n### Interrupt Flags\n")
-        print("The wrapped IP provides four registers to deal with interrupts: IM, RIS, MIS and IC. These registers exist for all wrapper types.\n\nEach register has a group of bits for the interrupt sources/flags.")
-        print(f"- `IM` [offset: ``{hex(IM_OFF)}``]: is used to enable/disable interrupt sources.\n")
-        print(f"- `RIS` [offset: ``{hex(RIS_OFF)}``]: has the current interrupt status (interrupt flags) whether they are enabled or disabled.\n")
-        print(f"- `MIS` [offset: ``{hex(MIS_OFF)}``]: is the result of masking (ANDing) RIS by IM.\n")
-        print(f"- `IC` [offset: ``{hex(IC_OFF)}``]: is used to clear an interrupt flag.\n")
-        print("\nThe following are the bit definitions for the interrupt registers:\n")
-        print("|Bit|Flag|Width|Description|")
-        print("|---|---|---|---|")
-        for flag in IP["flags"]:
-            width = get_port_width(flag["port"])
-            if isinstance(width, int):
-                w = width
-            else:
-                w = get_param_default(width)
-            print(f"|{c}|{flag['name'].upper()}|{w}|{flag['description']}|")
-            c += w
-
-    if IP['clock']['gated']=='yes': 
-        print("### Clock Gating")
-        print("The IP includes a clock gating feature that allows selective activation and deactivation of the clock using the ``GCLK`` register. This capability is implemented through the ``ef_util_gating_cell`` module, which is part of the common modules library, [ef_util_lib.v](https://github.com/efabless/EF_IP_UTIL/blob/main/hdl/ef_util_lib.v). By default, the clock gating is disabled. To enable behavioral implmentation clock gating, only for simulation purposes, you should define the ``CLKG_GENERIC`` macro. Alternatively, define the ``CLKG_SKY130_HD`` macro if you wish to use the SKY130 HD library clock gating cell, ``sky130_fd_sc_hd__dlclkp_4``.")
-        print("")
-        print("**Note:** If you choose the [OpenLane2](https://github.com/efabless/openlane2) flow for implementation and would like to enable the clock gating feature, you need to add ``CLKG_SKY130_HD`` macro to the ``VERILOG_DEFINES`` configuration variable. Update OpenLane2 YAML configuration file as follows: ")
-        print("```")
-        print("VERILOG_DEFINES:") 
-        print("- CLKG_SKY130_HD")
-        print("```")
+    if MODEL.flags:
+        emit("\n### Interrupt Flags\n")
+        emit("The wrapped IP provides four registers to deal with interrupts: IM, RIS, MIS and IC. These registers exist for all wrapper types.\n\nEach register has a group of bits for the interrupt sources/flags.")
+        emit(f"- `IM` [offset: ``{hex(IM_OFF)}``]: is used to enable/disable interrupt sources.\n")
+        emit(f"- `RIS` [offset: ``{hex(RIS_OFF)}``]: has the current interrupt status (interrupt flags) whether they are enabled or disabled.\n")
+        emit(f"- `MIS` [offset: ``{hex(MIS_OFF)}``]: is the result of masking (ANDing) RIS by IM.\n")
+        emit(f"- `IC` [offset: ``{hex(IC_OFF)}``]: is used to clear an interrupt flag.\n")
+        emit("\nThe following are the bit definitions for the interrupt registers:\n")
+        emit("|Bit|Flag|Width|Description|")
+        emit("|---|---|---|---|")
+        for flag in MODEL.flags:
+            emit(f"|{flag.pos}|{flag.name.upper()}|{flag.bits}|{flag.description}|")
+
+    if MODEL.clock_gated: 
+        emit("### Clock Gating")
+        emit("The IP includes a clock gating feature that allows selective activation and deactivation of the clock using the ``GCLK`` register. This capability is implemented through the ``ef_util_gating_cell`` module, which is part of the common modules library, [ef_util_lib.v](https://github.com/efabless/EF_IP_UTIL/blob/main/hdl/ef_util_lib.v). By default, the clock gating is disabled. To enable behavioral implmentation clock gating, only for simulation purposes, you should define the ``CLKG_GENERIC`` macro. Alternatively, define the ``CLKG_SKY130_HD`` macro if you wish to use the SKY130 HD library clock gating cell, ``sky130_fd_sc_hd__dlclkp_4``.")
+        emit("")
+        emit("**Note:** If you choose the [OpenLane2](https://github.com/efabless/openlane2) flow for implementation and would like to enable the clock gating feature, you need to add ``CLKG_SKY130_HD`` macro to the ``VERILOG_DEFINES`` configuration variable. Update OpenLane2 YAML configuration file as follows: ")
+        emit("```")
+        emit("VERILOG_DEFINES:") 
+        emit("- CLKG_SKY130_HD")
+        emit("```")
 
     
 
-    # if "firmware_guidelines" in IP['info']:
-    #     print ("## F/W Usage Guidelines:")
-    #     print (IP['info']['firmware_guidelines'])
-
-    # print("## Drivers Documentation:")
-    # print(f"Driver documentation for {IP['info']['name']} is available [here](https://github.com/efabless/{IP['info']['name']}/blob/main/fw/README.md).")
-    # print(f"You can also find a C example application using {IP['info']['name']} drivers [here]().")
-    ip_name = IP["info"]["name"].lstrip("EF_")
-    print("## Firmware Drivers:")
-    print(f'Firmware drivers for {IP["info"]["name"]} can be found in the [Drivers](https://github.com/efabless/EFIS/tree/main/Drivers) directory in the [EFIS](https://github.com/efabless/EFIS) (Efabless Firmware Interface Standard) repo. {IP["info"]["name"]} driver documentation  is available [here](https://github.com/efabless/EFIS/blob/main/Drivers/Docs/{IP["info"]["name"]}/README.md).')
-    print(f'You can also find an example C application using the {IP["info"]["name"]} drivers [here](https://github.com/efabless/EFIS/tree/main/Drivers/Docs/{IP["info"]["name"]}/example).')
-
-    print("## Installation:")
-    print("You can install the IP either by cloning this repository or by using [IPM](https://github.com/efabless/IPM).")
-    print("### 1. Using [IPM](https://github.com/efabless/IPM):")
-    print("- [Optional] If you do not have IPM installed, follow the installation guide [here](https://github.com/efabless/IPM/blob/main/README.md)")
-    print(f'- After installing IPM, execute the following command ```ipm install {IP["info"]["name"]}```.')
-    print("> **Note:** This method is recommended as it automatically installs [EF_IP_UTIL](https://github.com/efabless/EF_IP_UTIL.git) as a dependency.")
-    print("### 2. Cloning this repo: ")
-    print("- Clone [EF_IP_UTIL](https://github.com/efabless/EF_IP_UTIL.git) repository, which includes the required modules from the common modules library, [ef_util_lib.v](https://github.com/efabless/EF_IP_UTIL/blob/main/hdl/ef_util_lib.v).")
-    print("```git clone https://github.com/efabless/EF_IP_UTIL.git```")
-    print("- Clone the IP repository")
-    print(f"```git clone {IP['info']['repo']}```")
+    # if "firmware_guidelines" in MODEL.info:
+    #     emit("## F/W Usage Guidelines:")
+    #     emit(MODEL.info['firmware_guidelines'])
+
+    # emit("## Drivers Documentation:")
+    # emit(f"Driver documentation for {MODEL.name} is available [here](https://github.com/efabless/{MODEL.name}/blob/main/fw/README.md).")
+    # emit(f"You can also find a C example application using {MODEL.name} drivers [here]().")
+    ip_name = MODEL.name.lstrip("EF_")
+    emit("## Firmware Drivers:")
+    emit(f'Firmware drivers for {MODEL.name} can be found in the [Drivers](https://github.com/efabless/EFIS/tree/main/Drivers) directory in the [EFIS](https://github.com/efabless/EFIS) (Efabless Firmware Interface Standard) repo. {MODEL.name} driver documentation  is available [here](https://github.com/efabless/EFIS/blob/main/Drivers/Docs/{MODEL.name}/README.md).')
+    emit(f'You can also find an example C application using the {MODEL.name} drivers [here](https://github.com/efabless/EFIS/tree/main/Drivers/Docs/{MODEL.name}/example).')
+
+    emit("## Installation:")
+    emit("You can install the IP either by cloning this repository or by using [IPM](https://github.com/efabless/IPM).")
+    emit("### 1. Using [IPM](https://github.com/efabless/IPM):")
+    emit("- [Optional] If you do not have IPM installed, follow the installation guide [here](https://github.com/efabless/IPM/blob/main/README.md)")
+    emit(f'- After installing IPM, execute the following command ```ipm install {MODEL.name}```.')
+    emit("> **Note:** This method is recommended as it automatically installs [EF_IP_UTIL](https://github.com/efabless/EF_IP_UTIL.git) as a dependency.")
+    emit("### 2. Cloning this repo: ")
+    emit("- Clone [EF_IP_UTIL](https://github.com/efabless/EF_IP_UTIL.git) repository, which includes the required modules from the common modules library, [ef_util_lib.v](https://github.com/efabless/EF_IP_UTIL/blob/main/hdl/ef_util_lib.v).")
+    emit("```git clone https://github.com/efabless/EF_IP_UTIL.git```")
+    emit("- Clone the IP repository")
+    emit(f"```git clone {MODEL.info['repo']}```")
     
-    print("\n### The Wrapped IP Interface \n")
-    print(">**_NOTE:_** This section is intended for advanced users who wish to gain more information about the interface of the wrapped IP, in case they want to create their own wrappers.")
-    print("")
-    print(f'<img src="docs/_static/{IP["info"]["name"]}.svg" width="600"/>')
-
-    if "parameters" in IP:
-        print("\n#### Module Parameters \n")
-        print("|Parameter|Description|Default Value|")
-        print("|---|---|---|")      
-        for parameter in IP["parameters"]:
-            print(f"|{parameter['name']}|{parameter['description']}|{parameter['default']}|")
-
-    if "ports" or "external_interface" in IP:
-        print("\n#### Ports \n")
-        print("|Port|Direction|Width|Description|")
-        print("|---|---|---|---|")
-        if "external_interface" in IP:
-            for port in IP["external_interface"]:
-                print(f"|{port['name']}|{port['direction']}|{port['width']}|{port['description']}|")      
-        if "ports" in IP:
-            for port in IP["ports"]:
-                print(f"|{port['name']}|{port['direction']}|{port['width']}|{port['description']}|")
-
-    print ("## Run cocotb UVM Testbench:")
-    print ("In IP directory run:")
-    print (" ```shell")
-    print (" cd verify/uvm-python/")
-    print (" ```")
-    print (" ##### To run testbench for design with certain bus type ")
-    print (" To run all tests:")
-    print (" ```shell")
-    print (" make run_all_tests BUS_TYPE=<bus_type>")                    
-    print (" ```")
-    print (" To run a certain test:")
-    print (" ```shell")
-    print (" make run_<test_name> BUS_TYPE=<bus_type>")
-    print (" ```")
-    print (" To run all tests with a tag: ")
-    print (" ```shell")
-    print (" make run_all_tests TAG=<new_tag> BUS_TYPE=<bus_type>")
-    print (" ```")
+    emit("\n### The Wrapped IP Interface \n")
+    emit(">**_NOTE:_** This section is intended for advanced users who wish to gain more information about the interface of the wrapped IP, in case they want to create their own wrappers.")
+    emit("")
+    emit(f'<img src="docs/_static/{MODEL.name}.svg" width="600"/>')
+
+    if MODEL.parameters:
+        emit("\n#### Module Parameters \n")
+        emit("|Parameter|Description|Default Value|")
+        emit("|---|---|---|")      
+        for parameter in MODEL.parameters:
+            emit(f"|{parameter.name}|{parameter.description}|{parameter.default}|")
+
+    emit("\n#### Ports \n")
+    emit("|Port|Direction|Width|Description|")
+    emit("|---|---|---|---|")
+    for port in MODEL.external_interface + MODEL.ports:
+        emit(f"|{port.name}|{port.direction}|{port.width}|{port.description}|")
+
+
+    emit("## Run cocotb UVM Testbench:")
+    emit("In IP directory run:")
+    emit(" ```shell")
+    emit(" cd verify/uvm-python/")
+    emit(" ```")
+    emit(" ##### To run testbench for design with certain bus type ")
+    emit(" To run all tests:")
+    emit(" ```shell")
+    emit(" make run_all_tests BUS_TYPE=<bus_type>")                    
+    emit(" ```")
+    emit(" To run a certain test:")
+    emit(" ```shell")
+    emit(" make run_<test_name> BUS_TYPE=<bus_type>")
+    emit(" ```")
+    emit(" To run all tests with a tag: ")
+    emit(" ```shell")
+    emit(" make run_all_tests TAG=<new_tag> BUS_TYPE=<bus_type>")
+    emit(" ```")
     
-    if "References" in IP['info']:
-        print("# References:\n")
-        print(IP['info']['References'])
+    if "References" in MODEL.info:
+        emit("# References:\n")
+        emit(MODEL.info['References'])
           
       
 def print_help():
-   print(f"Usage: {sys.argv[0]} ip.yml|ip.json -apb|-ahbl|-wb -tb|-ch|-md")
+   print(f"Usage: {sys.argv[0]} ip.yml|ip.json -apb|-ahbl|-wb|-axil -tb|-ch|-md")
+   print(f"       {sys.argv[0]} ip.yml|ip.json --targets target[,target...] [-o out_dir]")
    print("Options:")
    print("\t-apb : generate APB wrapper")
    print("\t-ahbl: generate AHBL wrapper")
+   print("\t-axil: generate AXI4-Lite wrapper")
    print("\t-tb  : generate a Verilog testbench for the generated bus wrapper")
    print("\t-ch  : generate a C header file containing the register definitions")
    print("\t-dft  : generate wrapper for dft")
+   print("\t--targets: generate several targets in one run; any of")
+   print(f"\t\t{','.join(TARGETS)},tb")
+   print("\t-o, --out-dir: the output directory used with --targets (default: .)")
+   print(f"\t--no-cache: regenerate all targets; by default, unchanged targets are skipped using {CACHE_FILE}")
+   print("\t--model-cache: a directory where the loaded IP model is cached to skip parsing unchanged IP files")
+   print("\t--check: only validate the IP description")
+   print("\t--watch: with --targets, keep running and regenerate the targets affected by changes to the IP description or the includes/ headers")
+   print("\t--profile: write the wall time and the allocated memory blocks of every generation phase to this file")
+   print("\t--profile-format: the format of --profile: json or trace (Chrome trace events) (default: json)")
+   print("\t--cprofile: write cProfile statistics of the run to this file (see the pstats module)")
+   print("\t--serve: run as a JSON-RPC server over stdin/stdout; no IP description file is given")
+   print("\t--socket: with --serve, listen on this Unix socket instead of stdin/stdout")
    print("Arguments:")
    print("\tip.yml: A YAML file that contains the IP definition")
 
 
 def exit_with_message(msg):
-   print(msg)
-   sys.exit(f"Usage: {sys.argv[0]} ip.yml|ip.json -apb|-ahbl|-wb -tb|-ch|-md")   
+   sys.exit(f"{msg}\nUsage: {sys.argv[0]} ip.yml|ip.json -apb|-ahbl|-wb|-axil -tb|-ch|-md")   
 
 def process_fifos():
+    import copy
     level_fields = [{'name':"level", 'bit_offset':0, 'description':"FIFO Level", 'bit_width':0, 'bit_access':"no"}]
     fifo_level_reg = {"name":"level", "size":0, 'description': "", 'fifo':"no", 'read_port':"", 'fields':level_fields}
 
@@ -1365,74 +1853,721 @@ def process_fifos():
             x = dict()
             x = copy.deepcopy(fifo_flush_reg)
             IP['registers'].append(x)
+
+            if f.get('packed') == True:
+                # The number of entries written or read through the packed data register;
+                # the model rejects the widths other than 8 and 16
+                count_bits = (32 // f['width']).bit_length() if f.get('width') in (8, 16) else 3
+                if f['type'] == "write":
+                    pcount_field = {'name':"pcount", 'bit_offset':0, 'bit_width':count_bits, 'write_port':f"{f['name'].upper()}_PLEN",
+                                    'description':"Number of entries pushed by a write of the data register"}
+                else:
+                    pcount_field = {'name':"pcount", 'bit_offset':0, 'bit_width':count_bits, 'read_port':f"{f['name'].upper()}_PVALID",
+                                    'description':"Number of entries popped by the last read of the data register"}
+                IP['registers'].append({'name':f"{f['name'].upper()}_PCOUNT", 'size':count_bits, 'fifo':"no",
+                                        'mode':"w" if f['type'] == "write" else "r",
+                                        'offset':PCOUNT_OFF + 0x10 * f_indx,
+                                        'description':f"{f['name'].upper()} Packed Entry Count Register",
+                                        'fields':[pcount_field]})
             
             #print(fifo_flush_reg['offset'])
 
             f_indx = f_indx + 1
 
+# Targets accepted by --targets: name -> (kind, bus type, dft)
+TARGETS = {
+    "apb":      ("wrapper", "APB",  False),
+    "ahbl":     ("wrapper", "AHBL", False),
+    "wb":       ("wrapper", "WB",   False),
+    "apb-dft":  ("wrapper", "APB",  True),
+    "ahbl-dft": ("wrapper", "AHBL", True),
+    "wb-dft":   ("wrapper", "WB",   True),
+    "apb-tb":   ("tb",      "APB",  False),
+    "ahbl-tb":  ("tb",      "AHBL", False),
+    "wb-tb":    ("tb",      "WB",   False),
+    "axil":     ("wrapper", "AXIL", False),
+    "axil-dft": ("wrapper", "AXIL", True),
+    "axil-tb":  ("tb",      "AXIL", False),
+    "ch":       ("ch",      None,   False),
+    "md":       ("md",      None,   False),
+}
+
+def get_opt_value(argv, name):
+    """
+    Remove the option `name` and its value from argv; both `name value` and
+    `name=value` forms are accepted.
+
+    Returns:
+        str: The option value or None if the option is not present.
+    """
+    for i, a in enumerate(argv):
+        if a == name:
+            if i + 1 >= len(argv):
+                exit_with_message(f"Option {name} requires a value.")
+            value = argv[i + 1]
+            del argv[i:i + 2]
+            return value
+        if a.startswith(name + "="):
+            del argv[i]
+            return a.split("=", 1)[1]
+    return None
+
+def parse_targets(targets):
+    """
+    Expand a comma separated list of targets (see TARGETS) into a list of
+    target names. The "tb" shorthand expands into a testbench for every bus
+    type in the list (or for all bus types if none is listed).
+    """
+    names = [t.strip().lower() for t in targets.split(",") if t.strip()]
+    expanded = []
+    for t in names:
+        if t == "tb":
+            buses = [TARGETS[n][1] for n in names if n in TARGETS and TARGETS[n][0] == "wrapper"]
+            if not buses:
+                buses = ["APB", "AHBL", "WB", "AXIL"]
+            for b in buses:
+                tb = f"{b.lower()}-tb"
+                if tb not in expanded:
+                    expanded.append(tb)
+        elif t not in TARGETS:
+            exit_with_message(f"Unknown target '{t}'; valid targets are: {', '.join(TARGETS)}, tb")
+        elif t not in expanded:
+            expanded.append(t)
+    return expanded
+
+def get_target_path(target):
+    """
+    Get the output file of a target relative to the output directory. The
+    layout follows the IP repositories: bus wrappers under hdl/rtl/bus_wrappers,
+    the C header under fw and the documentation in README.md.
+    """
+    kind, bus_type, is_dft = TARGETS[target]
+    name = IP['info']['name']
+    if kind == "wrapper":
+        if is_dft:
+            return os.path.join("hdl", "rtl", "bus_wrappers", "dft", f"{name}_{bus_type}_DFT.dev.v")
+        return os.path.join("hdl", "rtl", "bus_wrappers", f"{name}_{bus_type}.dev.v")
+    elif kind == "tb":
+        return os.path.join("verify", f"{name}_{bus_type}_tb.v")
+    elif kind == "ch":
+        return os.path.join("fw", f"{name}_regs.h")
+    return "README.md"
+
+def generate(target):
+    """
+    Generate a target for the loaded IP.
+
+    Returns:
+        str: The generated file content.
+    """
+    global OUT, BUS
+    from bus_profiles import BUS_PROFILES, PIPELINED_PROFILES
+
+    kind, bus_type, is_dft = TARGETS[target]
+    BUS = BUS_PROFILES.get(bus_type)
+    if MODEL.wb_pipelined:
+        BUS = PIPELINED_PROFILES.get(bus_type, BUS)
+    OUT = io.StringIO()
+    try:
+        if kind == "wrapper":
+            print_bus_wrapper(bus_type, is_dft=is_dft)
+        elif kind == "tb":
+            print_tb(bus_type)
+        elif kind == "ch":
+            print_reg_def()
+        else:
+            print_md_tables()
+        return OUT.getvalue()
+    finally:
+        OUT = sys.stdout
+
+def get_generator_hash():
+    """
+    Get a hash of the generator version: the generator modules and the
+    Verilog macro/task headers under includes/. It is computed once per
+    process; watch() drops it when a header changes.
+    """
+    global GENERATOR_HASH
+    if GENERATOR_HASH is not None:
+        return GENERATOR_HASH
+    import glob
+    import hashlib
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    files = [os.path.join(root, "scripts", m) for m in GENERATOR_MODULES]
+    files += sorted(glob.glob(os.path.join(root, "includes", "*", "*.vh")))
+    h = hashlib.sha256()
+    for file_name in files:
+        with open(file_name, "rb") as f:
+            h.update(os.path.basename(file_name).encode())
+            h.update(f.read())
+    GENERATOR_HASH = h.hexdigest()
+    return GENERATOR_HASH
+
+def get_target_key(target, generator_hash):
+    """
+    Get the cache key of a target: a hash of the normalized IP, the target
+    and the generator version.
+    """
+    import json
+    import hashlib
+    h = hashlib.sha256()
+    h.update(json.dumps(IP, sort_keys=True, default=str).encode())
+    h.update(target.encode())
+    h.update(generator_hash.encode())
+    return h.hexdigest()
+
+def load_cache(out_dir):
+    import json
+    try:
+        with open(os.path.join(out_dir, CACHE_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(out_dir, cache):
+    import json
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, CACHE_FILE), "w") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+
+def write_target(path, content):
+    """
+    Write a generated target unless its file already has this content, so
+    that the mtime of unchanged files is preserved.
+
+    Returns:
+        bool: True if the file was written.
+    """
+    if os.path.isfile(path):
+        with open(path, "r") as f:
+            if f.read() == content:
+                return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+    return True
+
+def generate_targets(targets, out_dir, use_cache=True):
+    """
+    Generate several targets for the loaded IP in one pass and write each one
+    into its file under out_dir.
+
+    Unless use_cache is False, a target whose cache key (see get_target_key)
+    matches the one recorded in the output directory is skipped. Files whose
+    content did not change are never rewritten, so their mtime is preserved.
+
+    Returns:
+        list: The paths of the written files.
+    """
+    cache = load_cache(out_dir) if use_cache else {}
+    generator_hash = get_generator_hash() if use_cache else None
+    written = []
+    cache_updated = False
+    for t in targets:
+        rel_path = get_target_path(t)
+        path = os.path.join(out_dir, rel_path)
+        if use_cache:
+            key = get_target_key(t, generator_hash)
+            if cache.get(rel_path) == key and os.path.isfile(path):
+                continue
+        content = generate(t)
+        if use_cache:
+            cache[rel_path] = key
+            cache_updated = True
+        if profiled("write", write_target, path, content):
+            written.append(path)
+    if cache_updated:
+        save_cache(out_dir, cache)
+    return written
+
+def get_model_cache_key(file_name, data):
+    """
+    Get the model cache key of an IP file: its path, size, modification
+    time and content hash, and the generator version.
+    """
+    import hashlib
+    st = os.stat(file_name)
+    return [os.path.abspath(file_name), st.st_size, st.st_mtime_ns,
+            hashlib.sha256(data).hexdigest(), get_generator_hash()]
+
+def load_model_cache(cache_dir, key):
+    """
+    Load IP and MODEL from the model cache if the cached entry of the IP
+    file has the given key.
+
+    Returns:
+        bool: True if IP and MODEL were loaded from the cache.
+    """
+    import pickle
+    import hashlib
+    global IP, MODEL
+    name = hashlib.sha256(key[0].encode()).hexdigest() + ".pickle"
+    try:
+        with open(os.path.join(cache_dir, name), "rb") as f:
+            entry = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return False
+    if entry.get("key") != key:
+        return False
+    IP, MODEL = entry["ip"], entry["model"]
+    return True
+
+def save_model_cache(cache_dir, key):
+    import pickle
+    import hashlib
+    os.makedirs(cache_dir, exist_ok=True)
+    name = hashlib.sha256(key[0].encode()).hexdigest() + ".pickle"
+    tmp = os.path.join(cache_dir, f"{name}.{os.getpid()}")
+    with open(tmp, "wb") as f:
+        pickle.dump({"key": key, "ip": IP, "model": MODEL}, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, os.path.join(cache_dir, name))
+
+def validate_ip(file_name, data):
+    """
+    Validate the loaded IP description and exit with all the errors found,
+    one per line, prefixed by the file name and the line of the offending
+    entry.
+    """
+    from ip_validate import validate, get_lines
+    reserved = [(f"{f.get('name')} registers", FIFO_REG_OFF + 0x10 * i, 0x10) for i, f in enumerate(IP.get('fifos') or [])]
+    if IP.get('flags'):
+        reserved.append(("interrupt registers", INT_REG_OFF, 0x10))
+    reserved.append(("clock gating register", CLK_GATE_OFF, 4))
+    for r in IP.get('registers') or []:
+        if r.get('set_clr_tgl') == True and isinstance(r.get('offset'), int):
+            reserved += [(f"{r.get('name')}_{suffix} alias", base + r['offset'], 4) for suffix, base, _, _ in ALIAS_REGIONS]
+        if r.get('bit_access') == True and isinstance(r.get('offset'), int):
+            reserved.append((f"{r.get('name')}_BIT bit band", BIT_BAND_OFF + 32 * r['offset'], 128))
+
+    errors = validate(IP, reserved)
+    if not errors:
+        return
+    lines = {}
+    if ".json" not in file_name:
+        lines = get_lines(data, get_yaml_loader(), [path for path, _ in errors if path is not None])
+    messages = []
+    for path, msg in sorted(errors, key=lambda e: lines.get(e[0], 0)):
+
+        if path in lines:
+            messages.append(f"{file_name}:{lines[path]}: {msg}")
+        else:
+            messages.append(f"{file_name}: {msg}")
+    sys.exit("\n".join(messages))
+
+def read_file(file_name):
+    with open(file_name, "rb") as f:
+        return f.read()
+
+def get_yaml_loader():
+    """
+    Get the YAML loader: the libyaml parser when PyYAML is built with it.
+    """
+    import yaml
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def load_ip(file_name, model_cache=None):
+    """
+    Load the IP description file (YAML or JSON) into IP, add the FIFO
+    registers, sort the registers by offset and build MODEL. If model_cache
+    is a directory, IP and MODEL are pickled there and reused as long as the
+    file does not change.
+    """
+    global IP, MODEL
+
+    if ".yaml" not in file_name and ".yml" not in file_name and ".json" not in file_name:
+        exit_with_message("First argument must be an IP description file in YAML or JSON format.")
+
+    data = profiled("read", read_file, file_name)
+
+    if model_cache is not None:
+        key = get_model_cache_key(file_name, data)
+        if load_model_cache(model_cache, key):
+            set_reg_offsets(IP['info'])
+            return
+
+    from ip_model import IPModel
+
+    if ".json" in file_name:
+        import json
+        try:
+            IP = profiled("parse", json.loads, data)
+        except Exception:
+            raise sys.exit("Error loading the JSON file! Please check the file for syntax errors; you may use jsonlint for this.")
+    else:   
+        yaml = profiled("import", __import__, "yaml")
+        try:
+            IP = profiled("parse", yaml.load, data, Loader=get_yaml_loader())
+        except Exception:
+            raise sys.exit("Error loading the YAML file! Please check the file for syntax errors; you may use yamllint for this.")
+
+    # set the offset for the irq and fifo registers; the validation checks
+    # the register map against them
+    set_reg_offsets(IP['info'])
+    profiled("validate", validate_ip, file_name, data)
+
+    profiled("process_fifos", process_fifos)
+    profiled("sort", IP['registers'].sort, key=lambda reg: reg['offset'], reverse=False)
+    MODEL = profiled("model", IPModel, IP)
+
+    if model_cache is not None:
+        save_model_cache(model_cache, key)
+
+def set_reg_offsets(info):
+    """
+    Set the offsets of the interrupt, clock gating and FIFO registers from
+    the irq_reg_offset and fifo_reg_offset properties of the IP, or their
+    defaults when it does not have them.
+    """
+    global INT_REG_OFF, IC_OFF, RIS_OFF, IM_OFF, MIS_OFF, CLK_GATE_OFF
+    global FIFO_REG_OFF, FLUSH_OFF, THRESHOLD_OFF, LEVEL_OFF, PCOUNT_OFF
+    INT_REG_OFF     = info.get('irq_reg_offset', INT_REG_OFF_DEFAULT)
+    IC_OFF          = 0x0C + INT_REG_OFF
+    RIS_OFF         = 0x08 + INT_REG_OFF
+    IM_OFF          = 0x00 + INT_REG_OFF
+    MIS_OFF         = 0x04 + INT_REG_OFF
+    CLK_GATE_OFF    = INT_REG_OFF + 0x10
+    FIFO_REG_OFF    = info.get('fifo_reg_offset', FIFO_REG_OFF_DEFAULT)
+    FLUSH_OFF       = 0x8 + FIFO_REG_OFF
+    THRESHOLD_OFF   = 0x4 + FIFO_REG_OFF
+    LEVEL_OFF       = 0x0 + FIFO_REG_OFF
+    PCOUNT_OFF      = 0xC + FIFO_REG_OFF
+
+def strip_docs(obj):
+    """
+    Remove the description properties from (a part of) an IP description.
+    """
+    if isinstance(obj, dict):
+        return {k: strip_docs(v) for k, v in obj.items() if k != "description"}
+    if isinstance(obj, list):
+        return [strip_docs(v) for v in obj]
+    return obj
+
+def get_target_deps_hash(target):
+    """
+    Get a hash of the part of the loaded IP description a target depends
+    on. The documentation (md) depends on all of it; the other targets do
+    not use the descriptions and the documentation-only info properties.
+    """
+    import json
+    import hashlib
+    if TARGETS[target][0] == "md":
+        deps = IP
+    else:
+        deps = strip_docs({k: v for k, v in IP.items() if k != "info"})
+        deps["info"] = {k: IP['info'].get(k) for k in CODE_INFO_KEYS}
+    return hashlib.sha256(json.dumps(deps, sort_keys=True, default=str).encode()).hexdigest()
+
+def get_target_includes(target):
+    """
+    Get the names of the includes/ headers a generated target includes.
+    """
+    kind, bus_type, _ = TARGETS[target]
+    if kind == "wrapper":
+        return [f"{bus_type.lower()}_wrapper.vh"]
+    elif kind == "tb":
+        return ["tb_macros.vh", f"{bus_type.lower()}_tasks.vh"]
+    return []
+
+def get_mtimes(files):
+    mtimes = {}
+    for file_name in files:
+        try:
+            mtimes[file_name] = os.stat(file_name).st_mtime_ns
+        except OSError:
+            mtimes[file_name] = None
+    return mtimes
+
+def watch(file_name, targets, out_dir, use_cache=True):
+    """
+    Generate the targets, then poll the IP description and the includes/
+    headers and regenerate only the targets affected by a change: the ones
+    whose part of the IP description changed (see get_target_deps_hash) or
+    that include a changed header. Runs until interrupted.
+    """
+    global GENERATOR_HASH
+    import glob
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    headers = sorted(glob.glob(os.path.join(root, "includes", "*", "*.vh")))
+    mtimes = get_mtimes([file_name] + headers)
+    load_ip(file_name)
+    generate_targets(targets, out_dir, use_cache)
+    hashes = {t: get_target_deps_hash(t) for t in targets}
+    ip_ok = True
+    pending = set()
+    print(f"Watching {file_name} and {len(headers)} headers", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            new_mtimes = get_mtimes(mtimes)
+            changed = [f for f in mtimes if new_mtimes[f] != mtimes[f]]
+            if not changed:
+                continue
+            mtimes = new_mtimes
+            for f in changed:
+                if f != file_name:
+                    GENERATOR_HASH = None
+                    pending |= {t for t in targets if os.path.basename(f) in get_target_includes(t)}
+                    continue
+                try:
+                    load_ip(file_name)
+                    ip_ok = True
+                except SystemExit as e:
+                    # keep the last good hashes until the description is fixed
+                    print(e.code, file=sys.stderr)
+                    ip_ok = False
+                    continue
+                new_hashes = {t: get_target_deps_hash(t) for t in targets}
+                pending |= {t for t in targets if new_hashes[t] != hashes[t]}
+                hashes = new_hashes
+            if not ip_ok or not pending:
+                continue
+            affected = [t for t in targets if t in pending]
+            pending = set()
+            try:
+                written = generate_targets(affected, out_dir, use_cache)
+            except SystemExit as e:
+                print(e.code, file=sys.stderr)
+                continue
+            print(f"Regenerated {', '.join(affected)}; {len(written)} file(s) changed", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+
+def load_ip_warm(file_name):
+    """
+    Load an IP description for the server, reusing the model kept from an
+    earlier request as long as the file content did not change.
+
+    Returns:
+        dict: The generated targets of the IP kept by the server (target ->
+            content); empty when the IP was (re)loaded.
+    """
+    import hashlib
+    global IP, MODEL
+
+    path = os.path.abspath(file_name)
+    with open(file_name, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    entry = SERVE_MODELS.get(path)
+    if entry is None or entry[0] != digest:
+        load_ip(file_name)
+        entry = (digest, IP, MODEL, {})
+        SERVE_MODELS[path] = entry
+    else:
+        IP, MODEL = entry[1], entry[2]
+        set_reg_offsets(IP['info'])
+    return entry[3]
+
+def rpc_generate(params):
+    outputs = load_ip_warm(params["file"])
+    target = params["target"]
+    if target not in TARGETS:
+        sys.exit(f"Unknown target '{target}'; valid targets are: {', '.join(TARGETS)}")
+    if target not in outputs:
+        outputs[target] = generate(target)
+    return {"content": outputs[target]}
+
+def rpc_generate_targets(params):
+    load_ip_warm(params["file"])
+    targets = params["targets"]
+    if isinstance(targets, list):
+        targets = ",".join(targets)
+    written = generate_targets(parse_targets(targets), params.get("out_dir", "."), params.get("use_cache", True))
+    return {"written": written}
+
+def rpc_check(params):
+    load_ip_warm(params["file"])
+    return {}
+
+# The methods of the JSON-RPC server: name -> handler(params)
+RPC_METHODS = {
+    "generate":         rpc_generate,
+    "generate_targets": rpc_generate_targets,
+    "check":            rpc_check,
+}
+
+def handle_rpc(line):
+    """
+    Handle a JSON-RPC 2.0 request. Generator errors (the messages the
+    command line tool exits with) are returned as errors with code -32000;
+    the server keeps running.
+
+    Returns:
+        dict: The response, or None for a notification or a shutdown
+            request; shutdown is reported with the "shutdown" key set.
+    """
+    import json
+    try:
+        request = json.loads(line)
+    except ValueError:
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}
+    if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+
+    req_id = request.get("id")
+    method = request["method"]
+    response = {"jsonrpc": "2.0", "id": req_id}
+    if method == "shutdown":
+        response["result"] = None
+        response["shutdown"] = True
+        return response
+    if method not in RPC_METHODS:
+        response["error"] = {"code": -32601, "message": f"Method not found: {method}"}
+    else:
+        try:
+            response["result"] = RPC_METHODS[method](request.get("params") or {})
+        except KeyError as e:
+            response["error"] = {"code": -32602, "message": f"Missing parameter {e}"}
+        except SystemExit as e:
+            response["error"] = {"code": -32000, "message": str(e.code)}
+        except Exception as e:
+            response["error"] = {"code": -32603, "message": f"{type(e).__name__}: {e}"}
+    if "id" not in request:
+        return None
+    return response
+
+def serve_stream(rfile, wfile):
+    """
+    Serve newline delimited JSON-RPC requests from rfile until it is closed
+    or a shutdown request is received.
+
+    Returns:
+        bool: True if a shutdown request was received.
+    """
+    import json
+    for line in rfile:
+        if not line.strip():
+            continue
+        response = handle_rpc(line)
+        if response is None:
+            continue
+        shutdown = response.pop("shutdown", False)
+        wfile.write(json.dumps(response) + "\n")
+        wfile.flush()
+        if shutdown:
+            return True
+    return False
+
+def serve(socket_path=None):
+    """
+    Run the generator as a JSON-RPC server over stdin/stdout, or over a
+    Unix socket that accepts one connection at a time.
+    """
+    if socket_path is None:
+        serve_stream(sys.stdin, sys.stdout)
+        return
+
+    import socket
+    import stat
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        mode = None
+    if mode is not None:
+        # only replace a stale socket, never a file given by mistake
+        if not stat.S_ISSOCK(mode):
+            exit_with_message(f"{socket_path} exists and is not a socket!")
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn, conn.makefile("r") as rfile, conn.makefile("w") as wfile:
+                if serve_stream(rfile, wfile):
+                    break
+    finally:
+        server.close()
+        os.unlink(socket_path)
+
 def main():
-    global IP
+    argv = sys.argv[1:]
+    profile = get_opt_value(argv, "--profile")
+    profile_format = get_opt_value(argv, "--profile-format") or "json"
+    cprofile = get_opt_value(argv, "--cprofile")
+    if profile_format not in ("json", "trace"):
+        exit_with_message(f"Unknown profile format '{profile_format}'; valid formats are: json, trace")
+
+    if profile is not None:
+        enable_profiling()
+    try:
+        if cprofile is not None:
+            import cProfile
+            cProfile.runctx("run(argv)", globals(), {"argv": argv}, cprofile)
+        else:
+            run(argv)
+    finally:
+        if profile is not None:
+            save_profile(profile, profile_format)
+
+def run(argv):
+    targets = get_opt_value(argv, "--targets")
+
+    out_dir = get_opt_value(argv, "--out-dir")
+    if out_dir is None:
+        out_dir = get_opt_value(argv, "-o")
+    use_cache = "--no-cache" not in argv
+    model_cache = get_opt_value(argv, "--model-cache")
+    socket_path = get_opt_value(argv, "--socket")
 
-    opts = [opt for opt in sys.argv[1:] if opt.startswith("-")]
-    args = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+    opts = [opt for opt in argv if opt.startswith("-")]
+    args = [arg for arg in argv if not arg.startswith("-")]
 
     if "--help" in opts:
         print_help()
         sys.exit(0)
 
+    if "--serve" in opts:
+        serve(socket_path)
+        return
+
+    if len(args) == 0:
+        exit_with_message("You must specify an IP description file.")
+
+    if "--check" in opts:
+        load_ip(args[0], model_cache)
+        return
+
+
+    if "--watch" in opts:
+        if targets is None:
+            exit_with_message("The --watch option requires --targets.")
+        watch(args[0], parse_targets(targets), out_dir if out_dir is not None else ".", use_cache)
+        return
+
+    if targets is not None:
+        targets = parse_targets(targets)
+
+        load_ip(args[0], model_cache)
+        generate_targets(targets, out_dir if out_dir is not None else ".", use_cache)
+        return
+
     if "-apb" in opts:
         bus_type = "APB"
     elif "-ahbl" in opts:   
         bus_type = "AHBL"
     elif "-wb" in opts:   
         bus_type = "WB"
+    elif "-axil" in opts:
+        bus_type = "AXIL"
     else:
         if  "-md" not in opts and "-ch" not in opts:
-            exit_with_message("You must specify a bus type using -wb, -apb or -ahbl option.")
+            exit_with_message("You must specify a bus type using -wb, -apb, -ahbl or -axil option.")
 
-    if ".yaml" not in args[0] and ".yml" not in args[0] and ".json" not in args[0]:
-        exit_with_message("First argument must be an IP description file in YAML or JSON format.")
-    
-    if ".json" in args[0]:
-        with open(args[0], "r") as jfile:
-            try:
-                IP = json.load(jfile)
-            except Exception:
-                raise sys.exit("Error loading the JSON file! Please check the file for syntax errors; you may use jsonlint for this.")
-    else:   
-        with open(args[0], "r") as stream:
-            try:
-                IP=yaml.safe_load(stream)
-            except Exception:
-                raise sys.exit("Error loading the YAML file! Please check the file for syntax errors; you may use yamllint for this.")
-
-    # set the offset for the irq and fifo registers
-    if "irq_reg_offset" in IP['info']:
-        INT_REG_OFF = IP['info']['irq_reg_offset']
-        IC_OFF          = 0x0C + INT_REG_OFF
-        RIS_OFF         = 0x08 + INT_REG_OFF
-        IM_OFF          = 0x00 + INT_REG_OFF
-        MIS_OFF         = 0x04 + INT_REG_OFF
-    if "fifo_reg_offset" in IP['info']:
-        FIFO_REG_OFF = IP['info']['fifo_reg_offset']
-        FLUSH_OFF       = 0x8 + FIFO_REG_OFF
-        THRESHOLD_OFF   = 0x4 + FIFO_REG_OFF
-        LEVEL_OFF       = 0x0 + FIFO_REG_OFF    
-
-    process_fifos()
-    IP['registers'].sort(key=lambda reg: reg['offset'], reverse=False)
-    
-    #orig_list.sort(key=lmbda x: x.count, reverse=false)
+    load_ip(args[0], model_cache)
 
     if "-tb" in opts:
-        print_tb(bus_type)
+
+        target = f"{bus_type.lower()}-tb"
     elif "-ch" in opts:
-        print_reg_def()
+        target = "ch"
     elif "-md" in opts:
-        print_md_tables()
-        #print_bf()
+        target = "md"
+    elif "-dft" in opts:
+        target = f"{bus_type.lower()}-dft"
     else:
-        print_bus_wrapper(bus_type, is_dft="-dft" in opts)
+        target = bus_type.lower()
+    sys.stdout.write(generate(target))
   
 if __name__ == '__main__':
     main()
@@ -0,0 +1,277 @@
+"""
+	Copyright 2024 Efabless Corp.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at:
+
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+"""
+   The normalized model of an IP description used by the generators.
+   It is built once from the loaded YAML/JSON dictionary (after the FIFO
+   registers are added) with parameter widths resolved and the field
+   masks precomputed, so the emitters do not probe the raw dictionary.
+"""
+
+import sys
+
+# The read data multiplexer styles accepted by the read_mux property
+READ_MUX_STYLES = ["chain", "onehot", "case"]
+
+
+class Parameter:
+    __slots__ = ("name", "default", "description")
+
+    def __init__(self, p):
+        self.name = p['name']
+        self.default = p['default']
+        self.description = p.get('description', "")
+
+
+class Port:
+    """
+    An IP port or an external interface. `width` is the width as written in
+    the description (a number or a parameter name) and `bits` is the number
+    of bits after resolving parameters. `port` and `sync` are only used by
+    external interfaces.
+    """
+    __slots__ = ("name", "width", "bits", "direction", "description", "port", "sync")
+
+    def __init__(self, p, model):
+        self.name = p['name']
+        self.width = p['width']
+        self.bits = model.resolve(p['width'], f"port '{p['name']}'")
+        self.direction = p['direction']
+        self.description = p.get('description', "")
+        self.port = p.get('port')
+        self.sync = p.get('sync') == True
+
+
+class Field:
+    """
+    A register field. `msb` is the Verilog expression of the most
+    significant bit and `mask` is the field mask within the register.
+    """
+    __slots__ = ("name", "bit_offset", "bit_width", "bits", "msb", "mask",
+                 "write_port", "read_port", "auto_clear", "description")
+
+    def __init__(self, f, model):
+        self.name = f['name']
+        self.bit_offset = f['bit_offset']
+        self.bit_width = f['bit_width']
+        self.bits = model.resolve(f['bit_width'], f"field '{f['name']}'")
+        if isinstance(f['bit_width'], int):
+            self.msb = f['bit_width'] + f['bit_offset'] - 1
+        elif f['bit_offset'] == 0:
+            self.msb = f"({f['bit_width']} - 1)"
+        else:
+            self.msb = f"({f['bit_width']} + {f['bit_offset'] - 1})"
+        self.mask = (2**self.bits - 1) << self.bit_offset
+        self.write_port = f.get('write_port')
+        self.read_port = f.get('read_port')
+        self.auto_clear = f.get('auto_clear') == True
+        self.description = f.get('description', "")
+
+
+class Register:
+    """
+    A register. `size` is the size as written in the description and `bits`
+    is the number of bits after resolving parameters and `mask` covers all
+    of them. `fields` is empty for registers without fields. `init` is the
+    raw reset value or None. `window` is the number of words the register
+    is aliased over and `entries` the number of FIFO entries it packs; only
+    FIFO data registers may have more than one. `set_clr_tgl` registers
+    also have set, clear and toggle alias offsets and `bit_access` registers
+    a bit band alias.
+    """
+    __slots__ = ("name", "size", "bits", "mask", "mode", "fifo", "offset", "init",
+                 "read_port", "write_port", "auto_clear", "bit_access", "byte_access", "set_clr_tgl",
+                 "description", "fields", "window", "entries")
+
+    def __init__(self, r, model):
+        self.name = r['name']
+        self.size = r['size']
+        self.bits = model.resolve(r['size'], f"register '{r['name']}'")
+        self.mask = 2**self.bits - 1
+        self.mode = r['mode']
+        self.fifo = r.get('fifo') is True
+        self.offset = r['offset']
+        self.init = r.get('init')
+        self.read_port = r.get('read_port')
+        self.write_port = r.get('write_port')
+        self.auto_clear = r.get('auto_clear')
+        self.bit_access = r.get('bit_access') == True
+        self.byte_access = r.get('byte_access') == 1
+        self.set_clr_tgl = r.get('set_clr_tgl') == True
+        self.description = r.get('description', "")
+        self.fields = [Field(f, model) for f in r.get('fields', [])]
+        self.window = 1
+        self.entries = 1
+
+
+class Flag:
+    """
+    An interrupt flag; `bits` is the width of its port and `pos` is the
+    position of its first bit in the interrupt registers.
+    """
+    __slots__ = ("name", "port", "bits", "pos", "description")
+
+    def __init__(self, f, model, pos):
+        self.name = f['name']
+        self.port = f['port']
+        self.bits = model.resolve(model.get_port_width(f['port'], f"flag '{f['name']}'"), f"flag '{f['name']}'")
+        self.pos = pos
+        self.description = f.get('description', "")
+
+
+class Fifo:
+    """
+    A FIFO. `window` is the number of words its data register is aliased
+    over, so that incrementing bursts all access the FIFO. A `packed` FIFO
+    moves `entries` entries of `bits` bits per access of its data register;
+    its entry counts are `count_bits` wide. Its width must be a literal 8 or
+    16: the entries are laid out when the wrapper is generated and would no
+    longer fit the word if a width parameter were overridden.
+    """
+    __slots__ = ("name", "type", "width", "bits", "address_width", "register",
+                 "data_port", "control_port", "flush_enable", "flush_port",
+                 "threshold_port", "level_port", "window", "packed", "entries", "count_bits")
+
+    def __init__(self, f, model):
+        self.name = f['name']
+        self.type = f['type']
+        self.width = f.get('width')
+        self.bits = model.resolve(self.width, f"FIFO '{self.name}'") if self.width is not None else None
+        self.address_width = f['address_width']
+        self.register = f['register']
+        self.data_port = f['data_port']
+        self.control_port = f['control_port']
+        self.flush_enable = f.get('flush_enable') == True
+        self.flush_port = f.get('flush_port')
+        self.threshold_port = f.get('threshold_port')
+        self.level_port = f.get('level_port')
+        self.window = f.get('window', 1)
+        if not isinstance(self.window, int) or self.window < 1 or self.window & (self.window - 1):
+            sys.exit(f"The window of FIFO '{self.name}' must be a power of 2.")
+        self.packed = f.get('packed') == True
+        self.entries = 1
+        self.count_bits = 1
+        if self.packed:
+            if self.width not in (8, 16):
+                sys.exit(f"Packed FIFO '{self.name}' must have a width of 8 or 16 (not a parameter); it is {self.width}.")
+            self.entries = 32 // self.bits
+            self.count_bits = self.entries.bit_length()
+
+
+class IPModel:
+    """
+    The IP model. `info` is kept as the raw dictionary as it only carries
+    documentation; all other sections are normalized. `params_by_name` and
+    `ports_by_name` index the parameters and the IP ports by name and
+    `regs_by_name` indexes the registers.
+    """
+    __slots__ = ("name", "info", "parameters", "params_by_name", "ports",
+                 "ports_by_name", "external_interface", "clock", "clock_gated",
+                 "reset", "reset_level", "registers", "regs_by_name", "flags",
+                 "flag_size", "fifos",
+                 "read_mux", "registered_read", "shared_decoder", "wb_pipelined")
+
+    def __init__(self, ip):
+        self.info = ip['info']
+        self.name = ip['info']['name']
+        self.parameters = [Parameter(p) for p in ip.get('parameters', [])]
+        self.params_by_name = {p.name: p for p in self.parameters}
+        self.ports = [Port(p, self) for p in ip.get('ports', [])]
+        self.ports_by_name = {p.name: p for p in self.ports}
+        self.external_interface = [Port(p, self) for p in ip.get('external_interface') or []]
+        self.clock = ip['clock']['name']
+        self.clock_gated = ip['clock'].get('gated') == 'yes'
+        self.reset = ip['reset']['name']
+        self.reset_level = ip['reset']['level']
+        self.registers = [Register(r, self) for r in ip.get('registers', [])]
+        self.regs_by_name = {r.name: r for r in self.registers}
+        self.flags = []
+        pos = 0
+        for f in ip.get('flags', []):
+            flag = Flag(f, self, pos)
+            self.flags.append(flag)
+            pos += flag.bits
+        self.flag_size = pos
+        self.fifos = [Fifo(f, self) for f in ip.get('fifos', [])]
+        for f in self.fifos:
+            if f.window > 1:
+                self.set_window(f)
+        self.read_mux = ip['info'].get('read_mux', "chain")
+        if self.read_mux not in READ_MUX_STYLES:
+            sys.exit(f"Unknown read_mux '{self.read_mux}'; valid styles are: {', '.join(READ_MUX_STYLES)}.")
+        self.registered_read = ip['info'].get('registered_read') == True
+        self.shared_decoder = ip['info'].get('shared_decoder') == True
+        self.wb_pipelined = ip['info'].get('wb_pipelined') == True
+        for f in self.fifos:
+            if f.packed:
+                self.set_packed(f)
+
+    def set_window(self, fifo):
+        """
+        Alias the data register of a FIFO over its window; the window must
+        be aligned and must not hold other registers.
+        """
+        if fifo.register not in self.regs_by_name:
+            sys.exit(f"Unknown register '{fifo.register}' used by FIFO '{fifo.name}'.")
+        reg = self.regs_by_name[fifo.register]
+        size = fifo.window * 4
+        if reg.offset % size:
+            sys.exit(f"The {fifo.window}-word window of FIFO '{fifo.name}' requires register '{reg.name}' to be at a multiple of {hex(size)}.")
+        for r in self.registers:
+            if r is not reg and reg.offset <= r.offset < reg.offset + size:
+                sys.exit(f"Register '{r.name}' is within the {fifo.window}-word window of FIFO '{fifo.name}'.")
+        reg.window = fifo.window
+
+    def set_packed(self, fifo):
+        """
+        Widen the data register of a packed FIFO to a full word and set the
+        reset value of the entry count register of a write FIFO to a full
+        word of entries.
+        """
+        if self.registered_read:
+            sys.exit(f"Packed FIFO '{fifo.name}' cannot be used with registered_read.")
+        if fifo.register not in self.regs_by_name:
+            sys.exit(f"Unknown register '{fifo.register}' used by FIFO '{fifo.name}'.")
+        reg = self.regs_by_name[fifo.register]
+
+        reg.size = reg.bits = 32
+        reg.mask = 2**32 - 1
+        reg.entries = fifo.entries
+        if fifo.type == "write":
+            self.regs_by_name[f"{fifo.name.upper()}_PCOUNT"].init = f"'h{fifo.entries:X}"
+
+    def get_port_width(self, port, user="the IP"):
+        """
+        Get the width of an IP port as written in the description; `user`
+        names what refers to the port in the error message.
+        """
+        if port not in self.ports_by_name:
+            sys.exit(f"Unknown port '{port}' used by {user}.")
+        return self.ports_by_name[port].width
+
+    def get_param_default(self, param, user="the IP"):
+        if param not in self.params_by_name:
+            sys.exit(f"Unknown parameter '{param}' used by {user}.")
+        return self.params_by_name[param].default
+
+    def resolve(self, width, user="the IP"):
+        """
+        Resolve a width given as a number or as a parameter name.
+        """
+        if isinstance(width, int):
+            return width
+        return self.get_param_default(width, user)
@@ -0,0 +1,156 @@
+"""
+	Copyright 2024 Efabless Corp.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at:
+
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+"""
+   The validation of an IP description. The register map is checked in
+   one pass: the register address ranges (together with the ranges the
+   generator reserves for the FIFO, interrupt and clock gating registers)
+   and the field bit ranges of every register are sorted and swept once,
+   so overlaps are found in O(n log n) rather than by comparing every pair.
+   All errors are collected and reported together, with the line of the
+   offending entry for YAML files.
+"""
+
+
+def get_bits(width, params):
+    """
+    Resolve a width given as a number or as a parameter name; None if the
+    parameter is not defined.
+    """
+    if isinstance(width, int):
+        return width
+    return params.get(width)
+
+
+def find_overlaps(intervals):
+    """
+    Find the overlapping intervals in a list of (start, end, item) tuples,
+    where end is exclusive. The intervals are sorted by start and each one
+    is compared with the interval that reaches the furthest so far.
+
+    Returns:
+        list: (item, overlapped item) tuples.
+    """
+    overlaps = []
+    last = None
+    for start, end, item in sorted(intervals, key=lambda i: i[0]):
+        if last is not None and start < last[1]:
+            overlaps.append((item, last[2]))
+        if last is None or end > last[1]:
+            last = (start, end, item)
+    return overlaps
+
+
+def validate(ip, reserved):
+    """
+    Check an IP description as loaded, before the FIFO registers are added.
+
+    Args:
+        ip (dict): The IP description.
+        reserved (list): (name, offset, size in bytes) of the address ranges
+            of the registers added by the generator.
+
+    Returns:
+        list: (path, message) tuples; path locates the offending entry in
+            the description, e.g. ("registers", 3, "fields", 1).
+    """
+    errors = []
+    params = {p['name']: p.get('default') for p in ip.get('parameters') or []}
+    ports = {p['name'] for p in ip.get('ports') or []}
+    windows = {f.get('register'): f.get('window', 1) for f in ip.get('fifos') or []}
+
+    intervals = [(offset, offset + size, (None, f"{name} at {hex(offset)}")) for name, offset, size in reserved]
+    names = {}
+    for i, r in enumerate(ip.get('registers') or []):
+        path = ("registers", i)
+        name = r.get('name')
+        if name in names:
+            errors.append((path, f"Register '{name}' is already defined."))
+        names[name] = i
+
+        bits = get_bits(r.get('size'), params)
+        if bits is None:
+            errors.append((path, f"Unknown parameter '{r.get('size')}' used as the size of register '{name}'."))
+        elif not 1 <= bits <= 32:
+            errors.append((path, f"The size of register '{name}' must be 1 to 32 bits; it is {bits}."))
+
+        offset = r.get('offset')
+        if not isinstance(offset, int):
+            errors.append((path, f"Register '{name}' has no numeric offset."))
+            continue
+        if offset % 4:
+            errors.append((path, f"Register '{name}' offset {hex(offset)} is not a multiple of 4."))
+        window = windows.get(name, 1) if r.get('fifo') is True else 1
+        intervals.append((offset, offset + 4 * (window if isinstance(window, int) else 1), (path, f"register '{name}' at {hex(offset)}")))
+
+        fields = []
+        for j, f in enumerate(r.get('fields') or []):
+            field_path = path + ("fields", j)
+            field_bits = get_bits(f.get('bit_width'), params)
+            if field_bits is None:
+                errors.append((field_path, f"Unknown parameter '{f.get('bit_width')}' used as the width of field '{name}.{f.get('name')}'."))
+                continue
+            start = f.get('bit_offset', 0)
+            if bits is not None and start + field_bits > bits:
+                errors.append((field_path, f"Field '{name}.{f.get('name')}' (bits {start + field_bits - 1}:{start}) overflows the {bits}-bit register."))
+            fields.append((start, start + field_bits, (field_path, f.get('name'))))
+        for (field_path, field), (_, other) in find_overlaps(fields):
+            errors.append((field_path, f"Field '{name}.{field}' overlaps field '{name}.{other}'."))
+
+    for (path, item), (other_path, other) in find_overlaps(intervals):
+        if path is None:
+            # a reserved range sorted after a register; report the register
+            path, item, other = other_path, other, item
+        errors.append((path, f"The {item} overlaps the {other}."))
+
+    for i, f in enumerate(ip.get('flags') or []):
+        if f.get('port') not in ports:
+            errors.append((("flags", i), f"Unknown port '{f.get('port')}' used by flag '{f.get('name')}'."))
+
+    for i, f in enumerate(ip.get('fifos') or []):
+        if f.get('register') not in names:
+            errors.append((("fifos", i), f"Unknown register '{f.get('register')}' used by FIFO '{f.get('name')}'."))
+
+    return errors
+
+
+def get_lines(data, loader, paths):
+    """
+    Get the line numbers (1-based) of entries of a YAML description. The
+    file is composed into a node tree, which keeps the positions that the
+    loaded dictionary does not; this is only done when there are errors.
+
+    Returns:
+        dict: path -> line number.
+    """
+    import yaml
+    root = yaml.compose(data, Loader=loader)
+    lines = {}
+    for path in paths:
+        node = root
+        for key in path:
+            if isinstance(node, yaml.MappingNode):
+                node = next((v for k, v in node.value if k.value == key), None)
+            elif isinstance(node, yaml.SequenceNode) and key < len(node.value):
+                node = node.value[key]
+            else:
+                node = None
+            if node is None:
+                break
+        if node is not None:
+            lines[path] = node.start_mark.line + 1
+    return lines